@@ -0,0 +1,151 @@
+"""Query activity log behind the "Dashboard" page.
+
+Each question a user asks is appended to ``query_events`` and, in the same
+transaction, counted into per-user hourly, daily and monthly rollup
+tables plus a per-user totals row. Charts read the rollups, so drawing
+7 days, 30 days or a year costs a bounded number of rows no matter how
+many raw events exist.
+
+Reads go through a pool of read-only connections (db.py). Every write
+bumps the user's ``generation``, which the cached queries in data.py use
+to drop that user's stale results.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from db import ConnectionPool
+from settings import data_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_events (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    query TEXT NOT NULL,
+    url TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS query_events_user_time ON query_events (user, created_at);
+CREATE TABLE IF NOT EXISTS query_hourly (
+    user TEXT NOT NULL, bucket TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (user, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS query_daily (
+    user TEXT NOT NULL, bucket TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (user, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS query_monthly (
+    user TEXT NOT NULL, bucket TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (user, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS query_totals (
+    user TEXT PRIMARY KEY, total INTEGER NOT NULL, last_at REAL NOT NULL
+);
+"""
+
+# Rollup table and bucket key format for each granularity.
+ROLLUPS = {
+    "hour": ("query_hourly", "%Y-%m-%d %H"),
+    "day": ("query_daily", "%Y-%m-%d"),
+    "month": ("query_monthly", "%Y-%m"),
+}
+
+# Dashboard ranges: (granularity, number of buckets).
+RANGES = {
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30),
+    "1y": ("month", 12),
+}
+
+
+def _bucket_starts(granularity, count, now):
+    """The last ``count`` bucket start times up to and including ``now``."""
+    if granularity == "hour":
+        end = now.replace(minute=0, second=0, microsecond=0)
+        return [end - timedelta(hours=i) for i in reversed(range(count))]
+    if granularity == "day":
+        end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return [end - timedelta(days=i) for i in reversed(range(count))]
+    starts = []
+    year, month = now.year, now.month
+    for _ in range(count):
+        starts.append(datetime(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+class ActivityLog:
+    def __init__(self, path=None):
+        self._pool = ConnectionPool(path or data_path("activity.sqlite3"), SCHEMA)
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def generation(self, user):
+        """Number of writes for ``user`` so far in this process."""
+        return self._generations[user]
+
+    def log_query(self, user, query, url=None, created_at=None):
+        """Record one query and update every rollup in the same transaction."""
+        created_at = created_at or time.time()
+        moment = datetime.fromtimestamp(created_at)
+        with self._pool.write() as db:
+            db.execute(
+                "INSERT INTO query_events (user, query, url, created_at) VALUES (?, ?, ?, ?)",
+                (user, query, url, created_at))
+            for table, fmt in ROLLUPS.values():
+                db.execute(
+                    f"INSERT INTO {table} (user, bucket, count) VALUES (?, ?, 1)"
+                    " ON CONFLICT (user, bucket) DO UPDATE SET count = count + 1",
+                    (user, moment.strftime(fmt)))
+            db.execute(
+                "INSERT INTO query_totals (user, total, last_at) VALUES (?, 1, ?)"
+                " ON CONFLICT (user) DO UPDATE SET total = total + 1,"
+                " last_at = MAX(last_at, excluded.last_at)",
+                (user, created_at))
+        with self._lock:
+            self._generations[user] += 1
+
+    def series(self, user, range_name="7d", now=None):
+        """``(bucket_start, count)`` pairs for a dashboard range, zero-filled."""
+        granularity, count = RANGES[range_name]
+        table, fmt = ROLLUPS[granularity]
+        starts = _bucket_starts(granularity, count, now or datetime.now())
+        keys = [start.strftime(fmt) for start in starts]
+        with self._pool.read() as db:
+            rows = dict(db.execute(
+                f"SELECT bucket, count FROM {table} WHERE user = ? AND bucket BETWEEN ? AND ?",
+                (user, keys[0], keys[-1])).fetchall())
+        return [(start, rows.get(key, 0)) for start, key in zip(starts, keys)]
+
+    def today(self, user, now=None):
+        """Number of queries ``user`` submitted today."""
+        key = (now or datetime.now()).strftime(ROLLUPS["day"][1])
+        with self._pool.read() as db:
+            row = db.execute(
+                "SELECT count FROM query_daily WHERE user = ? AND bucket = ?", (user, key)).fetchone()
+        return row[0] if row else 0
+
+    def totals(self, user):
+        """``(total_queries, last_query_time)``; ``(0, None)`` for new users."""
+        with self._pool.read() as db:
+            row = db.execute(
+                "SELECT total, last_at FROM query_totals WHERE user = ?", (user,)).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def recent(self, user, limit=10, offset=0, order="created_at", descending=True):
+        """A window of the user's queries, newest first by default.
+
+        ``order`` is ``"created_at"`` or ``"query"``; sorting and slicing
+        happen in SQLite.
+        """
+        column = {"created_at": "created_at", "query": "query COLLATE NOCASE"}[order]
+        direction = "DESC" if descending else "ASC"
+        with self._pool.read() as db:
+            rows = db.execute(
+                "SELECT query, url, created_at FROM query_events WHERE user = ?"
+                f" ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?",
+                (user, limit, offset)).fetchall()
+        return [{"query": q, "url": u, "created_at": t} for q, u, t in rows]
@@ -0,0 +1,336 @@
+"""Rights alerts: topic subscriptions, asyncio fan-out and in-app inboxes.
+
+``publish`` stores an alert and returns at once; everything after that
+runs on the engine's own asyncio loop, on a daemon thread inside the
+Streamlit process (like the chat server), so no session ever waits on a
+fan-out:
+
+* recipients come from an inverted index, topic -> subscribed users, so
+  an alert only touches the users of its topics; ``EVERYONE`` reaches
+  every known user;
+* each recipient's alert id is appended to a pending list, a few
+  thousand users at a time with the loop yielded in between;
+* every ``FLUSH_INTERVAL`` seconds the pending lists are written to the
+  inbox table in large batches. All alerts a user has pending become one
+  inbox entry (coalescing), and a user gets at most ``RATE_LIMIT``
+  entries per ``RATE_WINDOW``; past that their alerts keep coalescing
+  until the window rolls over.
+
+The Notifications page reads the inbox table. With ``SWARAJYA_ALERT_FILE``
+set, every delivery is also appended to that file as a JSON line, for a
+push or e-mail stand-in to consume.
+
+``python alerts.py --users 300000`` times a broadcast fan-out.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from db import ConnectionPool
+from settings import data_path
+from timing import record as record_timing
+
+TOPICS = (
+    "Fundamental Rights",
+    "Right to Information",
+    "Land & Property",
+    "Labour & Wages",
+    "Women & Children",
+    "Consumer Rights",
+    "Elections",
+)
+# Pseudo-topic of broadcast alerts.
+EVERYONE = "*"
+
+FLUSH_INTERVAL = float(os.environ.get("SWARAJYA_ALERT_FLUSH", "1.0"))
+RATE_LIMIT = int(os.environ.get("SWARAJYA_ALERT_RATE", "5"))
+RATE_WINDOW = 3600
+SINK_FILE = os.environ.get("SWARAJYA_ALERT_FILE", "")
+# Users handled between two yields of the event loop.
+FANOUT_CHUNK = 5000
+# Inbox rows written per transaction.
+WRITE_BATCH = 20_000
+# A user's coalesced entry keeps only their newest pending alerts.
+MAX_COALESCED = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    topics TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subscribers (
+    user TEXT PRIMARY KEY,
+    joined_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS subscriptions (
+    user TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (user, topic)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS inbox (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    alerts TEXT NOT NULL,
+    delivered_at REAL NOT NULL,
+    read_at REAL
+);
+CREATE INDEX IF NOT EXISTS inbox_user ON inbox (user, id);
+CREATE INDEX IF NOT EXISTS inbox_unread ON inbox (user) WHERE read_at IS NULL;
+"""
+
+
+class TopicIndex:
+    """Inverted index from topic to subscribed users, plus every known user."""
+
+    def __init__(self):
+        self._users = {}
+        self._topics = defaultdict(set)
+
+    def __len__(self):
+        return len(self._users)
+
+    def set(self, user, topics):
+        for topic in self._users.get(user, ()):
+            self._topics[topic].discard(user)
+        self._users[user] = frozenset(topics)
+        for topic in self._users[user]:
+            self._topics[topic].add(user)
+
+    def get(self, user):
+        return self._users.get(user)
+
+    def recipients(self, topics):
+        """Users subscribed to any of ``topics``; everyone for ``EVERYONE``."""
+        if EVERYONE in topics:
+            return list(self._users)
+        if len(topics) == 1:
+            return list(self._topics.get(topics[0], ()))
+        return list(set().union(*(self._topics.get(topic, ()) for topic in topics)))
+
+
+class AlertEngine:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, rate_limit=RATE_LIMIT,
+                 rate_window=RATE_WINDOW, sink_file=SINK_FILE):
+        self.flush_interval = flush_interval
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.sink_file = sink_file
+        self._pool = ConnectionPool(path or data_path("alerts.sqlite3"), SCHEMA)
+        self._index = TopicIndex()
+        self._lock = threading.Lock()
+        with self._pool.read() as db:
+            topics = defaultdict(list)
+            for user, topic in db.execute("SELECT user, topic FROM subscriptions"):
+                topics[user].append(topic)
+            for (user,) in db.execute("SELECT user FROM subscribers"):
+                self._index.set(user, topics[user])
+        # Only touched on the loop thread.
+        self._pending = {}
+        self._windows = {}
+        self._loop = None
+        self._ready = threading.Event()
+
+    # ───────────────────────────── any thread ─────────────────────────────
+
+    def start(self):
+        """Run the fan-out loop on a daemon thread; returns once it is running."""
+        thread = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+        thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def subscribe(self, user, topics):
+        """Set ``user``'s topics (possibly none: broadcasts only)."""
+        self.subscribe_many([(user, topics)])
+
+    def subscribe_many(self, items):
+        """``subscribe`` for many ``(user, topics)`` pairs in one transaction."""
+        items = [(user, sorted(set(topics))) for user, topics in items]
+        now = time.time()
+        with self._pool.write() as db:
+            db.executemany("INSERT OR IGNORE INTO subscribers (user, joined_at) VALUES (?, ?)",
+                           [(user, now) for user, _ in items])
+            db.executemany("DELETE FROM subscriptions WHERE user = ?", [(user,) for user, _ in items])
+            db.executemany("INSERT INTO subscriptions (user, topic) VALUES (?, ?)",
+                           [(user, topic) for user, topics in items for topic in topics])
+        with self._lock:
+            for user, topics in items:
+                self._index.set(user, topics)
+
+    def subscriptions(self, user):
+        """``user``'s topics, or ``None`` if they never subscribed."""
+        with self._lock:
+            topics = self._index.get(user)
+        return None if topics is None else sorted(topics)
+
+    def publish(self, title, body, topics):
+        """Store an alert and queue its fan-out; returns the alert id at once."""
+        topics = tuple(topics) or (EVERYONE,)
+        with self._pool.write() as db:
+            alert_id = db.execute(
+                "INSERT INTO alerts (title, body, topics, created_at) VALUES (?, ?, ?, ?)",
+                (title, body, json.dumps(topics), time.time())).lastrowid
+        self._loop.call_soon_threadsafe(self._incoming.put_nowait, (alert_id, topics, time.perf_counter()))
+        return alert_id
+
+    def flush(self, timeout=None):
+        """Wait for queued fan-outs and deliver everything the rate limits allow."""
+        return asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result(timeout)
+
+    def inbox(self, user, limit=20):
+        """Newest inbox entries: ``[{"id", "delivered_at", "read_at", "alerts": [...]}]``."""
+        with self._pool.read() as db:
+            entries = db.execute(
+                "SELECT id, alerts, delivered_at, read_at FROM inbox WHERE user = ?"
+                " ORDER BY id DESC LIMIT ?", (user, limit)).fetchall()
+            ids = sorted({alert_id for _, alerts, _, _ in entries for alert_id in json.loads(alerts)})
+            alerts = {}
+            if ids:
+                for alert_id, title, body, topics, created_at in db.execute(
+                        f"SELECT id, title, body, topics, created_at FROM alerts"
+                        f" WHERE id IN ({','.join('?' * len(ids))})", ids):
+                    alerts[alert_id] = {"title": title, "body": body, "topics": json.loads(topics),
+                                        "created_at": created_at}
+        return [{"id": entry_id, "delivered_at": delivered_at, "read_at": read_at,
+                 "alerts": [alerts[a] for a in reversed(json.loads(ids_json)) if a in alerts]}
+                for entry_id, ids_json, delivered_at, read_at in entries]
+
+    def unread(self, user):
+        """Number of unread inbox entries of ``user``."""
+        with self._pool.read() as db:
+            return db.execute("SELECT COUNT(*) FROM inbox WHERE user = ? AND read_at IS NULL",
+                              (user,)).fetchone()[0]
+
+    def mark_read(self, user):
+        with self._pool.write() as db:
+            db.execute("UPDATE inbox SET read_at = ? WHERE user = ? AND read_at IS NULL", (time.time(), user))
+
+    def recent_alerts(self, limit=10):
+        """Newest published alerts as ``(title, topics, created_at)``."""
+        with self._pool.read() as db:
+            rows = db.execute("SELECT title, topics, created_at FROM alerts ORDER BY id DESC LIMIT ?",
+                              (limit,)).fetchall()
+        return [(title, json.loads(topics), created_at) for title, topics, created_at in rows]
+
+    def stats(self):
+        """Subscriber count and fan-out backlog."""
+        with self._lock:
+            subscribers = len(self._index)
+        return {"subscribers": subscribers, "queued_alerts": self._incoming.qsize(),
+                "pending_users": len(self._pending)}
+
+    # ───────────────────────────── loop thread ─────────────────────────────
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._incoming = asyncio.Queue()
+        self._flush_lock = asyncio.Lock()
+        self._loop.create_task(self._fan_out())
+        self._loop.create_task(self._flusher())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _fan_out(self):
+        while True:
+            alert_id, topics, queued = await self._incoming.get()
+            try:
+                with self._lock:
+                    recipients = self._index.recipients(topics)
+                for start in range(0, len(recipients), FANOUT_CHUNK):
+                    for user in recipients[start:start + FANOUT_CHUNK]:
+                        pending = self._pending.setdefault(user, [])
+                        pending.append(alert_id)
+                        if len(pending) > MAX_COALESCED:
+                            del pending[0]
+                    await asyncio.sleep(0)
+                record_timing("alert fan-out", time.perf_counter() - queued)
+            finally:
+                self._incoming.task_done()
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _drain(self):
+        await self._incoming.join()
+        return await self._flush()
+
+    def _allow(self, user, now):
+        # Fixed window per user: (window start, entries delivered in it).
+        start, count = self._windows.get(user, (now, 0))
+        if now - start >= self.rate_window:
+            start, count = now, 0
+        if count >= self.rate_limit:
+            return False
+        self._windows[user] = (start, count + 1)
+        return True
+
+    async def _flush(self):
+        """Write every pending user allowed by their rate limit; returns the entries written."""
+        async with self._flush_lock:
+            now = time.time()
+            batch, written = [], 0
+            for index, user in enumerate(list(self._pending)):
+                if self._allow(user, now):
+                    batch.append((user, self._pending.pop(user)))
+                if len(batch) >= WRITE_BATCH:
+                    await self._loop.run_in_executor(None, self._deliver, batch, now)
+                    written += len(batch)
+                    batch = []
+                elif index % FANOUT_CHUNK == FANOUT_CHUNK - 1:
+                    await asyncio.sleep(0)
+            if batch:
+                await self._loop.run_in_executor(None, self._deliver, batch, now)
+                written += len(batch)
+            return written
+
+    def _deliver(self, batch, now):
+        # Runs in the default executor, off the loop.
+        rows = [(user, json.dumps(ids), now) for user, ids in batch]
+        with self._pool.write() as db:
+            db.executemany("INSERT INTO inbox (user, alerts, delivered_at) VALUES (?, ?, ?)", rows)
+        if self.sink_file:
+            with open(self.sink_file, "a") as fh:
+                fh.writelines(json.dumps({"user": user, "alerts": ids, "delivered_at": now}) + "\n"
+                              for user, ids in batch)
+        record_timing("alert delivery batch", time.time() - now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a broadcast alert fan-out.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--alerts", type=int, default=3, help="broadcasts published back to back")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = AlertEngine(os.path.join(tmp, "alerts.sqlite3")).start()
+        start = time.perf_counter()
+        engine.subscribe_many((f"user{i}", [TOPICS[i % len(TOPICS)]]) for i in range(args.users))
+        print(f"subscribed {args.users} users in {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        for n in range(args.alerts):
+            engine.publish(f"Broadcast {n}", "Load test", [EVERYONE])
+        published = time.perf_counter() - start
+        written = engine.flush()
+        elapsed = time.perf_counter() - start
+        print(f"published {args.alerts} alert(s) in {published * 1000:.1f}ms; "
+              f"{written} coalesced inbox entries written in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
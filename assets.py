@@ -0,0 +1,376 @@
+"""Theme stylesheets and the chat widget markup, built once and cached.
+
+Each asset is rendered once per theme with ``st.cache_data``. When static
+serving is enabled (``.streamlit/config.toml``), stylesheets are written
+to ``static/`` under a content-hashed name and each rerun sends only a
+one-line ``@import``; the browser fetches a given stylesheet once and
+keeps it until its contents, and so its name, change.
+"""
+
+import hashlib
+import os
+
+import streamlit as st
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+PALETTES = {
+    "light": {
+        "main_bg": "#f5f5f5",
+        "main_fg": "#181922",
+        "side_bg": "#fff",
+        "side_fg": "#232635",
+        "heading_color": "#181922",
+        "chat_bg": "#fff",
+        "chat_fg": "#262844",
+        "header_bg": "#007BFF",
+        "header_fg": "#fff",
+        "chat_input_bg": "#fff",
+        "chat_input_fg": "#232635",
+        "chat_input_border": "#bfc5e0",
+    },
+    "dark": {
+        "main_bg": "#181922",
+        "main_fg": "#f5f5f5",
+        "side_bg": "#232635",
+        "side_fg": "#f5f5f5",
+        "heading_color": "#f5f5f5",
+        "chat_bg": "#262844",
+        "chat_fg": "#fafbfc",
+        "header_bg": "#134a91",
+        "header_fg": "#fff",
+        "chat_input_bg": "#232635",
+        "chat_input_fg": "#f5f5f5",
+        "chat_input_border": "#484c64",
+    },
+}
+
+THEME_CSS = """
+body, .block-container, .main, .appview-container {{
+    background: {main_bg} !important;
+    color: {main_fg} !important;
+}}
+[data-testid="stSidebar"], .sidebar-content, .css-1d391kg {{
+    background: {side_bg} !important;
+    color: {side_fg} !important;
+}}
+h1, h2, h3, h4, h5, h6, .stTitle, .stHeader, .stSubheader {{
+    color: {heading_color} !important;
+}}
+"""
+
+# The chat widget lives in its own iframe, so its theme colours have to be
+# part of the widget markup rather than of the page stylesheet.
+CHAT_THEME_CSS = """
+.chat-popup, .chat-footer, .chat-body, .chat-header {{
+    background: {chat_bg} !important;
+    color: {chat_fg} !important;
+}}
+.chat-header {{
+    background: {header_bg} !important;
+    color: {header_fg} !important;
+}}
+.chat-footer input {{
+    background: {chat_input_bg} !important;
+    color: {chat_input_fg} !important;
+    border: 1px solid {chat_input_border} !important;
+}}
+"""
+
+HOME_CSS = """
+body {
+    background-color: #f4f4f9;
+    color: #333;
+}
+h1, h3 {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    text-align: center;
+}
+h1 {
+    color: #0050b3;
+    font-weight: 700;
+}
+h3 {
+    color: #0073e6;
+    font-style: italic;
+}
+.stButton > button {
+    background-color: #0073e6;
+    color: white;
+    border-radius: 8px;
+    height: 3em;
+    width: 100%;
+    font-size: 16px;
+    transition: background-color 0.3s ease;
+}
+.stButton > button:hover {
+    background-color: #0050b3;
+}
+/* Center and set fixed max-width for selectbox container */
+.css-1v0mbdj.edgvbvh3 {
+    max-width: 320px;
+    margin-left: auto;
+    margin-right: auto;
+}
+"""
+
+FOOTER_CSS = """
+.css-1rs6os.edgvbvh3 {
+    background: #0f1116;
+    color: #fff;
+}
+.stButton>button {
+    background-color: #e63946;
+    color: white;
+    font-weight: bold;
+    border-radius: 12px;
+    padding: 10px 20px;
+}
+.stButton>button:hover {
+    background-color: #ff595e;
+    color: #000;
+}
+"""
+
+CHAT_HTML = """
+<style>
+.chat-icon {
+    position: fixed;
+    bottom: 20px;
+    right: 20px;
+    width: 60px;
+    height: 60px;
+    background-color: #007BFF;
+    color: white;
+    font-size: 28px;
+    border-radius: 50%;
+    border: none;
+    box-shadow: 0 4px 10px rgba(0,0,0,0.2);
+    cursor: pointer;
+    z-index: 2147483647 !important;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    transition: background 0.3s;
+}
+.chat-icon:hover {
+    background-color: #0056b3;
+}
+/* Overlap guaranteed, never hidden */
+.chat-popup {
+    position: fixed;
+    bottom: 90px;
+    right: 20px;
+    width: 350px;
+    max-width: 96vw;
+    height: 450px;
+    max-height: 70vh;
+    background: #fff;
+    border-radius: 16px 16px 8px 16px;
+    box-shadow: 0 8px 28px rgba(0,0,0,0.20);
+    display: none;
+    flex-direction: column;
+    overflow: hidden;
+    z-index: 2147483647 !important;
+    font-family: 'Segoe UI', Arial, sans-serif;
+}
+.chat-popup.active { display: flex; }
+.chat-header {
+    background-color: #007BFF;
+    color: white;
+    padding: 15px;
+    font-size: 18px;
+    font-weight: 600;
+    letter-spacing: 0.8px;
+    text-align: left;
+    border-bottom: 1px solid #0070df33;
+    position: relative;
+}
+.chat-header .close-btn {
+    position: absolute;
+    right: 12px; top: 12px;
+    color: white;
+    background: transparent;
+    font-size: 19px;
+    border: none;
+    cursor: pointer;
+}
+.chat-body {
+    flex: 1;
+    padding: 12px;
+    overflow-y: auto;
+    background: #f7f7fa;
+    font-size: 15px;
+}
+.chat-footer {
+    display: flex;
+    padding: 10px 9px;
+    border-top: 1px solid #eee;
+    background: #fff;
+}
+.chat-footer input {
+    flex: 1;
+    padding: 9px 12px;
+    border: 1px solid #ccc;
+    border-radius: 13px;
+    font-size: 15px;
+    outline: none;
+    margin-right: 6px;
+}
+.chat-footer button {
+    padding: 8px 17px;
+    background: #007BFF;
+    border: none;
+    border-radius: 11px;
+    color: white;
+    font-weight: 600;
+    cursor: pointer;
+    font-size: 15px;
+    transition: background 0.2s;
+}
+.chat-footer button:hover { background: #0056b3; }
+@media screen and (max-width:510px){
+    .chat-popup { width: 97vw; height: 85vw; min-height: 290px; }
+}
+.chat-body::-webkit-scrollbar { width: 0; background: transparent;}
+</style>
+
+<button class="chat-icon" id="floatingBtn" title="Open chat" onclick="toggleChat()">💬</button>
+<div class="chat-popup" id="chatPopup">
+    <div class="chat-header">
+        Swarajya Chatbot
+        <button class="close-btn" onclick="toggleChat()" title="Close">&times;</button>
+    </div>
+    <div class="chat-body" id="chatBody"></div>
+    <div class="chat-footer">
+        <input type="text" id="chatInput" placeholder="Type a message..." autocomplete="off"
+            onkeydown="if(event.key==='Enter'){sendMessage(); return false;}" />
+        <button onclick="sendMessage()">Send</button>
+    </div>
+</div>
+<script>
+function toggleChat() {
+    var popup = document.getElementById("chatPopup");
+    if(!popup.classList.contains("active")) {
+        popup.classList.add("active");
+        document.getElementById("chatInput").focus();
+    } else {
+        popup.classList.remove("active");
+    }
+}
+function scrollChatToBottom() {
+    var body = document.getElementById("chatBody");
+    setTimeout(function(){
+        body.scrollTop = body.scrollHeight;
+    },15);
+}
+var CHAT_URL = __CHAT_URL__;
+var CHAT_SESSION = __CHAT_SESSION__;
+function addLine(label, color, text) {
+    var line = document.createElement("div");
+    var who = document.createElement("span");
+    who.style.color = color;
+    who.style.fontWeight = "600";
+    who.textContent = label + " ";
+    var said = document.createElement("span");
+    said.textContent = text;
+    line.appendChild(who);
+    line.appendChild(said);
+    document.getElementById("chatBody").appendChild(line);
+    scrollChatToBottom();
+    return line;
+}
+function sendMessage() {
+    var input = document.getElementById("chatInput");
+    var msg = input.value.trim();
+    if(!msg) { return; }
+    addLine("You:", "#267afe", msg).style.marginBottom = "6px";
+    input.value = '';
+
+    var line = addLine("Bot:", "#ff4a4a", "…");
+    line.style.marginBottom = "12px";
+    var said = line.lastChild;
+    fetch(CHAT_URL + "/chat", {
+        method: "POST",
+        headers: {"Content-Type": "text/plain"},
+        body: JSON.stringify({session: CHAT_SESSION, message: msg})
+    }).then(function(response) {
+        if(!response.ok) {
+            return response.json().then(function(reply) { said.textContent = reply.error; });
+        }
+        // Replies stream as one JSON object per line: tokens, then sources.
+        var reader = response.body.getReader();
+        var decoder = new TextDecoder();
+        var pending = "";
+        said.textContent = "";
+        function pump() {
+            return reader.read().then(function(step) {
+                if(step.done) { return; }
+                pending += decoder.decode(step.value, {stream: true});
+                var lines = pending.split("\\n");
+                pending = lines.pop();
+                lines.forEach(function(text) {
+                    if(!text) { return; }
+                    var event = JSON.parse(text);
+                    if(event.token) { said.textContent += event.token; }
+                    if(event.done && event.sources.length) {
+                        var cite = document.createElement("div");
+                        cite.style.fontSize = "12px";
+                        cite.style.opacity = "0.7";
+                        cite.textContent = "Sources: " + event.sources.map(function(s) { return s.title; }).join("; ");
+                        line.appendChild(cite);
+                    }
+                });
+                scrollChatToBottom();
+                return pump();
+            });
+        }
+        return pump();
+    }).catch(function() {
+        said.textContent = "The chat service is unreachable right now.";
+    });
+}
+</script>
+"""
+
+
+def _publish(name, text):
+    """Write ``text`` to ``static/<name>-<hash>.css`` once; return its URL."""
+    digest = hashlib.sha256(text.encode()).hexdigest()[:12]
+    filename = f"{name}-{digest}.css"
+    path = os.path.join(STATIC_DIR, filename)
+    if not os.path.exists(path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(path + ".tmp", path)
+    return f"app/static/{filename}"
+
+
+def _stylesheet(name, css):
+    if st.get_option("server.enableStaticServing"):
+        return f'<style>@import url("{_publish(name, css)}");</style>'
+    return f"<style>{css}</style>"
+
+
+@st.cache_data
+def theme_stylesheet(theme):
+    """Page colours for ``theme`` ("light" or "dark")."""
+    return _stylesheet(f"theme-{theme}", THEME_CSS.format(**PALETTES[theme]))
+
+
+@st.cache_data
+def home_stylesheet():
+    return _stylesheet("home", HOME_CSS)
+
+
+@st.cache_data
+def footer_stylesheet():
+    return _stylesheet("footer", FOOTER_CSS)
+
+
+@st.cache_data
+def chat_widget(theme):
+    """Chat widget markup for ``theme``; the caller fills in the
+    ``__CHAT_URL__`` and ``__CHAT_SESSION__`` placeholders."""
+    return CHAT_HTML.replace("</style>", CHAT_THEME_CSS.format(**PALETTES[theme]) + "</style>", 1)
@@ -0,0 +1,387 @@
+"""Scan benchmark over a synthetic document corpus.
+
+A seeded corpus of text-like pages is generated with Pillow and NumPy, as
+PNG, JPEG and multi-page PDF, each either clean or tampered in one of
+three ways:
+
+* ``clone``: a block of the page pasted elsewhere on it (copy-move),
+* ``splice``: a block taken from another, more heavily compressed page,
+* ``metadata``: pixels untouched, but saved by editing software.
+
+Every document goes through the same path as a batch upload on the
+Document Scan page (``ScanQueue`` workers running ``scan_bytes`` /
+``scan_pdf``, verdicts from ``summarize_scan``). The report gives p50 /
+p95 / p99 scan latency, throughput, peak worker RSS and detection
+accuracy, and ``--out`` writes it as JSON. A 12 MP phone-photo sized
+JPEG is also timed on its own, in-process on one core.
+
+Every run is held to ``FLOORS``, absolute limits (false positive rate,
+recall, 12 MP scan time); the run exits with status 1 when one is
+missed, so CI can gate on it.
+``--baseline old.json`` also compares the run with an earlier report and
+fails when any metric is worse than ``THRESHOLDS`` allows.
+"""
+
+import argparse
+import functools
+import io
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+from PIL.PngImagePlugin import PngInfo
+
+from pdf_ingest import RENDER_DPI, scan_pdf, summarize_scan
+from scan_queue import ScanQueue, default_workers
+from scanner import SCANNER_VERSION, scan_bytes
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, memory is not reported
+    resource = None
+
+FORMATS = ("png", "jpeg", "pdf")
+KINDS = ("clean", "clone", "splice", "metadata")
+PAGE_SIZE = (1700, 2200)  # A4 at 200 dpi
+LARGE_PAGE_SIZE = (3000, 4000)  # 12 MP phone photo
+LARGE_PAGE_RUNS = 3
+PDF_PAGES = 3
+JPEG_QUALITY = 90
+SPLICE_QUALITY = 50
+EDITOR = "Adobe Photoshop 25.0"
+
+# Regression limits against a baseline report: (section, metric, kind,
+# limit). "ratio" fails when current / baseline leaves the limit (upper
+# bound above 1, lower bound below); "drop" when the metric falls by more
+# than the limit.
+THRESHOLDS = (
+    ("latency_ms", "p50", "ratio", 1.20),
+    ("latency_ms", "p95", "ratio", 1.25),
+    ("throughput", "docs_per_s", "ratio", 0.80),
+    ("memory", "peak_worker_rss_mb", "ratio", 1.25),
+    ("accuracy", "accuracy", "drop", 0.02),
+    ("accuracy", "recall", "drop", 0.02),
+    ("large_page_ms", "p50", "ratio", 1.20),
+)
+# Absolute limits for every run: (section, metric, "max" | "min", limit).
+# Splices in lossless and PDF pages are not caught on purpose (see
+# scanner.LOSSLESS_ELA_WEIGHT), which caps recall at 7/9 on this corpus.
+# A 12 MP scan has to stay well under a second on one core.
+FLOORS = (
+    ("accuracy", "false_positive_rate", "max", 0.05),
+    ("accuracy", "recall", "min", 0.7),
+    ("accuracy", "precision", "min", 0.9),
+    ("large_page_ms", "p50", "max", 1000.0),
+)
+
+
+# ───────────────────────────── corpus ─────────────────────────────
+
+def text_page(rng, size=PAGE_SIZE):
+    """Grayscale page of paper noise with rows of glyph-like ink blocks."""
+    w, h = size
+    page = np.full((h, w), 225, np.float32) + rng.normal(0, 6, (h, w))
+    s = h / 2000
+    for y in range(int(120 * s), h - int(120 * s), int(45 * s)):
+        x = int(100 * s)
+        while x < w - int(150 * s):
+            glyph = int(rng.integers(6, 14) * s)
+            if rng.random() < 0.85:
+                page[y:y + int(18 * s), x:x + glyph] = rng.integers(20, 70)
+            x += glyph + int(rng.integers(3, 7) * s)
+    img = Image.fromarray(np.clip(page, 0, 255).astype(np.uint8))
+    return np.asarray(img.filter(ImageFilter.GaussianBlur(0.8 * s))).copy()
+
+
+def _block(rng, shape):
+    h, w = shape
+    bh, bw = h // 6, w // 3
+    return bh, bw, int(rng.integers(h // 10, h - bh - h // 10)), int(rng.integers(w // 10, w - bw - w // 10))
+
+
+def tamper(page, kind, rng):
+    """Copy of ``page`` with ``kind`` pixel tampering (``clone`` / ``splice``)."""
+    out = page.copy()
+    bh, bw, y, x = _block(rng, page.shape)
+    if kind == "clone":
+        # Source a clear distance away, so the shift is well above min_shift.
+        sy = (y + page.shape[0] // 3) % (page.shape[0] - bh)
+        out[y:y + bh, x:x + bw] = page[sy:sy + bh, x:x + bw]
+    elif kind == "splice":
+        buf = io.BytesIO()
+        Image.fromarray(text_page(rng, page.shape[::-1])).save(buf, "JPEG", quality=SPLICE_QUALITY)
+        donor = np.asarray(Image.open(buf))
+        out[y:y + bh, x:x + bw] = donor[y:y + bh, x:x + bw]
+    return out
+
+
+def encode(pages, fmt, edited=False):
+    """Encode grayscale page arrays as a PNG / JPEG (first page) or a PDF."""
+    buf = io.BytesIO()
+    images = [Image.fromarray(p) for p in pages]
+    if fmt == "png":
+        info = PngInfo()
+        if edited:
+            info.add_text("Software", EDITOR)
+        images[0].save(buf, "PNG", pnginfo=info)
+    elif fmt == "jpeg":
+        exif = Image.Exif()
+        exif[0x010F], exif[0x0110] = "Synthetic", "Scanner 1"  # Make, Model
+        if edited:
+            exif[0x0131] = EDITOR  # Software
+        images[0].save(buf, "JPEG", quality=JPEG_QUALITY, exif=exif)
+    else:
+        images[0].save(buf, "PDF", resolution=RENDER_DPI, save_all=True, append_images=images[1:])
+        if edited:
+            # An incremental update naming the editor, as a PDF tool leaves it.
+            base = buf.getvalue()
+            prev = int(base.rsplit(b"startxref", 1)[1].split()[0])
+            root = re.search(rb"/Root\s+(\d+ \d+ R)", base).group(1).decode()
+            obj_at = buf.tell() + 1
+            buf.write(f"\n99 0 obj\n<< /Producer ({EDITOR}) >>\nendobj\n".encode())
+            xref_at = buf.tell()
+            buf.write(f"xref\n99 1\n{obj_at:010d} 00000 n \ntrailer\n"
+                      f"<< /Size 100 /Root {root} /Info 99 0 R /Prev {prev} >>\n"
+                      f"startxref\n{xref_at}\n%%EOF\n".encode())
+    return buf.getvalue()
+
+
+def build_corpus(per_case=2, seed=0, size=PAGE_SIZE, pdf_pages=PDF_PAGES):
+    """``per_case`` documents for every format and kind, deterministic per ``seed``."""
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for fmt in FORMATS:
+        for kind in KINDS:
+            for i in range(per_case):
+                pages = [text_page(rng, size) for _ in range(pdf_pages if fmt == "pdf" else 1)]
+                if kind in ("clone", "splice"):
+                    target = int(rng.integers(len(pages)))
+                    pages[target] = tamper(pages[target], kind, rng)
+                data = encode(pages, fmt, edited=kind == "metadata")
+                corpus.append({"name": f"{kind}-{i:02d}.{fmt}", "format": fmt, "kind": kind,
+                               "pages": len(pages), "data": data})
+    return corpus
+
+
+# ───────────────────────────── run ─────────────────────────────
+
+def _peak_rss_mb(who="self"):
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _timed_scan(kind, data):
+    # Runs in a scan worker: the verdict, the time spent scanning there
+    # (queue wait excluded) and the worker's RSS high-water mark.
+    start = time.perf_counter()
+    value = scan_pdf(data) if kind == "pdf" else scan_bytes(data)
+    elapsed = time.perf_counter() - start
+    status, score, _ = summarize_scan(kind, value)
+    return {"status": status, "score": score, "seconds": elapsed, "rss_mb": _peak_rss_mb()}
+
+
+def percentiles(values):
+    """Millisecond p50/p95/p99, mean and max of ``values`` in seconds (empty if none)."""
+    values = np.asarray(values, np.float64) * 1000
+    if not values.size:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 1), "p95": round(p95, 1), "p99": round(p99, 1),
+            "mean": round(values.mean(), 1), "max": round(values.max(), 1)}
+
+
+def time_large_page(seed=0, runs=LARGE_PAGE_RUNS, size=LARGE_PAGE_SIZE):
+    """Latency percentiles of ``scan_bytes`` on one ``size`` JPEG, run in this process."""
+    data = encode([text_page(np.random.default_rng(seed), size)], "jpeg")
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        scan_bytes(data)
+        seconds.append(time.perf_counter() - start)
+    return percentiles(seconds)
+
+
+def _rate(hits, total):
+    return round(hits / total, 4) if total else None
+
+
+def run(corpus, workers=None):
+    """Scan ``corpus`` through a fresh ``ScanQueue``; returns per-document rows and wall time."""
+    queue = ScanQueue(workers)
+    try:
+        # Start every worker before the clock does.
+        warm = [queue.submit(corpus[0]["data"], func=functools.partial(
+            _timed_scan, "pdf" if corpus[0]["format"] == "pdf" else "image")) for _ in range(queue.workers)]
+        while any(queue.status(job)["state"] in ("queued", "running") for job in warm):
+            time.sleep(0.01)
+
+        start = time.perf_counter()
+        jobs = [queue.submit(doc["data"], doc["name"], func=functools.partial(
+            _timed_scan, "pdf" if doc["format"] == "pdf" else "image")) for doc in corpus]
+        while queue.pending():
+            time.sleep(0.01)
+        wall = time.perf_counter() - start
+
+        rows = []
+        for doc, job_id in zip(corpus, jobs):
+            job = queue.status(job_id)
+            row = {k: doc[k] for k in ("name", "format", "kind", "pages")}
+            row.update(bytes=len(doc["data"]), expected="Clean" if doc["kind"] == "clean" else "Suspected Tampering")
+            if job["state"] == "done":
+                result = job["result"]
+                row.update(status=result["status"], score=result["score"],
+                           latency_ms=round(result["seconds"] * 1000, 1), rss_mb=result["rss_mb"])
+            else:
+                row.update(status="Failed", error=job.get("error", job["state"]))
+            rows.append(row)
+        return rows, wall, queue.workers
+    finally:
+        queue.shutdown()
+
+
+def summarize(rows, wall, workers, seed, size):
+    """The JSON report for one run."""
+    done = [r for r in rows if r["status"] != "Failed"]
+    tampered = [r for r in done if r["expected"] != "Clean"]
+    clean = [r for r in done if r["expected"] == "Clean"]
+    flagged = [r for r in done if r["status"] == "Suspected Tampering"]
+    true_pos = [r for r in tampered if r["status"] == "Suspected Tampering"]
+    correct = [r for r in done if r["status"] == r["expected"]]
+    worker_rss = [r["rss_mb"] for r in done if r.get("rss_mb") is not None]
+
+    return {
+        "meta": {
+            "scanner_version": SCANNER_VERSION,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": workers,
+            "seed": seed,
+            "page_size": list(size),
+            "documents": len(rows),
+            "pages": sum(r["pages"] for r in rows),
+            "bytes": sum(r["bytes"] for r in rows),
+        },
+        "latency_ms": percentiles([r["latency_ms"] / 1000 for r in done]),
+        "latency_ms_by_format": {fmt: percentiles([r["latency_ms"] / 1000 for r in done if r["format"] == fmt])
+                                 for fmt in FORMATS},
+        "throughput": {
+            "wall_s": round(wall, 3),
+            "docs_per_s": round(len(rows) / wall, 3),
+            "pages_per_s": round(sum(r["pages"] for r in rows) / wall, 3),
+            "mb_per_s": round(sum(r["bytes"] for r in rows) / wall / 1e6, 3),
+        },
+        "memory": {
+            "peak_worker_rss_mb": max(worker_rss) if worker_rss else None,
+            "parent_rss_mb": _peak_rss_mb(),
+        },
+        "accuracy": {
+            "accuracy": _rate(len(correct), len(done)),
+            "precision": _rate(len(true_pos), len(flagged)),
+            "recall": _rate(len(true_pos), len(tampered)),
+            "false_positive_rate": _rate(len(clean) - sum(r["status"] == "Clean" for r in clean), len(clean)),
+            "detected_by_kind": {kind: _rate(sum(r["status"] == "Suspected Tampering" for r in done if r["kind"] == kind),
+                                             sum(r["kind"] == kind for r in done)) for kind in KINDS},
+            "correct_by_format": {fmt: _rate(sum(r["status"] == r["expected"] for r in done if r["format"] == fmt),
+                                             sum(r["format"] == fmt for r in done)) for fmt in FORMATS},
+        },
+        "failures": len(rows) - len(done),
+        "documents": rows,
+    }
+
+
+def compare(report, baseline, thresholds=THRESHOLDS):
+    """Human-readable regressions of ``report`` against ``baseline`` (empty if none)."""
+    problems = []
+    for section, metric, kind, limit in thresholds:
+        old = baseline.get(section, {}).get(metric)
+        new = report.get(section, {}).get(metric)
+        if old is None or new is None:
+            continue
+        if kind == "drop":
+            if old - new > limit:
+                problems.append(f"{section}.{metric} fell from {old} to {new} (allowed drop {limit})")
+        elif old:
+            ratio = new / old
+            if (limit >= 1 and ratio > limit) or (limit < 1 and ratio < limit):
+                problems.append(f"{section}.{metric} went from {old} to {new} ({ratio:.2f}x, limit {limit}x)")
+    if report.get("failures", 0) > baseline.get("failures", 0):
+        problems.append(f"failures went from {baseline.get('failures', 0)} to {report['failures']}")
+    return problems
+
+
+def check_floors(report, floors=FLOORS):
+    """Human-readable misses of ``floors`` (empty if none)."""
+    problems = []
+    for section, metric, kind, limit in floors:
+        value = report.get(section, {}).get(metric)
+        if value is None:
+            continue
+        if (kind == "max" and value > limit) or (kind == "min" and value < limit):
+            problems.append(f"{section}.{metric} is {value} ({kind} {limit})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--per-case", type=int, default=2, help="documents per format and kind")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, nargs=2, default=PAGE_SIZE, metavar=("W", "H"),
+                        help="page size in pixels")
+    parser.add_argument("--workers", type=int, default=None, help=f"scan workers (default {default_workers()})")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to check for regressions")
+    parser.add_argument("--save-corpus", metavar="DIR", help="also write the generated documents to DIR")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = build_corpus(args.per_case, args.seed, tuple(args.size))
+    print(f"generated {len(corpus)} documents in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for doc in corpus:
+            with open(os.path.join(args.save_corpus, doc["name"]), "wb") as fh:
+                fh.write(doc["data"])
+
+    rows, wall, workers = run(corpus, args.workers)
+    report = summarize(rows, wall, workers, args.seed, args.size)
+    report["large_page_ms"] = time_large_page(args.seed)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    lat, acc = report["latency_ms"], report["accuracy"]
+    print(f"documents  {report['meta']['documents']} ({report['meta']['pages']} pages, "
+          f"{report['failures']} failed) on {workers} worker(s)")
+    print(f"latency    p50 {lat.get('p50')} ms  p95 {lat.get('p95')} ms  p99 {lat.get('p99')} ms")
+    print(f"12 MP scan p50 {report['large_page_ms'].get('p50')} ms")
+    print(f"throughput {report['throughput']['docs_per_s']} docs/s  {report['throughput']['pages_per_s']} pages/s")
+    print(f"memory     peak worker RSS {report['memory']['peak_worker_rss_mb']} MB")
+    print(f"accuracy   {acc['accuracy']}  precision {acc['precision']}  recall {acc['recall']}  "
+          f"false positives {acc['false_positive_rate']}")
+    print("detected   " + "  ".join(f"{k} {v}" for k, v in acc["detected_by_kind"].items()))
+
+    problems = check_floors(report)
+    for problem in problems:
+        print(f"BELOW FLOOR {problem}")
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh))
+        for problem in regressions:
+            print(f"REGRESSION {problem}")
+        problems += regressions
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
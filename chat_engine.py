@@ -0,0 +1,285 @@
+"""Offline constitutional Q&A retrieval behind the chatbot.
+
+Passages (articles, schedules, amendments) live as JSON lines under
+``corpus/``. ``build_index`` turns them into a single BM25 index file:
+a vocabulary header followed by flat posting arrays whose BM25 weights are
+computed at build time. ``ConstitutionIndex`` memory-maps that file, so
+start-up reads only the header and a query touches just the postings of
+its own terms; answering takes a millisecond or two and never leaves the
+machine.
+
+The shipped corpus is English only, and so is the light stemming and
+the number words (``18`` also matches "eighteen") used in ranking.
+Tokenizing is Unicode-aware, so passages in other languages can be dropped
+into ``corpus/`` as extra ``.jsonl`` files, but they are matched on exact
+words alone.
+
+Numbers in titles are indexed apart, as ``#N``, and a question only asks
+for one by saying "article N" (or naming a year, as amendment titles do):
+"can I vote at 18" is about Article 326, not Article 18.
+"""
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+from settings import data_path
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+INDEX_NAME = "constitution.bm25"
+MAGIC = b"SWBM25v1"
+# Bump when tokenizing or weighting changes, so index files are rebuilt.
+INDEX_VERSION = 2
+K1 = 1.2
+B = 0.75
+# Title terms count this many times, so "Article 21" finds Article 21.
+TITLE_BOOST = 2
+# Amendment notes retell the articles they changed, in fewer words; scaled
+# down so the article itself answers and the amendment is cited after it.
+PART_WEIGHTS = {"Amendments": 0.8}
+ANSWER_CHARS = 600
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its
+me my of on or shall that the their them there these this to was what when
+where which who whom why will with any all such other than into under
+""".split())
+
+# A number right after one of these is an article number.
+ARTICLE_WORDS = frozenset(("article", "articles", "art"))
+NUMBER_WORDS = dict(enumerate("""
+zero one two three four five six seven eight nine ten eleven twelve thirteen
+fourteen fifteen sixteen seventeen eighteen nineteen twenty
+""".split()))
+NUMBER_WORDS.update({30: "thirty", 40: "forty", 50: "fifty", 60: "sixty", 70: "seventy",
+                     80: "eighty", 90: "ninety"})
+
+_TOKEN = re.compile(r"\w+")
+_SENTENCE = re.compile(r"(?<=[.;])\s+")
+
+
+def _stem(word):
+    # Plural folding, then a few verb/noun endings, so "rights"/"right",
+    # "duties"/"duty" and "vote"/"voter"/"voting" meet.
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 4 and word.endswith(("er", "ed")):
+        word = word[:-2]
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lower-cased, stemmed terms of ``text`` with stopwords dropped."""
+    return [_stem(w) for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS]
+
+
+def title_terms(title):
+    """``tokenize(title)`` with its numbers as ``#N`` terms, kept apart from the text's."""
+    return [f"#{term}" if term.isdigit() else term for term in tokenize(title)]
+
+
+def query_terms(query):
+    """Terms of a question, matching ``title_terms`` and ``tokenize``.
+
+    A number asks for a title number (``#N``) after "article" or "art",
+    or when it is a year; otherwise it matches the text's numbers and
+    its English word.
+    """
+    terms, previous = [], None
+    for word in _TOKEN.findall(query.lower()):
+        if word.isdigit():
+            if previous in ARTICLE_WORDS or len(word) == 4:
+                terms.append(f"#{word}")
+            else:
+                terms.append(word)
+                if int(word) in NUMBER_WORDS:
+                    terms.append(NUMBER_WORDS[int(word)])
+        elif word not in STOPWORDS:
+            terms.append(_stem(word))
+        previous = word
+    return terms
+
+
+def corpus_files(corpus_dir=CORPUS_DIR):
+    return sorted(glob.glob(os.path.join(corpus_dir, "*.jsonl")))
+
+
+def corpus_signature(files):
+    """Fingerprint of the corpus files, stored in the index to spot staleness."""
+    digest = hashlib.sha256(f"index {INDEX_VERSION}\n".encode())
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def load_passages(files):
+    passages = []
+    for path in files:
+        with open(path, encoding="utf-8") as fh:
+            passages.extend(json.loads(line) for line in fh if line.strip())
+    return passages
+
+
+def build_index(out_path=None, corpus_dir=CORPUS_DIR):
+    """Write the BM25 index for ``corpus_dir`` and return its path.
+
+    Layout: ``MAGIC``, a little-endian u64 header length, the JSON header
+    (term -> [start, count] and the section sizes), then the doc-id
+    (u32) and weight (f32) posting arrays, and the passages as JSON.
+    """
+    out_path = out_path or data_path(INDEX_NAME)
+    files = corpus_files(corpus_dir)
+    passages = load_passages(files)
+
+    postings = {}
+    lengths = np.zeros(len(passages), np.float32)
+    prior = np.array([PART_WEIGHTS.get(p.get("part"), 1.0) for p in passages], np.float32)
+    for doc, passage in enumerate(passages):
+        terms = title_terms(passage["title"]) * TITLE_BOOST + tokenize(passage["text"])
+        lengths[doc] = len(terms)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc, tf))
+
+    n_docs = len(passages)
+    avgdl = float(lengths.mean()) if n_docs else 0.0
+    norm = K1 * (1 - B + B * lengths / avgdl) if n_docs else lengths
+    vocab, doc_ids, weights = {}, [], []
+    start = 0
+    for term in sorted(postings):
+        docs, tfs = zip(*postings[term])
+        docs = np.asarray(docs, np.uint32)
+        tfs = np.asarray(tfs, np.float32)
+        idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        vocab[term] = [start, len(docs)]
+        doc_ids.append(docs)
+        weights.append((prior[docs] * idf * tfs * (K1 + 1) / (tfs + norm[docs])).astype(np.float32))
+        start += len(docs)
+
+    doc_ids = np.concatenate(doc_ids) if doc_ids else np.zeros(0, np.uint32)
+    weights = np.concatenate(weights) if weights else np.zeros(0, np.float32)
+    docs_blob = [json.dumps(p, ensure_ascii=False).encode() for p in passages]
+    doc_offsets = np.cumsum([0] + [len(b) for b in docs_blob], dtype=np.uint64)
+
+    header = {"docs": n_docs, "postings": int(start), "avgdl": avgdl, "k1": K1, "b": B,
+              "signature": corpus_signature(files), "terms": vocab}
+    header_bytes = json.dumps(header, ensure_ascii=False).encode()
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        # Align the numeric sections so they can be viewed without copying.
+        fh.write(b"\0" * (-fh.tell() % 8))
+        for array in (doc_ids, weights, doc_offsets):
+            fh.write(array.tobytes())
+        fh.write(b"".join(docs_blob))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class ConstitutionIndex:
+    def __init__(self, path=None, corpus_dir=CORPUS_DIR):
+        path = path or data_path(INDEX_NAME)
+        files = corpus_files(corpus_dir)
+        if files and (not os.path.exists(path) or _read_header(path)[0]["signature"] != corpus_signature(files)):
+            build_index(path, corpus_dir)
+        header, base = _read_header(path)
+        self.path = path
+        self._terms = header["terms"]
+        self.size = header["docs"]
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        count = header["postings"]
+        self._doc_ids = np.frombuffer(self._mm, np.uint32, count, base)
+        self._weights = np.frombuffer(self._mm, np.float32, count, base + 4 * count)
+        self._doc_offsets = np.frombuffer(self._mm, np.uint64, self.size + 1, base + 8 * count)
+        self._docs_base = base + 8 * count + 8 * (self.size + 1)
+
+    def passage(self, doc):
+        start, end = (int(x) for x in self._doc_offsets[doc:doc + 2])
+        return json.loads(self._mm[self._docs_base + start:self._docs_base + end])
+
+    def search(self, query, k=3):
+        """Top ``k`` passages for ``query`` as dicts with a ``score`` key."""
+        scores = np.zeros(self.size, np.float32)
+        for term in set(query_terms(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, count = entry
+            # A term lists each document once, so plain fancy-index adds are safe.
+            scores[self._doc_ids[start:start + count]] += self._weights[start:start + count]
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [dict(self.passage(int(doc)), score=float(scores[doc])) for doc in hits]
+
+    def answer(self, query, k=3):
+        """Chat reply for ``query``: ``{"answer", "sources"}``."""
+        hits = self.search(query, k)
+        if not hits:
+            return {"answer": "I could not find that in the Constitution. Try naming a right, "
+                              "an article number or a keyword.", "sources": []}
+        best = hits[0]
+        return {"answer": f"{best['title']}: {_excerpt(best['text'], query)}",
+                "sources": [{"id": h["id"], "title": h["title"], "score": round(h["score"], 3)}
+                            for h in hits]}
+
+    def close(self):
+        # The arrays are views into the map; drop them before unmapping.
+        self._doc_ids = self._weights = self._doc_offsets = None
+        self._mm.close()
+
+
+def _read_header(path):
+    with open(path, "rb") as fh:
+        prefix = fh.read(len(MAGIC) + 8)
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a chat index")
+        (length,) = struct.unpack("<Q", prefix[len(MAGIC):])
+        header = json.loads(fh.read(length))
+    base = len(prefix) + length
+    return header, base + (-base % 8)
+
+
+def _excerpt(text, query, limit=ANSWER_CHARS):
+    # Whole passage when short; otherwise the sentences sharing the most
+    # terms with the question, kept in their original order.
+    if len(text) <= limit:
+        return text
+    wanted = set(tokenize(query))
+    sentences = _SENTENCE.split(text)
+    ranked = sorted(range(len(sentences)),
+                    key=lambda i: (-len(wanted & set(tokenize(sentences[i]))), i))
+    chosen, used = [], 0
+    for i in ranked:
+        if used + len(sentences[i]) > limit and chosen:
+            break
+        chosen.append(i)
+        used += len(sentences[i]) + 1
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+if __name__ == "__main__":
+    # python chat_engine.py build            -- (re)write the index
+    # python chat_engine.py "right to vote"  -- ask a question
+    if sys.argv[1:] == ["build"]:
+        print(build_index())
+    else:
+        print(json.dumps(ConstitutionIndex().answer(" ".join(sys.argv[1:])), indent=2, ensure_ascii=False))
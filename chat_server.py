@@ -0,0 +1,349 @@
+"""Local chat endpoint for the floating chatbot widget.
+
+The widget is a static ``components.html`` iframe, so it cannot talk to
+the Streamlit script. Instead it POSTs each message to this small asyncio
+HTTP server, which runs on its own thread inside the Streamlit process (see
+``get_chat_server`` in resources.py):
+
+* messages from every session share one queue; a batcher drains up to
+  ``BATCH_SIZE`` of them (waiting at most ``BATCH_WAIT`` seconds) and
+  answers the batch in a single executor call;
+* each session may have ``SESSION_INFLIGHT`` messages outstanding; more
+  get ``429`` and a full queue gets ``503``, so one chatty tab cannot
+  starve the others;
+* replies stream back token by token as newline-delimited JSON.
+
+Only sessions the app has registered may chat: a message carrying any
+other session id gets ``403`` rather than being credited to a stand-in
+user. Each session also records the origin of the page that embedded
+the widget, and only that origin is named in the CORS headers or
+accepted on ``POST /chat``. A client gets ``READ_TIMEOUT`` seconds to send
+its request, so a stalled connection cannot hold a handler open.
+
+Given a ``metrics`` callable it also serves ``GET /metrics`` with its
+text, which is how the Prometheus export in timing.py is scraped. That
+goes on a second listener bound to loopback only (``SWARAJYA_METRICS_PORT``)
+without CORS headers, so exposing the chat endpoint to browsers never
+exposes the timing data.
+
+The browser must be able to reach it. The default loopback listener only
+serves browsers on the server machine; ``url_for`` returns ``None`` for
+any other, and the widget is left out. Remote visitors need
+``SWARAJYA_CHAT_HOST`` to listen on a public interface, or a proxy named
+in ``SWARAJYA_CHAT_URL`` (see README.md). Anything that speaks the same
+``POST /chat`` protocol can stand in for this server.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+HOST = os.environ.get("SWARAJYA_CHAT_HOST", "127.0.0.1")
+# 0 picks a free port; set one when a proxy needs a fixed upstream.
+PORT = int(os.environ.get("SWARAJYA_CHAT_PORT", "0"))
+# Browser-facing base URL when the server sits behind a proxy.
+PUBLIC_URL = os.environ.get("SWARAJYA_CHAT_URL", "")
+# Prometheus scrape port, always on loopback; 0 picks a free port.
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("SWARAJYA_METRICS_PORT", "0"))
+
+LOOPBACK = ("localhost", "127.0.0.1", "::1")
+WILDCARD = ("", "0.0.0.0", "::")
+
+BATCH_SIZE = 16
+BATCH_WAIT = 0.005
+SESSION_INFLIGHT = 2
+MAX_QUEUE = 256
+MAX_BODY = 16 * 1024
+# Seconds a client has to send its request head, and then its body.
+READ_TIMEOUT = 10
+# A session that has neither rerun nor chatted for this long is forgotten.
+SESSION_IDLE = 60 * 60
+
+_TOKEN = re.compile(r"\S+\s*")
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Origin: {origin}\r\n"
+    "Vary: Origin\r\n"
+    "Access-Control-Allow-Methods: POST, GET, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: Content-Type\r\n"
+    "Access-Control-Allow-Private-Network: true\r\n"
+)
+REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+           408: "Request Timeout", 413: "Payload Too Large", 429: "Too Many Requests",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ChatServer:
+    def __init__(self, answer, on_query=None, host=HOST, port=PORT, batch_size=BATCH_SIZE,
+                 batch_wait=BATCH_WAIT, session_inflight=SESSION_INFLIGHT, max_queue=MAX_QUEUE,
+                 metrics=None, metrics_port=METRICS_PORT, session_idle=SESSION_IDLE,
+                 read_timeout=READ_TIMEOUT):
+        """``answer(message)`` returns ``{"answer", "sources"}``;
+        ``on_query(user, message, reply)`` is called after each answer;
+        ``metrics()`` returns the Prometheus text served on ``/metrics``."""
+        self.answer = answer
+        self.on_query = on_query
+        self.metrics = metrics
+        self.metrics_port = metrics_port
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.session_inflight = session_inflight
+        self.max_queue = max_queue
+        self.session_idle = session_idle
+        self.read_timeout = read_timeout
+        # session id -> (user, page origin, last seen), least recently seen first.
+        self._users = OrderedDict()
+        self._users_lock = threading.Lock()
+        self._inflight = {}
+        self._loop = None
+        self._ready = threading.Event()
+
+    def url_for(self, page_host):
+        """Base URL the widget posts to on a page served as ``page_host``
+        (the ``Host`` header), or ``None`` if that browser cannot reach us."""
+        if PUBLIC_URL:
+            return PUBLIC_URL.rstrip("/")
+        hostname = page_host.rsplit(":", 1)[0].strip("[]") if page_host else ""
+        if self.host in WILDCARD:
+            # Listening everywhere: the browser reaches us where it found the page.
+            hostname = hostname or "127.0.0.1"
+        elif self.host not in LOOPBACK:
+            hostname = self.host
+        elif hostname and hostname not in LOOPBACK:
+            return None
+        else:
+            hostname = "127.0.0.1"
+        if ":" in hostname:
+            hostname = f"[{hostname}]"
+        return f"http://{hostname}:{self.port}"
+
+    @property
+    def metrics_url(self):
+        """Loopback scrape URL of ``/metrics``, or ``None`` without ``metrics``."""
+        if self.metrics is None:
+            return None
+        return f"http://{METRICS_HOST}:{self.metrics_port}/metrics"
+
+    def start(self):
+        """Run the server on a daemon thread; returns once it is listening."""
+        thread = threading.Thread(target=self._run, name="chat-server", daemon=True)
+        thread.start()
+        self._ready.wait()
+        return self
+
+    def register(self, session_id, user, origin=None):
+        """Attribute messages carrying ``session_id`` to ``user``.
+
+        ``origin`` is that of the page embedding the widget (its
+        ``Origin`` header); browsers elsewhere may not use the session.
+        """
+        with self._users_lock:
+            self._users[session_id] = (user, origin, time.time())
+            self._users.move_to_end(session_id)
+            self._prune_users()
+
+    def _user(self, session_id, origin=None):
+        # The session's user, or None for a session we never issued (or
+        # forgot) and for a page on another origin.
+        with self._users_lock:
+            entry = self._users.get(session_id)
+            if entry is None or None not in (origin, entry[1]) and origin != entry[1]:
+                return None
+            self._users[session_id] = (entry[0], entry[1], time.time())
+            self._users.move_to_end(session_id)
+            return entry[0]
+
+    def _allowed_origin(self, origin):
+        # Echoed in the CORS headers only for a page a live session was served on.
+        with self._users_lock:
+            if origin and any(entry[1] == origin for entry in self._users.values()):
+                return origin
+        return None
+
+    def _prune_users(self):
+        cutoff = time.time() - self.session_idle
+        while self._users and next(iter(self._users.values()))[2] < cutoff:
+            self._users.popitem(last=False)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(self.max_queue)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        if self.metrics is not None:
+            scrape = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_metrics, METRICS_HOST, self.metrics_port))
+            self.metrics_port = scrape.sockets[0].getsockname()[1]
+        self._loop.create_task(self._batcher())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _batcher(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                replies = await self._loop.run_in_executor(
+                    None, self._answer_batch, [(user, message) for user, message, _ in batch])
+            except Exception as exc:
+                replies = [exc] * len(batch)
+            for (_, _, future), reply in zip(batch, replies):
+                if future.done():
+                    continue
+                if isinstance(reply, Exception):
+                    future.set_exception(reply)
+                else:
+                    future.set_result(reply)
+
+    def _answer_batch(self, items):
+        # One executor hop per batch; a failing message fails only itself.
+        replies = []
+        for user, message in items:
+            try:
+                reply = self.answer(message)
+                if self.on_query is not None:
+                    self.on_query(user, message, reply)
+            except Exception as exc:
+                reply = exc
+            replies.append(reply)
+        return replies
+
+    async def _handle(self, reader, writer):
+        cors = ""
+        try:
+            method, path, headers = await asyncio.wait_for(_read_head(reader), self.read_timeout)
+            origin = headers.get("origin")
+            allowed = self._allowed_origin(origin)
+            if allowed is not None:
+                cors = CORS_HEADERS.format(origin=allowed)
+            if method == "OPTIONS":
+                await _respond(writer, 204, cors=cors)
+            elif method == "GET" and path == "/health":
+                await _respond(writer, 200, {"pending": self._queue.qsize()}, cors=cors)
+            elif method == "POST" and path == "/chat":
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await _respond(writer, 413, {"error": "message too long"}, cors=cors)
+                else:
+                    body = await asyncio.wait_for(reader.readexactly(length), self.read_timeout)
+                    await self._chat(writer, body, origin, cors)
+            else:
+                await _respond(writer, 404, {"error": "not found"}, cors=cors)
+        except (ValueError, asyncio.IncompleteReadError):
+            await _respond(writer, 400, {"error": "bad request"}, cors=cors)
+        except asyncio.TimeoutError:
+            await _respond(writer, 408, {"error": "request timed out"}, cors=cors)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_metrics(self, reader, writer):
+        try:
+            method, path, _ = await asyncio.wait_for(_read_head(reader), self.read_timeout)
+            if method == "GET" and path == "/metrics":
+                await _respond(writer, 200, self.metrics(), "text/plain; version=0.0.4")
+            else:
+                await _respond(writer, 404, {"error": "not found"})
+        except ValueError:
+            await _respond(writer, 400, {"error": "bad request"})
+        except asyncio.TimeoutError:
+            await _respond(writer, 408, {"error": "request timed out"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _chat(self, writer, body, origin, cors):
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise ValueError("expected a JSON object")
+        session, message = str(request.get("session", "")), str(request.get("message", "")).strip()
+        if not message:
+            await _respond(writer, 400, {"error": "empty message"}, cors=cors)
+            return
+        user = self._user(session, origin)
+        if user is None:
+            await _respond(writer, 403, {"error": "this chat has expired, reload the page"}, cors=cors)
+            return
+        if self._inflight.get(session, 0) >= self.session_inflight:
+            await _respond(writer, 429, {"error": "still answering your previous question"}, cors=cors)
+            return
+        if self._queue.full():
+            await _respond(writer, 503, {"error": "busy, try again shortly"}, cors=cors)
+            return
+
+        self._inflight[session] = self._inflight.get(session, 0) + 1
+        try:
+            future = self._loop.create_future()
+            self._queue.put_nowait((user, message, future))
+            reply = await future
+        except Exception:
+            await _respond(writer, 500, {"error": "could not answer that"}, cors=cors)
+            return
+        finally:
+            if self._inflight[session] <= 1:
+                del self._inflight[session]
+            else:
+                self._inflight[session] -= 1
+
+        writer.write(("HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                      "Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\n"
+                      f"Connection: close\r\n{cors}\r\n").encode())
+        for token in _TOKEN.findall(reply["answer"]):
+            await _write_chunk(writer, {"token": token})
+        await _write_chunk(writer, {"done": True, "sources": reply.get("sources", [])})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def _read_head(reader):
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) < 2:
+        raise ValueError("bad request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return request_line[0].upper(), request_line[1].split("?", 1)[0], headers
+
+
+async def _respond(writer, status, payload=None, content_type="application/json", cors=""):
+    if isinstance(payload, str):
+        body = payload.encode()
+    else:
+        body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                  f"Content-Length: {len(body)}\r\nConnection: close\r\n"
+                  f"{cors}\r\n").encode() + body)
+    await writer.drain()
+
+
+async def _write_chunk(writer, payload):
+    # drain() after every token: a slow reader pauses its own stream only.
+    data = json.dumps(payload, ensure_ascii=False).encode() + b"\n"
+    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+    await writer.drain()
@@ -0,0 +1,94 @@
+"""Cached reads behind the Dashboard, Results and Homepage.
+
+Pages call these instead of the stores in resources.py. Each result is
+memoised with ``st.cache_data`` for every session in the process, so a
+hundred sessions rerunning the Dashboard run its queries once per user
+rather than once per rerun. Every cached function takes its store's
+write ``generation`` as an argument: a write (a scan recorded, a
+chatbot query logged, from any thread) bumps it, the next read misses
+and older entries age out. ``CACHE_TTL`` bounds staleness for writes
+made by other processes.
+"""
+
+import os
+
+import streamlit as st
+
+from resources import get_activity_log, get_history
+
+CACHE_TTL = int(os.environ.get("SWARAJYA_CACHE_TTL", "30"))
+MAX_ENTRIES = 1000
+
+
+# ───────────────────────────── activity ─────────────────────────────
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _recent_queries(user, limit, offset, order, descending, generation):
+    return get_activity_log().recent(user, limit, offset, order, descending)
+
+
+def recent_queries(user, limit=10, offset=0, order="created_at", descending=True):
+    """``[{"query", "url", "created_at"}]``, a window of the user's queries."""
+    return _recent_queries(user, limit, offset, order, descending, get_activity_log().generation(user))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _query_totals(user, generation):
+    return get_activity_log().totals(user)
+
+
+def query_totals(user):
+    """``(total_queries, last_query_time or None)``."""
+    return _query_totals(user, get_activity_log().generation(user))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _query_series(user, range_name, generation):
+    return get_activity_log().series(user, range_name)
+
+
+def query_series(user, range_name):
+    """``[(bucket_start, count)]`` for a Dashboard range, zero-filled."""
+    return _query_series(user, range_name, get_activity_log().generation(user))
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _queries_today(user, generation):
+    return get_activity_log().today(user)
+
+
+def queries_today(user):
+    """Number of queries the user submitted today."""
+    return _queries_today(user, get_activity_log().generation(user))
+
+
+# ───────────────────────────── scan history ─────────────────────────────
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _scan_counters(generation):
+    return get_history().counters()
+
+
+def scan_counters():
+    """Homepage "At a Glance" counters: ``{name: int}``."""
+    return _scan_counters(get_history().generation)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _scan_page(status, name_prefix, after, limit, generation):
+    return get_history().page(status=status, name_prefix=name_prefix, after=after, limit=limit)
+
+
+def scan_page(status=None, name_prefix=None, after=None, limit=25):
+    """``(rows, next_cursor)``: one newest-first page of the scan history."""
+    return _scan_page(status, name_prefix, tuple(after) if after else None, limit, get_history().generation)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _text_search(query, limit, generation):
+    return get_history().search_text(query, limit)
+
+
+def text_search(query, limit=25):
+    """Latest scans of the documents whose text matches ``query``, with a ``snippet``."""
+    return _text_search(" ".join(query.split()), limit, get_history().generation)
@@ -0,0 +1,68 @@
+"""Pooled SQLite connections for the app's stores.
+
+Each database file gets one ``ConnectionPool``: a single writer
+connection, used under a lock because SQLite allows one writer at a time,
+and up to ``readers`` read-only connections handed out per query. In WAL
+mode readers never block the writer or each other, so the sessions
+reading Dashboard or Results rows run their queries side by side instead
+of queueing behind one shared connection. Stores own their pool and are
+themselves ``st.cache_resource`` singletons (see resources.py), so the
+connections are opened once per process.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+READERS = int(os.environ.get("SWARAJYA_DB_READERS", "8"))
+BUSY_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    def __init__(self, path, schema="", readers=READERS, row_factory=None):
+        self.path = path
+        self.readers = max(1, readers)
+        self.row_factory = row_factory
+        self._writer = self._connect()
+        if schema:
+            self._writer.executescript(schema)
+        self._write_lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        return conn
+
+    @contextmanager
+    def read(self):
+        """A read-only connection for the ``with`` block; opened lazily, up to ``readers``."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._open_lock:
+                if self._opened < self.readers:
+                    self._opened += 1
+                    conn = self._connect(read_only=True)
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def write(self):
+        """The writer connection, in one transaction committed when the block ends."""
+        with self._write_lock, self._writer:
+            yield self._writer
@@ -0,0 +1,208 @@
+"""Perceptual fingerprints of scanned documents and a near-duplicate index.
+
+A fingerprint is ``(hash, detail)``. ``hash`` is a 64-bit pHash: the
+signs of the lowest 8x8 DCT coefficients of a 32x32 grayscale thumbnail.
+It only sees the layout, so every card or form filled in from one
+template gets (nearly) the same hash. ``detail`` is a 128x128 thumbnail,
+sharp enough to tell one name or number from another: a JPEG re-encode
+of a page moves no 4x4 cell of it by more than a few grey levels, while
+different entries on one template move some cell by tens. A match needs
+both. Rescaled or re-photographed copies resample the text differently
+and are not reliably matched.
+
+``FingerprintIndex`` stores every scanned fingerprint in SQLite and keeps
+a BK-tree of the hashes in memory. Hamming distance is a metric, so a
+lookup within ``max_distance`` skips every subtree the triangle
+inequality rules out instead of comparing against every earlier scan;
+only the few candidates it returns have their ``detail`` read back and
+compared.
+"""
+
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from db import ConnectionPool
+from preprocess import drafted
+from settings import data_path
+
+HASH_SIDE = 32
+HASH_BITS = 8
+DETAIL_SIDE = 128
+DETAIL_CELL = 4
+# JPEGs are decoded scaled down in the DCT domain to no less than this,
+# then box-filtered once to each thumbnail. DCT scaling blurs more than a
+# box filter, so it stays well above DETAIL_SIDE: PNG and JPEG copies of a
+# page then differ by about 3 grey levels at most, whatever their size.
+DECODE_SIDE = 8 * DETAIL_SIDE
+# Largest Hamming distance (of 64 bits) for a candidate. A JPEG re-encode
+# of a text page moves 0-4 bits, while re-encodes of distinct pages come
+# as close as 6 (distances are even: the median split keeps the number of
+# set bits fixed). Pages of one template come much closer; ``detail``
+# tells those apart.
+MAX_DISTANCE = int(os.environ.get("SWARAJYA_DUPLICATE_DISTANCE", "4"))
+# Largest mean grey-level change of any DETAIL_CELL square of ``detail``
+# still counted as the same document. Re-encodes down to q30 stay under 3;
+# ID cards of one template differing only in name and number reach 24+.
+DETAIL_TOLERANCE = 8.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    detail BLOB,
+    doc_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    user TEXT,
+    seen_at REAL NOT NULL
+);
+"""
+
+# Orthonormal DCT-II matrix: the 2-D transform of a is _DCT @ a @ _DCT.T.
+_n = np.arange(HASH_SIDE)
+_DCT = np.sqrt(2 / HASH_SIDE) * np.cos(np.pi * (2 * _n[None, :] + 1) * _n[:, None] / (2 * HASH_SIDE))
+_DCT[0] /= np.sqrt(2)
+
+
+def phash(img):
+    """64-bit perceptual hash of a PIL image."""
+    small = img.convert("L").resize((HASH_SIDE, HASH_SIDE), Image.Resampling.BOX)
+    coeffs = (_DCT @ np.asarray(small, np.float64) @ _DCT.T)[:HASH_BITS, :HASH_BITS].ravel()
+    # The DC term only says how bright the page is; it is left out of the median.
+    bits = coeffs > np.median(coeffs[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def detail_thumbnail(img):
+    """``DETAIL_SIDE`` square grayscale thumbnail of a PIL image, as bytes."""
+    return img.convert("L").resize((DETAIL_SIDE, DETAIL_SIDE), Image.Resampling.BOX).tobytes()
+
+
+def image_fingerprint(src):
+    """``(phash, detail)`` of an encoded image (bytes or file object)."""
+    img = drafted(src, DECODE_SIDE)
+    return phash(img), detail_thumbnail(img)
+
+
+def detail_distance(a, b):
+    """Largest mean absolute difference of any ``DETAIL_CELL`` square of two thumbnails."""
+    diff = np.abs(np.frombuffer(a, np.uint8).astype(np.int16) - np.frombuffer(b, np.uint8))
+    cells = DETAIL_SIDE // DETAIL_CELL
+    return float(diff.reshape(cells, DETAIL_CELL, cells, DETAIL_CELL).mean(axis=(1, 3)).max())
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes; nodes are ``[hash, items, children]``."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, item):
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [item], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """``(distance, item)`` for every item within ``radius`` of ``key``."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class FingerprintIndex:
+    def __init__(self, path=None, max_distance=MAX_DISTANCE, detail_tolerance=DETAIL_TOLERANCE):
+        self.max_distance = max_distance
+        self.detail_tolerance = detail_tolerance
+        self._pool = ConnectionPool(path or data_path("fingerprints.sqlite3"), SCHEMA)
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self._rows = {}
+        with self._pool.write() as db:
+            columns = {row[1] for row in db.execute("PRAGMA table_info(fingerprints)")}
+            if "detail" not in columns:
+                # Rows written before ``detail`` existed can never match.
+                db.execute("ALTER TABLE fingerprints ADD COLUMN detail BLOB")
+        with self._pool.read() as db:
+            rows = db.execute("SELECT id, fingerprint, doc_hash, name, status, user, seen_at"
+                              " FROM fingerprints WHERE detail IS NOT NULL").fetchall()
+        for row_id, fingerprint, *info in rows:
+            self._insert(row_id, int(fingerprint, 16), info)
+
+    def __len__(self):
+        return len(self._tree)
+
+    def _insert(self, row_id, fingerprint, info):
+        self._rows[row_id] = tuple(info)
+        self._tree.add(fingerprint, row_id)
+
+    def add(self, fingerprint, doc_hash, name, status, user=None, seen_at=None):
+        """Remember one scanned document; returns its row id."""
+        hash_, detail = fingerprint
+        info = (doc_hash, name, status, user, seen_at or time.time())
+        with self._pool.write() as db:
+            row_id = db.execute(
+                "INSERT INTO fingerprints (fingerprint, detail, doc_hash, name, status, user, seen_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"{hash_:016x}", zlib.compress(detail), *info)).lastrowid
+        with self._lock:
+            self._insert(row_id, hash_, info)
+        return row_id
+
+    def _details(self, row_ids):
+        details = {}
+        with self._pool.read() as db:
+            for start in range(0, len(row_ids), 500):
+                chunk = row_ids[start:start + 500]
+                details.update(db.execute(
+                    f"SELECT id, detail FROM fingerprints WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall())
+        return {row_id: zlib.decompress(detail) for row_id, detail in details.items()}
+
+    def lookup(self, fingerprint, max_distance=None, limit=None):
+        """Earlier scans within ``max_distance`` whose detail also agrees,
+        closest and then newest first."""
+        hash_, detail = fingerprint
+        radius = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            found = self._tree.search(hash_, radius)
+            rows = {row_id: (distance, self._rows[row_id]) for distance, row_id in found}
+        details = self._details(list(rows))
+        rows = [rows[row_id] for row_id, other in details.items()
+                if detail_distance(detail, other) <= self.detail_tolerance]
+        rows.sort(key=lambda r: (r[0], -r[1][4]))
+        return [{"distance": distance, "doc_hash": doc_hash, "name": name, "status": status,
+                 "user": user, "seen_at": seen_at}
+                for distance, (doc_hash, name, status, user, seen_at) in rows[:limit]]
@@ -0,0 +1,248 @@
+"""Persistent scan history behind the "Results" page.
+
+Every finished scan is appended to an SQLite table (WAL mode, so readers
+never block the writer). The Results page reads it one page at a time
+with keyset pagination on ``(scanned_at, id)``: each page is an index
+range scan that starts where the previous one stopped, so paging stays
+fast however many millions of rows the table holds.
+
+Queries run on pooled read-only connections (db.py); each write bumps
+``generation`` so the cached reads in data.py are refreshed.
+
+The text of each scanned document (ocr.py) is kept once per document hash
+in ``scan_texts`` with an FTS5 index over it, so ``search_text`` finds
+documents by what they say rather than by file name. Its tokenizer keeps
+Indic words whole (``INDIC_MARKS``), so Hindi and other Indian-language
+text is searched word by word, like English.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from db import ConnectionPool
+from settings import data_path
+
+PAGE_SIZE = 25
+# Name-prefix matches up to this count are sorted in memory; above it the
+# time index is walked instead.
+PREFIX_SORT_LIMIT = 5000
+SNIPPET_TOKENS = 12
+
+# unicode61 splits words at combining marks, which in Indic scripts means
+# at every vowel sign and virama ("स्वामित्व" would index as "स्व", "म",
+# "त्व"). These marks, and the zero-width (non-)joiners, stay in tokens.
+INDIC_MARKS = "".join(chr(c) for start, end in ((0x0900, 0x0E00), (0xABC0, 0xAC00))
+                      for c in range(start, end)
+                      if unicodedata.category(chr(c)).startswith("M")) + "\u200c\u200d"
+
+TEXT_INDEX = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS scan_text_fts USING fts5 (
+    name, body, content='scan_texts', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 2 tokenchars '{INDIC_MARKS}'"
+)"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    score REAL,
+    findings TEXT NOT NULL DEFAULT '[]',
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_doc_hash ON scans (doc_hash);
+CREATE INDEX IF NOT EXISTS scans_status_time ON scans (status, scanned_at, id);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (scanned_at, id);
+CREATE INDEX IF NOT EXISTS scans_name ON scans (name);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS scan_texts (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    body TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);""" + TEXT_INDEX + """;
+CREATE TRIGGER IF NOT EXISTS scan_texts_index AFTER INSERT ON scan_texts BEGIN
+    INSERT INTO scan_text_fts (rowid, name, body) VALUES (new.id, new.name, new.body);
+END;
+"""
+
+# Homepage "At a Glance" aggregates, bumped as events are written rather
+# than counted from the scans table on every view.
+COUNTERS = ("total_scans", "threats_detected", "documents_verified")
+
+
+def confidence(status, score):
+    """Confidence in ``status`` as a percentage, as in ``ScanResult``."""
+    if score is None:
+        return None
+    return round(100 * (1 - score if status == "Clean" else score), 1)
+
+
+class ScanHistory:
+    def __init__(self, path=None):
+        self._pool = ConnectionPool(path or data_path("history.sqlite3"), SCHEMA, row_factory=sqlite3.Row)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._backfill_counters()
+        self._upgrade_text_index()
+
+    def _backfill_counters(self):
+        # History written before the counters table existed is counted
+        # once, here; from then on every write keeps the counters current.
+        with self._pool.write() as db:
+            if db.execute("SELECT 1 FROM counters LIMIT 1").fetchone():
+                return
+            db.execute(
+                "INSERT INTO counters (name, value)"
+                " SELECT 'total_scans', COUNT(*) FROM scans UNION ALL"
+                " SELECT 'threats_detected', COUNT(*) FROM scans WHERE status = 'Suspected Tampering' UNION ALL"
+                " SELECT 'documents_verified', COUNT(*) FROM scans WHERE status = 'Clean'")
+
+    def _upgrade_text_index(self):
+        # An index made before INDIC_MARKS split Indic words apart; it is
+        # rebuilt once from scan_texts with the current tokenizer.
+        with self._pool.write() as db:
+            sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'scan_text_fts'").fetchone()[0]
+            if "tokenchars" in sql:
+                return
+            db.execute("DROP TABLE scan_text_fts")
+            db.execute(TEXT_INDEX)
+            db.execute("INSERT INTO scan_text_fts (scan_text_fts) VALUES ('rebuild')")
+
+    def record(self, doc_hash, name, kind, status, score=None, findings=(), scanned_at=None):
+        """Append one finished scan and return its row id."""
+        bumps = ["total_scans"]
+        if status == "Clean":
+            bumps.append("documents_verified")
+        elif status == "Suspected Tampering":
+            bumps.append("threats_detected")
+        with self._pool.write() as db:
+            cur = db.execute(
+                "INSERT INTO scans (doc_hash, name, kind, status, score, findings, scanned_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_hash, name, kind, status, score, json.dumps(list(findings)),
+                 scanned_at or time.time()))
+            self._bump(db, bumps)
+        self._changed()
+        return cur.lastrowid
+
+    def _changed(self):
+        with self._lock:
+            self._generation += 1
+
+    @property
+    def generation(self):
+        """Number of writes so far in this process; cached reads key on it."""
+        return self._generation
+
+    def _bump(self, db, names, amount=1):
+        db.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            [(name, amount) for name in names])
+
+    def counters(self):
+        """All "At a Glance" counters as a dict, missing ones as 0."""
+        with self._pool.read() as db:
+            rows = db.execute("SELECT name, value FROM counters").fetchall()
+        values = dict.fromkeys(COUNTERS, 0)
+        values.update((row["name"], row["value"]) for row in rows)
+        return values
+
+    def page(self, status=None, name_prefix=None, after=None, limit=PAGE_SIZE):
+        """Newest-first page of scans.
+
+        ``after`` is the cursor returned with the previous page. Returns
+        ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+        """
+        clauses, params = [], []
+        index = ""
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if name_prefix:
+            # A range rather than LIKE so the name index can be used.
+            bounds = (name_prefix, name_prefix + "\U0010ffff")
+            clauses.append("name >= ? AND name < ?")
+            params.extend(bounds)
+            index = self._prefix_index(bounds, status)
+        if after is not None:
+            clauses.append("(scanned_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # One extra row tells us whether another page exists.
+        with self._pool.read() as db:
+            rows = db.execute(
+                f"SELECT * FROM scans {index} {where} ORDER BY scanned_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1)).fetchall()
+        rows = [dict(row, findings=json.loads(row["findings"])) for row in rows]
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, (rows[-1]["scanned_at"], rows[-1]["id"])
+        return rows, None
+
+    def _prefix_index(self, bounds, status):
+        # A selective prefix is best served from the name index plus a small
+        # sort; a common one (say, a single letter) by walking the time
+        # index newest-first until the page fills up.
+        with self._pool.read() as db:
+            matches = db.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM scans INDEXED BY scans_name"
+                " WHERE name >= ? AND name < ? LIMIT ?)", (*bounds, PREFIX_SORT_LIMIT)).fetchone()[0]
+        if matches < PREFIX_SORT_LIMIT:
+            return "INDEXED BY scans_name"
+        return "INDEXED BY scans_status_time" if status else "INDEXED BY scans_time"
+
+    def by_hash(self, doc_hash, limit=10):
+        """Most recent scans of the document with ``doc_hash``."""
+        with self._pool.read() as db:
+            rows = db.execute(
+                "SELECT * FROM scans WHERE doc_hash = ? ORDER BY scanned_at DESC LIMIT ?",
+                (doc_hash, limit)).fetchall()
+        return [dict(row, findings=json.loads(row["findings"])) for row in rows]
+
+    def has_text(self, doc_hash):
+        """Whether the text of ``doc_hash`` is already indexed."""
+        with self._pool.read() as db:
+            return db.execute("SELECT 1 FROM scan_texts WHERE doc_hash = ?", (doc_hash,)).fetchone() is not None
+
+    def index_text(self, doc_hash, name, text):
+        """Add a document's extracted text to the search index (once per hash)."""
+        if not text.strip():
+            return
+        with self._pool.write() as db:
+            db.execute("INSERT OR IGNORE INTO scan_texts (doc_hash, name, body, indexed_at)"
+                       " VALUES (?, ?, ?, ?)", (doc_hash, name, text, time.time()))
+        self._changed()
+
+    def search_text(self, query, limit=PAGE_SIZE):
+        """Best-ranked documents whose name or text matches ``query``.
+
+        Each whitespace-separated word must occur; the last one may be a
+        prefix, so results update while a word is still being typed. Rows
+        are the latest scan of each document plus a ``snippet`` with the
+        matches wrapped in ``**``.
+        """
+        words = [word.replace('"', '""') for word in query.split()]
+        if not words:
+            return []
+        match = " ".join(f'"{word}"' for word in words) + "*"
+        with self._pool.read() as db:
+            rows = db.execute(
+                "SELECT s.*, snippet(scan_text_fts, 1, '**', '**', '…', ?) AS snippet"
+                " FROM scan_text_fts JOIN scan_texts t ON t.id = scan_text_fts.rowid"
+                " JOIN scans s ON s.id = (SELECT id FROM scans WHERE doc_hash = t.doc_hash"
+                "                         ORDER BY scanned_at DESC LIMIT 1)"
+                " WHERE scan_text_fts MATCH ? ORDER BY rank LIMIT ?",
+                (SNIPPET_TOKENS, match, limit)).fetchall()
+        return [dict(row, findings=json.loads(row["findings"])) for row in rows]
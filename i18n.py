@@ -0,0 +1,117 @@
+"""Language packs for the app's interface text.
+
+Translations are gettext catalogs under ``locale/<code>/LC_MESSAGES/``:
+the ``.po`` file is the editable source and the ``.mo`` file next to it
+the compiled pack that is actually loaded. English is the source
+language, so it needs no pack. A pack is read only when its language is
+first picked, and then shared by every session (``get_language_pack`` in
+resources.py).
+
+Adding a language means adding ``locale/<code>/LC_MESSAGES/swarajya.po``
+and running ``python i18n.py``, which compiles every stale catalog.
+"""
+
+import ast
+import gettext
+import glob
+import os
+import struct
+
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locale")
+DOMAIN = "swarajya"
+SOURCE_LANGUAGE = "en"
+
+# Selector labels, in each language's own script. Packs are discovered on
+# disk, so only languages with a catalog are offered.
+NATIVE_NAMES = {
+    "en": "English", "as": "অসমীয়া", "bn": "বাংলা", "brx": "बड़ो", "doi": "डोगरी",
+    "gu": "ગુજરાતી", "hi": "हिन्दी", "kn": "ಕನ್ನಡ", "ks": "کٲشُر", "kok": "कोंकणी",
+    "mai": "मैथिली", "ml": "മലയാളം", "mni": "মৈতৈলোন্", "mr": "मराठी", "ne": "नेपाली",
+    "or": "ଓଡ଼ିଆ", "pa": "ਪੰਜਾਬੀ", "sa": "संस्कृतम्", "sat": "ᱥᱟᱱᱛᱟᱲᱤ", "sd": "سنڌي",
+    "ta": "தமிழ்", "te": "తెలుగు", "ur": "اردو",
+}
+
+
+def _catalog_path(code, ext):
+    return os.path.join(LOCALE_DIR, code, "LC_MESSAGES", f"{DOMAIN}.{ext}")
+
+
+def available_languages():
+    """``{label: code}`` for English plus every language with a pack."""
+    codes = sorted(os.path.basename(os.path.dirname(os.path.dirname(path)))
+                   for path in glob.glob(_catalog_path("*", "mo")))
+    languages = {NATIVE_NAMES[SOURCE_LANGUAGE]: SOURCE_LANGUAGE}
+    for code in codes:
+        languages[NATIVE_NAMES.get(code, code)] = code
+    return languages
+
+
+def load_pack(code):
+    """Translations for ``code``; untranslated strings fall back to English."""
+    if code == SOURCE_LANGUAGE:
+        return gettext.NullTranslations()
+    with open(_catalog_path(code, "mo"), "rb") as fh:
+        return gettext.GNUTranslations(fh)
+
+
+def parse_po(path):
+    """``{msgid: msgstr}`` of a .po file, skipping fuzzy and empty entries."""
+    messages = {}
+    entry, field, fuzzy = {}, None, False
+
+    def flush():
+        if "msgid" in entry and entry.get("msgstr") and not entry["fuzzy"]:
+            messages[entry["msgid"]] = entry["msgstr"]
+
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line.startswith("#,") and "fuzzy" in line:
+                fuzzy = True
+            elif line.startswith(("msgid ", "msgstr ")):
+                field, _, value = line.partition(" ")
+                if field == "msgid":
+                    flush()
+                    entry, fuzzy = {"fuzzy": fuzzy}, False
+                entry[field] = ast.literal_eval(value)
+            elif line.startswith('"') and field:
+                entry[field] += ast.literal_eval(line)
+    flush()
+    return messages
+
+
+def write_mo(messages, path):
+    """Write ``messages`` as a GNU .mo file (keys sorted, no hash table)."""
+    keys = sorted(messages)
+    ids = [k.encode("utf-8") for k in keys]
+    strs = [messages[k].encode("utf-8") for k in keys]
+    header_size = 7 * 4
+    ids_table = header_size
+    strs_table = ids_table + 8 * len(keys)
+    offset = strs_table + 8 * len(keys)
+    ids_index, strs_index, blob = [], [], b""
+    for data, index in [(d, ids_index) for d in ids] + [(d, strs_index) for d in strs]:
+        index.append((len(data), offset + len(blob)))
+        blob += data + b"\0"
+    with open(path + ".tmp", "wb") as fh:
+        fh.write(struct.pack("<7I", 0x950412DE, 0, len(keys), ids_table, strs_table, 0, 0))
+        for length, start in ids_index + strs_index:
+            fh.write(struct.pack("<2I", length, start))
+        fh.write(blob)
+    os.replace(path + ".tmp", path)
+
+
+def compile_catalogs(force=False):
+    """Compile every .po whose .mo is missing or older; returns the codes."""
+    compiled = []
+    for po in sorted(glob.glob(_catalog_path("*", "po"))):
+        mo = po[:-2] + "mo"
+        if force or not os.path.exists(mo) or os.path.getmtime(mo) < os.path.getmtime(po):
+            write_mo(parse_po(po), mo)
+            compiled.append(os.path.basename(os.path.dirname(os.path.dirname(po))))
+    return compiled
+
+
+if __name__ == "__main__":
+    for code in compile_catalogs(force=True):
+        print(f"compiled {code}")
@@ -0,0 +1,175 @@
+"""In-memory leaderboard index for the "Leaderboard" page.
+
+Users are kept in a list sorted by ``(-points, username)``, so rank lookup
+is a binary search and the top K is a slice. Username search goes through
+a trigram index, so a keystroke in the search box never scans every user;
+only one- and two-character queries, too short for trigrams, scan the
+sorted name list.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+
+# Above this many search matches, ranking walks the sorted order instead.
+WALK_THRESHOLD = 2000
+
+# Opening balances of the all-time board (see points.py).
+SEED_USERS = [
+    {"Username": "raj_swaraj", "Points": 1500, "Profile": "https://swarajyscanner.org/users/raj_swaraj"},
+    {"Username": "anita_jain", "Points": 1420, "Profile": "https://swarajyscanner.org/users/anita_jain"},
+    {"Username": "vikram88", "Points": 1300, "Profile": "https://swarajyscanner.org/users/vikram88"},
+    {"Username": "mira_das", "Points": 1200, "Profile": "https://swarajyscanner.org/users/mira_das"},
+    {"Username": "suresh_k", "Points": 1150, "Profile": "https://swarajyscanner.org/users/suresh_k"},
+    {"Username": "deepa_shah", "Points": 1100, "Profile": "https://swarajyscanner.org/users/deepa_shah"},
+    {"Username": "prateek", "Points": 1050, "Profile": "https://swarajyscanner.org/users/prateek"},
+    {"Username": "neha_verma", "Points": 930, "Profile": "https://swarajyscanner.org/users/neha_verma"},
+    {"Username": "arvind_nair", "Points": 850, "Profile": "https://swarajyscanner.org/users/arvind_nair"},
+    {"Username": "jyoti_m", "Points": 800, "Profile": "https://swarajyscanner.org/users/jyoti_m"},
+]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Leaderboard:
+    def __init__(self, users=()):
+        self._points = {}
+        self._profiles = {}
+        self._order = []       # sorted (-points, username)
+        self._names = []       # sorted (username.lower(), username)
+        self._grams = defaultdict(set)
+        self._lock = threading.RLock()
+        self._load(users)
+
+    def _load(self, users):
+        # Bulk build: one sort per index instead of an insort per user.
+        for user in users:
+            name = user["Username"]
+            self._points[name] = user["Points"]
+            if user.get("Profile"):
+                self._profiles[name] = user["Profile"]
+        for name in self._points:
+            for gram in _trigrams(name.lower()):
+                self._grams[gram].add(name)
+        self._order = sorted((-points, name) for name, points in self._points.items())
+        self._names = sorted((name.lower(), name) for name in self._points)
+
+    def __len__(self):
+        return len(self._order)
+
+    def upsert(self, username, points, profile=None):
+        """Add a user or change their points."""
+        with self._lock:
+            old = self._points.get(username)
+            if old is not None:
+                del self._order[bisect.bisect_left(self._order, (-old, username))]
+            else:
+                bisect.insort(self._names, (username.lower(), username))
+                for gram in _trigrams(username.lower()):
+                    self._grams[gram].add(username)
+            self._points[username] = points
+            if profile is not None:
+                self._profiles[username] = profile
+            bisect.insort(self._order, (-points, username))
+
+    def remove(self, username):
+        """Drop a user from the board (no-op if unknown)."""
+        with self._lock:
+            points = self._points.pop(username, None)
+            if points is None:
+                return
+            del self._order[bisect.bisect_left(self._order, (-points, username))]
+            del self._names[bisect.bisect_left(self._names, (username.lower(), username))]
+            for gram in _trigrams(username.lower()):
+                self._grams[gram].discard(username)
+            self._profiles.pop(username, None)
+
+    def points(self, username):
+        """Points of ``username``, 0 if unknown."""
+        return self._points.get(username, 0)
+
+    def add_points(self, username, delta):
+        """Increment a user's points, creating them at ``delta`` if new."""
+        with self._lock:
+            self.upsert(username, self._points.get(username, 0) + delta)
+
+    def rank(self, username):
+        """1-based rank of ``username``, or ``None`` if unknown."""
+        with self._lock:
+            points = self._points.get(username)
+            if points is None:
+                return None
+            return bisect.bisect_left(self._order, (-points, username)) + 1
+
+    def _row(self, position, username):
+        return {
+            "Rank": position + 1,
+            "Username": username,
+            "Points": self._points[username],
+            "Profile": self._profiles.get(username, ""),
+        }
+
+    def top(self, k, offset=0, descending=False):
+        """Rows ranked ``offset + 1`` to ``offset + k`` (counted from the bottom if ``descending``)."""
+        with self._lock:
+            if descending:
+                end = max(0, len(self._order) - offset)
+                window = self._order[max(0, end - k):end][::-1]
+                return [self._row(end - 1 - i, name) for i, (_, name) in enumerate(window)]
+            window = self._order[offset:offset + k]
+            return [self._row(offset + i, name) for i, (_, name) in enumerate(window)]
+
+    def _position(self, name):
+        return bisect.bisect_left(self._order, (-self._points[name], name))
+
+    def search(self, query, limit=None, offset=0, order="rank", descending=False):
+        """Users whose name contains ``query`` (case-insensitive).
+
+        Rows come by rank, or by username when ``order`` is ``"name"``;
+        ``descending`` reverses either. Returns ``(rows, total_matches)``;
+        only the requested window of rows is materialised.
+        """
+        query = query.strip().lower()
+        if not query:
+            with self._lock:
+                total = len(self._order)
+                k = limit if limit is not None else total
+                if order != "name":
+                    return self.top(k, offset, descending), total
+                if descending:
+                    end = max(0, total - offset)
+                    window = self._names[max(0, end - k):end][::-1]
+                else:
+                    window = self._names[offset:offset + k]
+                return [self._row(self._position(name), name) for _, name in window], total
+
+        with self._lock:
+            if len(query) < 3:
+                # Too short for trigrams: scan the names, already in name order.
+                matches = [name for lower, name in self._names if query in lower]
+            else:
+                grams = sorted((self._grams.get(g, set()) for g in _trigrams(query)), key=len)
+                candidates = set.intersection(*grams) if grams else set()
+                matches = [name for name in candidates if query in name.lower()]
+
+            if order == "name":
+                matches.sort(key=lambda name: (name.lower(), name), reverse=descending)
+                window = matches[offset:offset + limit] if limit is not None else matches[offset:]
+                return [self._row(self._position(name), name) for name in window], len(matches)
+            if limit is not None and len(matches) > WALK_THRESHOLD and not descending:
+                # Many matches: walk the ranking until the window is full
+                # instead of ranking every match.
+                wanted = set(matches)
+                ranked = []
+                for position, (_, name) in enumerate(self._order):
+                    if name in wanted:
+                        ranked.append((position, name))
+                        if len(ranked) == offset + limit:
+                            break
+            else:
+                ranked = sorted(((self._position(name), name) for name in matches), reverse=descending)
+            if limit is not None:
+                ranked = ranked[offset:offset + limit]
+            return [self._row(position, name) for position, name in ranked], len(matches)
@@ -0,0 +1,407 @@
+"""Load test: simulated concurrent sessions against a local app.py server.
+
+The harness starts ``streamlit run app.py`` headless on a free local port
+with its own temporary data directory and drives it the way browsers do:
+every simulated user holds a websocket to ``/_stcore/stream``, asks for
+reruns with its widget states and uploads files through the upload
+route. Sessions therefore share one server process, its
+``st.cache_resource`` services, the scan workers and the GIL, as real
+users do. (``AppTest`` cannot stand in: it swaps a process-global
+runtime in and out around every run, so several cannot run side by side.)
+
+A session's script visits, in order:
+
+* Homepage (the first run),
+* Document Scan: uploads a synthetic document page (``benchmark.text_page``,
+  as JPEG) and reruns until the verdict is shown,
+* Dashboard, Results and Leaderboard.
+
+Concurrency ramps through ``--ramp`` levels (1 2 4 8 sessions by
+default), each level a fresh set of sessions running ``--iterations``
+passes of the script. For each level the report gives rerun latency
+percentiles (overall and per page, request to end of script run), time
+from upload to verdict, throughput in reruns per second with the
+server's CPU per rerun, and memory: server RSS while every session of
+the level is still connected, its growth per session and the scan
+workers' RSS. An unreported warm-up session runs first, so start-up
+costs land in no level. ``--out`` writes it as JSON; ``--baseline old.json`` exits
+with status 1 when a level regressed past ``THRESHOLDS``.
+
+Nothing leaves the machine: the server listens on 127.0.0.1. Memory and
+CPU figures come from /proc and are left out elsewhere.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from contextlib import AsyncExitStack
+
+import numpy as np
+import websockets
+from PIL import Image
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from benchmark import percentiles, compare, text_page
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PAGES = ("Homepage", "Document Scan", "Dashboard", "Results", "Leaderboard")
+NAV_LABEL = "Go to"
+UPLOAD_LABEL = "Upload a document or image"
+UPLOAD_SIZE = (1240, 1754)  # A4 at 150 dpi
+START_TIMEOUT = 60
+RUN_TIMEOUT = 120
+SCAN_TIMEOUT = 120
+POLL_INTERVAL = 0.25
+VERDICTS = ("Scan complete", "Scan failed")
+
+# Regression limits per ramp level, as in benchmark.py.
+THRESHOLDS = (
+    ("latency_ms", "p50", "ratio", 1.25),
+    ("latency_ms", "p95", "ratio", 1.30),
+    ("throughput", "reruns_per_s", "ratio", 0.80),
+    ("memory", "rss_per_session_mb", "ratio", 1.30),
+)
+
+
+# ───────────────────────────── server ─────────────────────────────
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir, port=None):
+    """Run app.py headless; returns ``(process, base_url)`` once it answers health checks."""
+    port = port or _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless=true",
+         "--server.address=127.0.0.1", f"--server.port={port}", "--server.fileWatcherType=none",
+         "--server.enableXsrfProtection=false", "--browser.gatherUsageStats=false"],
+        cwd=os.path.dirname(APP), env=dict(os.environ, SWARAJYA_DATA_DIR=data_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=1) as response:
+                if response.read() == b"ok":
+                    return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("server did not become healthy")
+
+
+def _stat(pid):
+    with open(f"/proc/{pid}/stat") as fh:
+        # The command name may hold spaces; the fields proper follow ")".
+        return fh.read().rsplit(")", 1)[1].split()
+
+
+def _rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _cpu_seconds(pid):
+    try:
+        utime, stime = _stat(pid)[11:13]
+        return (int(utime) + int(stime)) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError):
+        return None
+
+
+def _children(pid):
+    found = []
+    for name in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if name.isdigit():
+            try:
+                if int(_stat(name)[1]) == pid:
+                    found.append(int(name))
+            except (OSError, ValueError, IndexError):
+                continue
+    return found
+
+
+def synthetic_upload(seed, size=UPLOAD_SIZE):
+    """A JPEG document page, different for every seed."""
+    buf = io.BytesIO()
+    Image.fromarray(text_page(np.random.default_rng(seed), size)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _put_file(url, name, data, content_type):
+    # The upload route takes a multipart form with the file in any field.
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(url, data=body, method="PUT",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    with urllib.request.urlopen(request, timeout=RUN_TIMEOUT) as response:
+        response.read()
+
+
+# ───────────────────────────── sessions ─────────────────────────────
+
+class SimulatedSession:
+    """One user clicking through the app; ``steps`` collects every rerun."""
+
+    def __init__(self, base_url, index, iterations, uploads, think=0.0):
+        self.base_url = base_url
+        self.index = index
+        self.iterations = iterations
+        self.uploads = uploads
+        self.think = think
+        self.steps = []
+        self.scans = []
+        self.error = None
+        self.session_id = None
+        self.ws = None
+        self._widgets = {}   # (element type, label) -> widget id, from the last run
+        self._states = {}    # widget states sent with every rerun
+        self._alerts = []    # alert bodies of the last run
+
+    async def connect(self):
+        url = self.base_url.replace("http://", "ws://", 1) + "/_stcore/stream"
+        self.ws = await websockets.connect(url, subprotocols=["streamlit"], max_size=None)
+        return self.ws
+
+    async def _receive(self):
+        msg = ForwardMsg()
+        msg.ParseFromString(await asyncio.wait_for(self.ws.recv(), RUN_TIMEOUT))
+        return msg
+
+    async def _run(self, page):
+        back = BackMsg()
+        back.rerun_script.query_string = ""
+        back.rerun_script.widget_states.widgets.extend(self._states.values())
+        self._widgets, self._alerts, error = {}, [], None
+        start = time.perf_counter()
+        await self.ws.send(back.SerializeToString())
+        while True:
+            msg = await self._receive()
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                name = msg.delta.new_element.WhichOneof("type")
+                element = getattr(msg.delta.new_element, name)
+                if name == "exception":
+                    error = error or f"{element.type}: {element.message}"
+                elif name == "alert":
+                    self._alerts.append(element.body)
+                elif getattr(element, "id", ""):
+                    self._widgets[(name, getattr(element, "label", ""))] = element.id
+            elif kind == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.steps.append({"page": page, "seconds": time.perf_counter() - start, "error": error})
+        if self.think:
+            await asyncio.sleep(self.think)
+
+    def _widget(self, kind, label):
+        try:
+            return self._widgets[(kind, label)]
+        except KeyError:
+            raise LookupError(f"no {kind} {label!r} on the page") from None
+
+    async def _open(self, page):
+        state = WidgetState(id=self._widget("radio", NAV_LABEL), string_value=page)
+        self._states = {"page": state}
+        await self._run(page)
+
+    async def _upload(self, name, data, content_type):
+        back = BackMsg()
+        back.file_urls_request.request_id = uuid.uuid4().hex
+        back.file_urls_request.session_id = self.session_id
+        back.file_urls_request.file_names.append(name)
+        await self.ws.send(back.SerializeToString())
+        while True:
+            msg = await self._receive()
+            if (msg.WhichOneof("type") == "file_urls_response"
+                    and msg.file_urls_response.response_id == back.file_urls_request.request_id):
+                break
+        if msg.file_urls_response.error_msg:
+            raise RuntimeError(msg.file_urls_response.error_msg)
+        urls = msg.file_urls_response.file_urls[0]
+        await asyncio.to_thread(_put_file, self.base_url + urls.upload_url, name, data, content_type)
+
+        state = WidgetState(id=self._widget("file_uploader", UPLOAD_LABEL))
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id, info.name, info.size = urls.file_id, name, len(data)
+        info.file_urls.CopyFrom(urls)
+        self._states["upload"] = state
+
+    async def _scan(self, upload):
+        start = time.perf_counter()
+        await self._upload(f"session{self.index}.jpg", upload, "image/jpeg")
+        await self._run("Document Scan")
+        while time.perf_counter() - start < SCAN_TIMEOUT:
+            if self.steps[-1]["error"] or any(v in a for a in self._alerts for v in VERDICTS):
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+            await self._run("Document Scan")
+        self.scans.append(time.perf_counter() - start)
+
+    async def play(self):
+        try:
+            for n in range(self.iterations):
+                if n == 0:
+                    await self._run("Homepage")
+                else:
+                    await self._open("Homepage")
+                await self._open("Document Scan")
+                await self._scan(self.uploads[n % len(self.uploads)])
+                for page in ("Dashboard", "Results", "Leaderboard"):
+                    await self._open(page)
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+
+
+async def run_level(server, base_url, sessions, iterations, uploads, think=0.0):
+    """Run ``sessions`` simulated users at once; returns the level's report.
+
+    ``uploads`` holds ``iterations`` documents per session.
+    """
+    users = [SimulatedSession(base_url, i, iterations, uploads[i * iterations:(i + 1) * iterations], think)
+             for i in range(sessions)]
+    rss_before, cpu_before = _rss_mb(server.pid), _cpu_seconds(server.pid)
+    async with AsyncExitStack() as stack:
+        for user in users:
+            await stack.enter_async_context(await user.connect())
+        start = time.perf_counter()
+        await asyncio.gather(*(user.play() for user in users))
+        wall = time.perf_counter() - start
+        # Taken before disconnecting, while the server still holds every session.
+        rss_after, cpu_after = _rss_mb(server.pid), _cpu_seconds(server.pid)
+        workers = [rss for rss in map(_rss_mb, _children(server.pid)) if rss is not None]
+
+    steps = [step for user in users for step in user.steps]
+    cpu = cpu_after - cpu_before if None not in (cpu_before, cpu_after) else None
+    return {
+        "sessions": sessions,
+        "iterations": iterations,
+        "latency_ms": percentiles([s["seconds"] for s in steps]),
+        "latency_ms_by_page": {page: percentiles([s["seconds"] for s in steps if s["page"] == page])
+                               for page in PAGES},
+        "scan_ms": percentiles([t for user in users for t in user.scans]),
+        "throughput": {
+            "wall_s": round(wall, 3),
+            "reruns": len(steps),
+            "reruns_per_s": round(len(steps) / wall, 3),
+            "sessions_per_min": round(sessions * iterations / wall * 60, 2),
+            "server_cpu_ms_per_rerun": round(cpu * 1000 / len(steps), 1) if cpu is not None and steps else None,
+        },
+        "memory": {
+            "rss_mb": rss_after,
+            "rss_per_session_mb": (round(max(0.0, rss_after - rss_before) / sessions, 2)
+                                   if None not in (rss_before, rss_after) else None),
+            "workers_rss_mb": round(sum(workers), 1) if workers else None,
+        },
+        "failures": sum(s["error"] is not None for s in steps) + sum(u.error is not None for u in users),
+        "errors": sorted({s["error"] for s in steps if s["error"]} | {u.error for u in users if u.error})[:10],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ramp", type=int, nargs="+", default=[1, 2, 4, 8], metavar="N",
+                        help="concurrent sessions per level")
+    parser.add_argument("--iterations", type=int, default=2, help="script passes per session")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds between a session's reruns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, help="server port (default: a free one)")
+    parser.add_argument("--data-dir", help="app data directory (default: a temporary one)")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to check for regressions")
+    args = parser.parse_args(argv)
+    if min(args.ramp) < 1 or args.iterations < 1:
+        parser.error("--ramp levels and --iterations must be at least 1")
+    return args
+
+
+def regressions(report, baseline):
+    """Problems in ``report`` against ``baseline``, matched by ramp level."""
+    baseline = {level["sessions"]: level for level in baseline["levels"]}
+    return [f"{level['sessions']} session(s): {problem}"
+            for level in report["levels"] if level["sessions"] in baseline
+            for problem in compare(level, baseline[level["sessions"]], THRESHOLDS)]
+
+
+def main():
+    args = parse_args()
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "iterations": args.iterations,
+            "think_s": args.think,
+            "seed": args.seed,
+        },
+        "levels": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="swarajya-loadtest-") as tmp:
+        server, base_url = start_server(args.data_dir or tmp, args.port)
+        try:
+            print(f"{'sessions':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'scan p50':>10}"
+                  f"{'reruns/s':>10}{'RSS MB':>9}{'MB/sess':>9}{'failed':>8}")
+            seeds = iter(range(args.seed, args.seed + 1 + sum(args.ramp) * args.iterations))
+            # One unreported pass first, so imports and shared services
+            # started by the first session count towards no level.
+            warm_up = asyncio.run(run_level(server, base_url, 1, 1, [synthetic_upload(next(seeds))]))
+            if warm_up["failures"]:
+                print(f"warm-up failed: {'; '.join(warm_up['errors'])}")
+            for sessions in args.ramp:
+                # A fresh page per session and pass, so no scan is a cache hit.
+                uploads = [synthetic_upload(next(seeds)) for _ in range(sessions * args.iterations)]
+                level = asyncio.run(run_level(server, base_url, sessions, args.iterations, uploads, args.think))
+                report["levels"].append(level)
+                lat = level["latency_ms"]
+                rss, growth = ("—" if v is None else v for v in
+                               (level["memory"]["rss_mb"], level["memory"]["rss_per_session_mb"]))
+                print(f"{sessions:>8}{lat.get('p50', '—'):>10}{lat.get('p95', '—'):>10}{lat.get('p99', '—'):>10}"
+                      f"{level['scan_ms'].get('p50', '—'):>10}{level['throughput']['reruns_per_s']:>10}"
+                      f"{rss:>9}{growth:>9}{level['failures']:>8}")
+                for error in level["errors"]:
+                    print(f"    error: {error}")
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            problems = regressions(report, json.load(fh))
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
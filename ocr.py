@@ -0,0 +1,110 @@
+"""Offline text extraction for the scan history's full-text search.
+
+PDF pages with a text layer are read directly (pypdfium2). Images and
+scanned PDF pages go through Tesseract, via ``pytesseract`` and a local
+``tesseract`` binary (a system package, see README.md); both are
+optional, and without them only PDF text layers are indexed. ``missing``
+names what is absent, for the notice on the Results page.
+
+A tall page is cut into horizontal bands at the blankest row near each
+band boundary, so no text line is split, and the bands are recognised in
+parallel threads (each is its own tesseract process). Whole documents run
+in a separate worker pool (``get_ocr_queue`` in resources.py), so OCR
+never holds up the tamper scans.
+"""
+
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from pdf_ingest import iter_pdf_text, pdfium
+from preprocess import analysis_array, open_image
+
+try:
+    import pytesseract
+except ImportError:  # optional: only PDF text layers are indexed
+    pytesseract = None
+
+WORKERS_ENV = "SWARAJYA_OCR_WORKERS"
+LANGUAGES = os.environ.get("SWARAJYA_OCR_LANGS", "eng")
+BAND_ROWS = 1200
+BAND_THREADS = 4
+INK_LEVEL = 128
+
+# One tesseract process per band; its own threading would oversubscribe.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def default_workers():
+    """OCR worker count from ``SWARAJYA_OCR_WORKERS``, else half the cores."""
+    value = os.environ.get(WORKERS_ENV, "").strip()
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+@functools.lru_cache(maxsize=1)
+def missing():
+    """What OCR lacks here, as a phrase for users, or ``None`` if nothing."""
+    if pytesseract is None:
+        return "the pytesseract package"
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return "the tesseract program"
+    return None
+
+
+def available():
+    """Whether images can be OCRed here (pytesseract and the binary)."""
+    return missing() is None
+
+
+def band_cuts(gray, rows=BAND_ROWS):
+    """Row offsets cutting ``gray`` into bands of about ``rows`` rows."""
+    height = gray.shape[0]
+    cuts = [0]
+    if height > rows * 3 // 2:
+        ink = (gray < INK_LEVEL).sum(axis=1)
+        while height - cuts[-1] > rows * 3 // 2:
+            # The row with the least ink within a quarter band of the
+            # nominal boundary: the gap between two text lines.
+            lo = cuts[-1] + rows - rows // 4
+            cuts.append(lo + int(np.argmin(ink[lo:lo + rows // 2])))
+    cuts.append(height)
+    return cuts
+
+
+def _recognise(gray):
+    return pytesseract.image_to_string(Image.fromarray(gray), lang=LANGUAGES).strip()
+
+
+def ocr_array(gray):
+    """Text of a grayscale page array, its bands recognised in parallel."""
+    cuts = band_cuts(gray)
+    bands = [gray[top:bottom] for top, bottom in zip(cuts, cuts[1:])]
+    if len(bands) == 1:
+        return _recognise(bands[0])
+    with ThreadPoolExecutor(min(BAND_THREADS, len(bands))) as pool:
+        return "\n".join(text for text in pool.map(_recognise, bands) if text)
+
+
+def document_text(kind, data):
+    """All text of an uploaded image or PDF (``kind`` "image" / "pdf")."""
+    if kind == "image":
+        return ocr_array(analysis_array(open_image(data))) if available() else ""
+    pages = []
+    for _, text, img in iter_pdf_text(data):
+        if text is None and img is not None and available():
+            text = ocr_array(np.asarray(img))
+        if text:
+            pages.append(text.strip())
+    return "\n\n".join(pages)
+
+
+def can_extract(kind):
+    """Whether ``document_text`` can get anything out of ``kind`` here."""
+    return available() or (kind == "pdf" and pdfium is not None)
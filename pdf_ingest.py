@@ -0,0 +1,323 @@
+"""Page-at-a-time PDF ingestion for the "Document Scan" page.
+
+``iter_pdf_pages`` is a generator that rasterizes one page per step, so a
+multi-hundred-page filing never has more than a page or two of pixels
+alive at once. Rendering uses pypdfium2 when it is installed; otherwise a
+pure-Python fallback pulls the embedded page images (JPEG or 8-bit
+Flate) straight out of the file, which covers the usual scanned filing.
+
+pdfium is not thread-safe, so it is never called on Streamlit's session
+threads: the Document Scan page writes the PDF to a file once and hands
+its path and a page index to the scan worker processes (``page_count``,
+``scan_pdf_page``), each of which runs one job at a time and opens the
+document only for that job. Those functions take the PDF's bytes or the
+path of a file holding them.
+"""
+
+import io
+import itertools
+import re
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from scanner import scan_image
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional: fall back to embedded page images
+    pdfium = None
+
+RENDER_DPI = 150
+# Pages with fewer characters in their text layer are treated as scans.
+MIN_TEXT_CHARS = 20
+
+EDITING_PRODUCERS = (
+    "photoshop", "gimp", "pdfescape", "sejda", "smallpdf", "ilovepdf",
+    "foxit phantom", "nitro", "pdf-xchange", "inkscape", "canva",
+)
+
+_STREAM = re.compile(rb">>\s*stream\r?\n")
+_INFO_FIELD = rb"/%s\s*\((.*?)\)"
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_PREV = re.compile(rb"/Prev\s+(\d+)")
+_BYTE_RANGE = re.compile(rb"/ByteRange\s*\[\s*\d+\s+\d+\s+(\d+)\s+(\d+)\s*\]")
+
+
+def _dict_value(header, key):
+    # Direct integers only; "/Length 12 0 R" style references are skipped.
+    match = re.search(rb"/" + key + rb"\s+(\d+)(?!\s+\d+\s+R)\b", header)
+    return int(match.group(1)) if match else None
+
+
+def _read(source):
+    # The PDF's bytes, given the bytes or a file path.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    with open(source, "rb") as fh:
+        return fh.read()
+
+
+def page_count(data):
+    """Number of pages (of embedded page images without pypdfium2)."""
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(data)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+    return sum(1 for _ in _image_streams(_read(data)))
+
+
+def _render(page, dpi):
+    bitmap = page.render(scale=dpi / 72, grayscale=True)
+    img = bitmap.to_pil()
+    # Detach the pixels from pdfium's buffer before it is freed.
+    img = img.convert("L") if img.mode != "L" else img.copy()
+    bitmap.close()
+    return img
+
+
+def _iter_pdfium_pages(data, dpi):
+    doc = pdfium.PdfDocument(data)
+    try:
+        for index in range(len(doc)):
+            page = doc[index]
+            try:
+                img = _render(page, dpi)
+            finally:
+                page.close()
+            yield index + 1, img
+    finally:
+        doc.close()
+
+
+def _image_streams(data):
+    # Without a renderer, each embedded image XObject is taken to be one
+    # scanned page, in file order: ``(header, raw)`` of those we can decode.
+    pos = 0
+    while True:
+        match = _STREAM.search(data, pos)
+        if match is None:
+            return
+        header = data[data.rfind(b"obj", pos, match.start()) + 3:match.start()]
+        start = match.end()
+        length = _dict_value(header, rb"Length")
+        if length is None:
+            end = data.find(b"endstream", start)
+            if end < 0:
+                return
+            raw = data[start:end].rstrip(b"\r\n")
+        else:
+            raw = data[start:start + length]
+        # Jump over the stream body so binary data is never searched.
+        pos = start + len(raw)
+        if not re.search(rb"/Subtype\s*/Image", header):
+            continue
+        if b"/DCTDecode" in header:
+            yield header, raw
+        elif b"/FlateDecode" in header:
+            if _dict_value(header, rb"Width") and _dict_value(header, rb"Height") \
+                    and _dict_value(header, rb"BitsPerComponent") == 8:
+                yield header, raw
+
+
+def _decode_image(header, raw):
+    # Grayscale page image of one ``_image_streams`` entry, or ``None``.
+    if b"/DCTDecode" in header:
+        return Image.open(io.BytesIO(raw)).convert("L")
+    width = _dict_value(header, rb"Width")
+    height = _dict_value(header, rb"Height")
+    pixels = np.frombuffer(zlib.decompress(raw), np.uint8)
+    channels = pixels.size // (width * height)
+    if channels not in (1, 3):
+        return None
+    shape = (height, width) if channels == 1 else (height, width, 3)
+    return Image.fromarray(pixels[:width * height * channels].reshape(shape)).convert("L")
+
+
+def _iter_embedded_images(data):
+    for number, (header, raw) in enumerate(_image_streams(_read(data)), 1):
+        img = _decode_image(header, raw)
+        if img is not None:
+            yield number, img
+
+
+def render_page(data, index, dpi=RENDER_DPI):
+    """Grayscale PIL image of page ``index`` (0-based), opening the document just for it."""
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(data)
+        try:
+            page = doc[index]
+            try:
+                return _render(page, dpi)
+            finally:
+                page.close()
+        finally:
+            doc.close()
+    stream = next(itertools.islice(_image_streams(_read(data)), index, None), None)
+    img = _decode_image(*stream) if stream is not None else None
+    if img is None:
+        raise ValueError(f"Page {index + 1} has no image that can be decoded")
+    return img
+
+
+def iter_pdf_pages(data, dpi=RENDER_DPI):
+    """Yield ``(page_number, grayscale PIL image)`` one page at a time."""
+    if pdfium is not None:
+        yield from _iter_pdfium_pages(data, dpi)
+    else:
+        yield from _iter_embedded_images(data)
+
+
+def iter_pdf_text(data, dpi=RENDER_DPI, min_chars=MIN_TEXT_CHARS):
+    """Yield ``(page_number, text, image)`` one page at a time.
+
+    A page with a text layer comes with its ``text`` and no image; any
+    other page is rendered (``text`` is ``None``) for OCR. Without
+    pypdfium2 every embedded page image is passed on for OCR.
+    """
+    if pdfium is None:
+        for page_no, img in _iter_embedded_images(data):
+            yield page_no, None, img
+        return
+    doc = pdfium.PdfDocument(data)
+    try:
+        for index in range(len(doc)):
+            page = doc[index]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_bounded()
+                textpage.close()
+                img = None if len(text.strip()) >= min_chars else _render(page, dpi)
+            finally:
+                page.close()
+            yield index + 1, (text if img is None else None), img
+    finally:
+        doc.close()
+
+
+def _xref_prev(data, offset):
+    # /Prev of the cross-reference section at ``offset``: a classic table
+    # with its trailer, or an xref stream with the keys in its dictionary.
+    if data[offset:offset + 16].lstrip().startswith(b"xref"):
+        end = data.find(b"startxref", offset)
+        section = data[data.find(b"trailer", offset, end):end]
+    else:
+        section = data[offset:data.find(b"stream", offset)]
+    match = _PREV.search(section)
+    return int(match.group(1)) if match else None
+
+
+def incremental_updates(data):
+    """Number of saves appended to the original file.
+
+    Follows the ``/Prev`` chain back from the last ``startxref``. A
+    linearized file's first-page trailer points *forward* to the main
+    table, which is its layout, not an update, so only backward links
+    count; so do only updates past the end of the last signature's
+    ``/ByteRange``, since signing is itself an incremental update.
+    """
+    last = None
+    for last in _STARTXREF.finditer(data):
+        pass
+    if last is None:
+        return 0
+    signed = max((int(start) + int(length) for start, length in _BYTE_RANGE.findall(data)), default=0)
+    offset = int(last.group(1))
+    seen = set()
+    updates = 0
+    while offset not in seen and offset < len(data):
+        seen.add(offset)
+        prev = _xref_prev(data, offset)
+        if prev is None:
+            break
+        if prev < offset and offset >= signed:
+            updates += 1
+        offset = prev
+    return updates
+
+
+def pdf_metadata(data):
+    """Document-level forgery hints: ``(score, findings)``.
+
+    Looks at incremental updates (content appended after the original
+    save) and at the Info dictionary's producer and dates.
+    """
+    findings = []
+    score = 0.0
+
+    updates = incremental_updates(data)
+    if updates:
+        findings.append(f"PDF was modified after creation ({updates} incremental update(s))")
+        score = max(score, 0.4)
+
+    fields = {}
+    for key in (b"Producer", b"Creator", b"CreationDate", b"ModDate"):
+        match = re.search(_INFO_FIELD % key, data)
+        if match:
+            fields[key.decode()] = match.group(1).decode("latin-1", "replace")
+
+    tools = f"{fields.get('Producer', '')} {fields.get('Creator', '')}".lower()
+    if any(name in tools for name in EDITING_PRODUCERS):
+        findings.append(f"Produced by editing software: {tools.strip()}")
+        score = max(score, 0.6)
+
+    created, modified = fields.get("CreationDate"), fields.get("ModDate")
+    if created and modified and created[:16] != modified[:16]:
+        findings.append(f"Modified ({modified}) after creation ({created})")
+        score = max(score, 0.3)
+
+    return score, findings
+
+
+def scan_page(img):
+    """Scan one page image from ``iter_pdf_pages`` or ``render_page``.
+
+    Rendered pages are composed by pdfium, not decoded from one JPEG, so
+    embedded photos and logos would read as compression anomalies; they
+    skip that check.
+    """
+    return scan_image(img, ela_weight=0.0 if pdfium is not None else None)
+
+
+def scan_pdf_page(data, index, dpi=RENDER_DPI):
+    """Render and scan page ``index`` of a PDF; a scan queue job."""
+    return scan_page(render_page(data, index, dpi))
+
+
+def scan_pdf(data, dpi=RENDER_DPI):
+    """Scan every page of a PDF in this process, one page at a time.
+
+    Returns the same summary the Document Scan page caches:
+    ``{"total", "metadata", "results"}`` with ``(page, result, error)``
+    rows.
+    """
+    results = []
+    for page_no, img in iter_pdf_pages(data, dpi):
+        try:
+            results.append((page_no, scan_page(img), None))
+        except Exception as exc:
+            results.append((page_no, None, str(exc)))
+    return {"total": len(results), "metadata": pdf_metadata(_read(data)), "results": results}
+
+
+def summarize_scan(kind, value):
+    """``(status, score, findings)`` for an image result or a ``scan_pdf`` summary.
+
+    A PDF none of whose pages could be scanned is ``"Failed"``, with the
+    first page error among its findings; it is never called clean.
+    """
+    if kind == "image":
+        return value.status, value.score, value.findings
+    pages = [r for _, r, _ in value["results"] if r is not None]
+    meta_score, findings = value["metadata"]
+    if not pages:
+        errors = [error for _, _, error in value["results"] if error]
+        return "Failed", None, findings + [errors[0] if errors else "No pages could be extracted from this PDF"]
+    flagged = [r for r in pages if r.status != "Clean"]
+    score = max([meta_score] + [r.score for r in pages])
+    findings = findings + [f"{len(flagged)} of {len(pages)} page(s) flagged"] if pages else findings
+    status = "Suspected Tampering" if flagged or meta_score >= 0.5 else "Clean"
+    return status, score, findings
@@ -0,0 +1,157 @@
+"""Contribution points: an append-only ledger and per-timeframe leaderboards.
+
+Every award is appended to ``ledger`` and, in the same transaction,
+added to the user's all-time total and to their counter for the day.
+Nothing ever re-reads the ledger to rank users: the all-time board and a
+board per rolling window (today, last 7 days, last 30 days) are
+``Leaderboard`` indexes kept current award by award, so a ranking or a
+page of the board costs the same whatever the timeframe.
+
+A window's board holds the sum of its daily counters. When the day rolls
+over, the counters of the day that left each window are subtracted from
+its board, so the work is one update per user active on that day rather
+than a rebuild. At start-up the boards are rebuilt from the totals and
+the last ``max(WINDOWS)`` days of counters.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+from db import ConnectionPool
+from leaderboard import Leaderboard
+from settings import data_path
+
+# Points per kind of contribution.
+POINTS = {
+    "chat_query": 1,
+    "document_scan": 5,
+    "tampering_reported": 20,
+}
+# Rolling windows, in days including today.
+WINDOWS = {"day": 1, "week": 7, "month": 30}
+TIMEFRAMES = {"All time": "all", "This month": "month", "This week": "week", "Today": "day"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    action TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS point_totals (
+    user TEXT PRIMARY KEY,
+    points INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS point_days (
+    day INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (day, user)
+) WITHOUT ROWID;
+"""
+
+
+def _day(timestamp):
+    """Proleptic ordinal of the local date of ``timestamp``."""
+    return date.fromtimestamp(timestamp).toordinal()
+
+
+class PointsLedger:
+    def __init__(self, seed_users=(), path=None):
+        self._pool = ConnectionPool(path or data_path("points.sqlite3"), SCHEMA)
+        self._profiles = {u["Username"]: u["Profile"] for u in seed_users if u.get("Profile")}
+        self._lock = threading.RLock()
+        self._seed(seed_users)
+        self._today = _day(time.time())
+        oldest = self._today - max(WINDOWS.values()) + 1
+        with self._pool.read() as db:
+            totals = db.execute("SELECT user, points FROM point_totals").fetchall()
+            rows = db.execute("SELECT day, user, points FROM point_days WHERE day >= ?", (oldest,)).fetchall()
+        # Everyone the ledger has ever credited, seeded or since; the
+        # Homepage shows it as "Users Registered".
+        self._users = len(totals)
+        # Daily counters still inside some window: {day: {user: points}}.
+        self._days = defaultdict(lambda: defaultdict(int))
+        for day, user, points in rows:
+            self._days[day][user] += points
+        self._boards = {"all": self._build(totals)}
+        for window, span in WINDOWS.items():
+            sums = defaultdict(int)
+            for day, counts in self._days.items():
+                if day > self._today - span:
+                    for user, points in counts.items():
+                        sums[user] += points
+            self._boards[window] = self._build(sums.items())
+
+    def _seed(self, seed_users):
+        # Opening balances count towards all-time only; they have no day.
+        with self._pool.write() as db:
+            if db.execute("SELECT 1 FROM ledger LIMIT 1").fetchone():
+                return
+            now = time.time()
+            db.executemany("INSERT INTO ledger (user, action, points, created_at) VALUES (?, 'opening_balance', ?, ?)",
+                           [(u["Username"], u["Points"], now) for u in seed_users])
+            db.executemany("INSERT INTO point_totals (user, points) VALUES (?, ?)",
+                           [(u["Username"], u["Points"]) for u in seed_users])
+
+    def _build(self, points):
+        return Leaderboard([{"Username": user, "Points": p, "Profile": self._profiles.get(user)}
+                            for user, p in points if p > 0])
+
+    def board(self, window="all"):
+        """The ``Leaderboard`` of ``window`` ("all" or a ``WINDOWS`` key), current as of now."""
+        with self._lock:
+            self._roll(_day(time.time()))
+        return self._boards[window]
+
+    def award(self, user, action, points=None, at=None):
+        """Append an award to the ledger and apply it to every board it counts on."""
+        points = POINTS[action] if points is None else points
+        at = at or time.time()
+        day = _day(at)
+        with self._pool.write() as db:
+            new_user = db.execute("SELECT 1 FROM point_totals WHERE user = ?", (user,)).fetchone() is None
+            db.execute("INSERT INTO ledger (user, action, points, created_at) VALUES (?, ?, ?, ?)",
+                       (user, action, points, at))
+            db.execute("INSERT INTO point_totals (user, points) VALUES (?, ?)"
+                       " ON CONFLICT (user) DO UPDATE SET points = points + excluded.points", (user, points))
+            db.execute("INSERT INTO point_days (day, user, points) VALUES (?, ?, ?)"
+                       " ON CONFLICT (day, user) DO UPDATE SET points = points + excluded.points",
+                       (day, user, points))
+        with self._lock:
+            self._users += new_user
+            self._roll(max(day, self._today))
+            self._add("all", user, points)
+            if day > self._today - max(WINDOWS.values()):
+                self._days[day][user] += points
+            for window, span in WINDOWS.items():
+                if self._today - span < day <= self._today:
+                    self._add(window, user, points)
+
+    def user_count(self):
+        """Number of distinct users the ledger has credited, the first award registering them."""
+        return self._users
+
+    def _add(self, window, user, delta):
+        board = self._boards[window]
+        points = board.points(user) + delta
+        if points > 0:
+            board.upsert(user, points, self._profiles.get(user))
+        else:
+            board.remove(user)
+
+    def _roll(self, today):
+        # Subtract the days that slid out of each window since the last roll.
+        if today <= self._today:
+            return
+        for window, span in WINDOWS.items():
+            for day in [d for d in self._days if self._today - span < d <= today - span]:
+                for user, points in self._days[day].items():
+                    self._add(window, user, -points)
+        oldest = today - max(WINDOWS.values())
+        for day in [d for d in self._days if d <= oldest]:
+            del self._days[day]
+        self._today = today
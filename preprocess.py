@@ -0,0 +1,145 @@
+"""Upload preprocessing for the "Document Scan" page.
+
+Phone photos of documents are often 20-50 MB, so each upload is decoded
+as little as its use allows:
+
+* ``preview`` asks the JPEG decoder for a reduced-scale image
+  (``Image.draft``), so the on-screen copy costs a fraction of the
+  full-resolution pixels;
+* ``analysis_array`` decodes only the luminance channel, at full
+  resolution (compression analysis needs the original JPEG grid), in
+  display orientation. The array it returns is the one buffer the
+  scanner's checks read; none of them copy it;
+* ``drafted`` stops after the decoder's own reduced-scale decode, which
+  the duplicate index (fingerprint.py) resamples once, straight to its
+  thumbnails;
+* ``deskew`` straightens it for copy-move hashing, which derives its
+  working copy and sampling phases from the one straightened page (a
+  copy only when the page is skewed).
+
+There is no fixed-DPI resample. A phone photo carries no real DPI (its
+tag is missing or a nominal 72), and error-level analysis must see the
+pixels on the JPEG grid they were saved on. Resolution is normalised
+where it can be: PDF pages are rendered at a fixed ``RENDER_DPI``
+(pdf_ingest.py), and the copy-move check works on a page scaled to a
+fixed longest side (``scanner.working_array``) by integer block means,
+so its block size means the same on every upload.
+"""
+
+import io
+import math
+
+import numpy as np
+from PIL import Image, ImageOps
+
+PREVIEW_SIDE = 1024
+PREVIEW_QUALITY = 85
+# Skew search: +/- MAX_SKEW degrees in SKEW_STEP steps on a SKEW_SAMPLE
+# pixel copy; smaller angles than MIN_SKEW are left alone.
+MAX_SKEW = 5.0
+SKEW_STEP = 0.25
+MIN_SKEW = 0.5
+SKEW_SAMPLE = 800
+
+_ROTATED = (5, 6, 7, 8)
+
+
+def open_image(src):
+    """``Image.open`` for bytes, memoryviews, file paths and (uploaded) file objects."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        src = io.BytesIO(src)
+    elif not isinstance(src, str):
+        src.seek(0)
+    return Image.open(src)
+
+
+def oriented_size(img):
+    """``img.size`` as displayed, after its EXIF orientation is applied."""
+    try:
+        orientation = img.getexif().get(0x0112)
+    except Exception:
+        orientation = None
+    return img.size[::-1] if orientation in _ROTATED else img.size
+
+
+def _decode(img, mode, max_side, resample):
+    # draft() only takes effect before the pixels are loaded, and only for
+    # JPEG; it picks the smallest DCT scale still at least max_side big.
+    img.draft(mode, (max_side, max_side))
+    if img.mode != mode:
+        img = img.convert(mode)
+    img = ImageOps.exif_transpose(img)
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), resample)
+    return img
+
+
+def drafted(src, min_side, mode="L"):
+    """``src`` decoded at the smallest JPEG DCT scale still ``min_side`` big
+    (full size for other formats), in display orientation, not resized."""
+    img = open_image(src)
+    img.draft(mode, (min_side, min_side))
+    if img.mode != mode:
+        img = img.convert(mode)
+    return ImageOps.exif_transpose(img)
+
+
+def preview(src, max_side=PREVIEW_SIDE):
+    """Downscaled JPEG of an upload for display: ``(jpeg_bytes, size)``.
+
+    ``size`` is the full-resolution size as displayed, which heatmaps
+    use for their aspect ratio.
+    """
+    img = open_image(src)
+    size = oriented_size(img)
+    img = _decode(img, "RGB", max_side, Image.Resampling.BICUBIC)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=PREVIEW_QUALITY)
+    return buf.getvalue(), size
+
+
+def estimate_skew(gray, max_skew=MAX_SKEW, step=SKEW_STEP):
+    """Text-line skew of a grayscale page in degrees (0 if not a text page).
+
+    Dark pixels are projected onto the vertical axis for every candidate
+    angle at once; the angle whose row profile is sharpest wins.
+    """
+    factor = max(1, math.ceil(max(gray.shape) / SKEW_SAMPLE))
+    small = gray[::factor, ::factor]
+    ink = small < min(128, np.percentile(small, 50) - 40)
+    if not 0.005 < ink.mean() < 0.4:
+        return 0.0
+    ys, xs = np.nonzero(ink)
+    angles = np.arange(-max_skew, max_skew + step / 2, step)
+    # Row of each ink pixel once the page is rotated by each angle.
+    rows = np.rint(ys[None, :] - xs[None, :] * np.tan(np.radians(angles))[:, None]).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    rows += np.arange(len(angles))[:, None] * span
+    profiles = np.bincount(rows.ravel(), minlength=len(angles) * span).reshape(len(angles), span)
+    best = float(angles[np.argmax(profiles.var(axis=1))])
+    return best if abs(best) >= MIN_SKEW else 0.0
+
+
+def analysis_array(img):
+    """Full-resolution grayscale uint8 buffer of ``img`` for the scanner.
+
+    Not resampled to a fixed DPI; see the module docstring.
+    """
+    # draft() at full size still spares a JPEG decoder the chroma planes.
+    img = _decode(img, "L", max(img.size), Image.Resampling.BOX)
+    return np.asarray(img)
+
+
+def rotate(gray, angle):
+    """``gray`` rotated by ``angle`` degrees, corners filled with paper colour."""
+    fill = int(np.median(gray[[0, -1]]))
+    return np.asarray(Image.fromarray(gray).rotate(angle, Image.Resampling.BILINEAR, fillcolor=fill))
+
+
+def deskew(gray):
+    """``(straightened copy of gray, angle)``; ``gray`` itself if not skewed."""
+    angle = estimate_skew(gray)
+    if not angle:
+        return gray, 0.0
+    return rotate(gray, angle), angle
@@ -0,0 +1,159 @@
+"""Process-wide services shared by every session and page.
+
+Each ``get_*`` is a ``st.cache_resource`` singleton, created on first use,
+so a page that never touches (say) the alert engine never builds it. The
+module behind each one is imported inside its factory for the same
+reason: importing this file costs nothing a page does not use.
+"""
+
+import uuid
+
+import streamlit as st
+
+
+@st.cache_resource
+def get_scan_queue():
+    """Process pool shared by every session; size via SWARAJYA_SCAN_WORKERS."""
+    from scan_queue import ScanQueue
+
+    return ScanQueue()
+
+
+@st.cache_resource
+def get_ocr_queue():
+    """Separate pool for text extraction, so OCR never delays a tamper scan.
+
+    Size via SWARAJYA_OCR_WORKERS.
+    """
+    from ocr import default_workers as ocr_workers
+    from scan_queue import ScanQueue
+
+    return ScanQueue(workers=ocr_workers(), label="ocr job")
+
+
+@st.cache_resource
+def get_scan_cache():
+    """Scan results keyed by upload hash, shared by every session."""
+    from scan_cache import ScanCache
+
+    return ScanCache()
+
+
+@st.cache_resource
+def get_history():
+    """Scan history store shared by every session."""
+    from history import ScanHistory
+
+    return ScanHistory()
+
+
+@st.cache_resource
+def get_fingerprints():
+    """Near-duplicate index of every scanned document, shared by every session."""
+    from fingerprint import FingerprintIndex
+
+    return FingerprintIndex()
+
+
+@st.cache_resource
+def get_points():
+    """Points ledger and its per-timeframe leaderboards, shared by every session."""
+    from leaderboard import SEED_USERS
+    from points import PointsLedger
+
+    return PointsLedger(SEED_USERS)
+
+
+@st.cache_resource
+def get_activity_log():
+    """Query event log and rollups shared by every session."""
+    from activity import ActivityLog
+
+    return ActivityLog()
+
+
+@st.cache_resource
+def get_alerts():
+    """Alert fan-out engine and inboxes, running on its own event loop thread."""
+    from alerts import AlertEngine
+
+    return AlertEngine().start()
+
+
+@st.cache_resource
+def get_languages():
+    """``{label: code}`` of the languages that have a pack on disk."""
+    from i18n import available_languages
+
+    return available_languages()
+
+
+@st.cache_resource
+def get_language_pack(code):
+    """Translations for ``code``, read on first request and shared by every session."""
+    from i18n import load_pack
+
+    return load_pack(code)
+
+
+@st.cache_resource
+def get_chat_engine():
+    """Memory-mapped constitution index answering chatbot questions."""
+    from chat_engine import ConstitutionIndex
+
+    return ConstitutionIndex()
+
+
+@st.cache_resource
+def get_chat_server():
+    """Chat endpoint the widget posts to; answered queries feed the Dashboard.
+
+    It also serves the timing histograms on ``/metrics``, on a separate
+    loopback-only port. The app asks for it on every rerun to embed the
+    widget, so starting it only opens the listeners: the answer engine,
+    activity log and points ledger are fetched on the first message.
+    """
+    from chat_server import ChatServer
+    from timing import prometheus
+
+    def answer(message):
+        return get_chat_engine().answer(message)
+
+    def on_query(user, query, reply):
+        get_activity_log().log_query(user, query)
+        get_points().award(user, "chat_query")
+
+    return ChatServer(answer, on_query=on_query, metrics=prometheus).start()
+
+
+@st.cache_resource
+def get_memory_budget():
+    """Memory caps shared by every session; see session_memory.py."""
+    from session_memory import MemoryBudget
+
+    return MemoryBudget()
+
+
+def session_memory():
+    """This session's size-tracked store for large values kept across reruns."""
+    if "memory" not in st.session_state:
+        st.session_state["memory"] = get_memory_budget().session(current_user())
+    return st.session_state["memory"]
+
+
+def current_user():
+    """Username of this session; anonymous visitors share "guest"."""
+    return st.session_state.setdefault("username", "guest")
+
+
+def chat_session():
+    """Opaque id the chat widget sends so the server knows whose question it is.
+
+    It is registered with the origin the page was loaded from (the
+    browser's ``Origin`` header), the only origin the server lets use it.
+    """
+    if "chat_session" not in st.session_state:
+        st.session_state["chat_session"] = uuid.uuid4().hex
+    get_chat_server().register(st.session_state["chat_session"], current_user(),
+                               st.context.headers.get("Origin"))
+    return st.session_state["chat_session"]
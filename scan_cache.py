@@ -0,0 +1,103 @@
+"""Content-addressed cache of scan results.
+
+Results are keyed by the SHA-256 of the uploaded bytes plus the scanner
+version, so re-uploading a document, or any Streamlit rerun that shows it
+again, never repeats the analysis. A small in-memory LRU sits in front of
+an SQLite file whose total size is capped; the least recently used rows
+are evicted first.
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from db import ConnectionPool
+from scanner import SCANNER_VERSION
+from settings import data_path
+
+MEMORY_ITEMS = 256
+MAX_DISK_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scan_cache_accessed ON scan_cache (accessed);
+"""
+
+
+def cache_key(data, kind="image"):
+    """Cache key for uploaded ``data`` scanned as ``kind``."""
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{kind}:{SCANNER_VERSION}:{digest}"
+
+
+class ScanCache:
+    def __init__(self, path=None, memory_items=MEMORY_ITEMS, max_bytes=MAX_DISK_BYTES):
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool(path or data_path("scan_cache.sqlite3"), SCHEMA)
+        with self._pool.read() as db:
+            # Only changed under the pool's write lock.
+            self._disk_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM scan_cache").fetchone()[0]
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached value for ``key`` or ``None``."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        with self._pool.read() as db:
+            row = db.execute("SELECT value FROM scan_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._pool.write() as db:
+            db.execute("UPDATE scan_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        value = pickle.loads(row[0])
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` in both tiers, evicting old disk rows past the cap."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value)
+        with self._pool.write() as db:
+            old = db.execute("SELECT size FROM scan_cache WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO scan_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()))
+            self._disk_bytes += len(blob) - (old[0] if old else 0)
+            self._evict(db)
+
+    def _evict(self, db):
+        while self._disk_bytes > self.max_bytes:
+            rows = db.execute("SELECT key, size FROM scan_cache ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size in rows:
+                db.execute("DELETE FROM scan_cache WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.max_bytes:
+                    return
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._pool.write() as db:
+            db.execute("DELETE FROM scan_cache")
+            self._disk_bytes = 0
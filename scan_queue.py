@@ -0,0 +1,180 @@
+"""Background scan job queue for the "Document Scan" page.
+
+Scans run in a ``ProcessPoolExecutor`` so heavy uploads never hold up the
+Streamlit script thread: ``submit`` hands back a job id straight away and
+the page polls ``status`` until the result is ready. One queue is shared by
+every session (see ``get_scan_queue`` in resources.py), so throughput
+scales with the number of worker processes rather than with sessions.
+
+Workers start from a fork server (spawn where there is none), never by
+forking the Streamlit server with its threads and locks. A worker that
+dies (killed, out of memory) fails the jobs it took down with it; the
+next ``submit`` starts a fresh pool rather than leaving the queue broken.
+"""
+
+import bisect
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from scanner import scan_bytes
+from timing import record as record_timing
+
+WORKERS_ENV = "SWARAJYA_SCAN_WORKERS"
+# Finished jobs are kept around this long for sessions to pick them up.
+RESULT_TTL = 15 * 60
+MAX_JOBS = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers():
+    """Worker count from ``SWARAJYA_SCAN_WORKERS``, else one per core."""
+    value = os.environ.get(WORKERS_ENV, "").strip()
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return os.cpu_count() or 1
+
+
+def _mp_context():
+    # Forking a threaded server copies whatever locks its other threads
+    # hold. Workers re-read the main module on start-up instead, which is
+    # why app.py keeps everything under its ``__main__`` guard.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # The scanner is imported once, in the server, not per worker.
+        context.set_forkserver_preload(["scan_queue"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _run_scan(data):
+    # Runs in a worker process; only the scanner module is imported there.
+    return scan_bytes(data)
+
+
+class ScanQueue:
+    def __init__(self, workers=None, label="scan job"):
+        self.workers = workers or default_workers()
+        self.label = label
+        self._pool = self._new_pool()
+        self._broken = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        # Sequence numbers of unfinished jobs, in submission order, so a
+        # job's queue position is a binary search rather than a scan.
+        self._pending = []
+        self._seq = itertools.count()
+
+    def submit(self, data, name="", func=_run_scan, on_done=None):
+        """Queue ``func(data)`` and return its job id immediately.
+
+        ``on_done(result)`` is called in this process when the job succeeds,
+        whether or not any session is still polling for it.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if self._broken is self._pool:
+                self._restart()
+            try:
+                future = self._pool.submit(func, data)
+            except BrokenProcessPool:
+                # Broken before its failed jobs have been reported.
+                self._restart()
+                future = self._pool.submit(func, data)
+            pool = self._pool
+            seq = next(self._seq)
+            self._pending.append(seq)
+            self._jobs[job_id] = {"name": name, "future": future, "seq": seq,
+                                  "submitted": time.time(), "finished": None}
+            self._prune()
+        future.add_done_callback(lambda f, job_id=job_id: self._mark_finished(job_id, f, on_done, pool))
+        return job_id
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+
+    def _restart(self):
+        # Caller holds the lock. The broken pool's jobs have all failed,
+        # so there is nothing to cancel (cancelling would call back into
+        # ``_mark_finished`` under this lock).
+        logger.warning("%s pool broke (a worker died); starting a new one", self.label)
+        self._pool.shutdown(wait=False)
+        self._pool = self._new_pool()
+        self._broken = None
+
+    def _mark_finished(self, job_id, future=None, on_done=None, pool=None):
+        with self._lock:
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._broken = pool
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["finished"] = time.time()
+                record_timing(self.label, job["finished"] - job["submitted"])
+                index = bisect.bisect_left(self._pending, job["seq"])
+                if index < len(self._pending) and self._pending[index] == job["seq"]:
+                    del self._pending[index]
+        if on_done is not None and not future.cancelled() and future.exception() is None:
+            try:
+                on_done(future.result())
+            except Exception:
+                # A failing callback must not break the pool's result thread.
+                logger.exception("on_done callback of job %s failed", job_id)
+
+    def _prune(self):
+        now = time.time()
+        while self._jobs:
+            job_id, job = next(iter(self._jobs.items()))
+            expired = job["finished"] is not None and now - job["finished"] > RESULT_TTL
+            if not expired and len(self._jobs) <= MAX_JOBS:
+                break
+            if not job["future"].done() and not expired:
+                # Never drop work that is still pending; only the oldest
+                # finished jobs are eligible once the table is full.
+                break
+            self._jobs.popitem(last=False)
+
+    def status(self, job_id):
+        """Snapshot of a job as a dict with ``state`` and ``progress``.
+
+        ``state`` is one of ``queued``, ``running``, ``done``, ``failed`` or
+        ``unknown`` (expired or never submitted). ``result`` / ``error`` are
+        filled in once the job has finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"state": "unknown", "progress": 0.0}
+            ahead = bisect.bisect_left(self._pending, job["seq"])
+
+        future = job["future"]
+        info = {"name": job["name"], "submitted": job["submitted"]}
+        if future.done():
+            info["elapsed"] = (job["finished"] or time.time()) - job["submitted"]
+            error = "Cancelled" if future.cancelled() else future.exception()
+            if error is not None:
+                info.update(state="failed", progress=1.0, error=str(error))
+            else:
+                info.update(state="done", progress=1.0, result=future.result())
+        elif future.running() or ahead < self.workers:
+            info.update(state="running", progress=0.5)
+        else:
+            # Queue position drives the progress bar while waiting.
+            waiting = ahead - self.workers + 1
+            info.update(state="queued", progress=0.5 / (1 + waiting), position=waiting)
+        return info
+
+    def pending(self):
+        """Number of jobs submitted but not finished."""
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
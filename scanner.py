@@ -0,0 +1,525 @@
+"""Tampering / forgery analysis behind the "Document Scan" page.
+
+Three independent checks run over a single grayscale NumPy buffer:
+
+* compression analysis (error levels at several JPEG qualities): re-save
+  the page and look for regions that re-compress with far less error
+  than their edges predict. Content that was JPEG-compressed before it
+  was pasted in (a "JPEG ghost") comes back almost unchanged at its old
+  quality; the rest of the page does not,
+* copy-move detection: hash overlapping blocks and look for many blocks
+  duplicated under the same spatial shift,
+* metadata consistency: EXIF / PNG text fields that point at editing.
+
+Everything works on whole-array block reductions, so a 12 MP scan is
+analysed without any per-pixel Python loops.
+"""
+
+import io
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image, ExifTags
+
+from preprocess import analysis_array, deskew, open_image
+
+SCANNER_VERSION = "1.3.0"
+
+# Pages are analysed at most at this size (longest side); compression
+# analysis runs at full resolution but copy-move hashing is done on the
+# downscaled buffer.
+WORK_SIZE = 1024
+# Side of a heatmap region in pixels of the working buffer.
+REGION = 32
+ELA_QUALITIES = (50, 65, 80)
+ELA_BAND = 512
+# A region whose error level is below GHOST_RATIO of the page's typical
+# level is an outlier, fully so at GHOST_FLOOR. Regions with less than
+# MIN_EDGE_SHARE of the typical edge content are not judged at all.
+GHOST_RATIO = 0.6
+GHOST_FLOOR = 0.2
+MIN_EDGE_SHARE = 0.25
+# Outlying regions needed before the score can reach its full value.
+GHOST_REGIONS = 4
+# Lossless uploads (PNG, TIFF, ...) have no JPEG grid of their own, so a
+# JPEG ghost there counts for less; rendered PDF pages skip the check.
+LOSSLESS_ELA_WEIGHT = 0.5
+TAMPER_THRESHOLD = 0.5
+
+EDITING_SOFTWARE = (
+    "photoshop", "gimp", "paint.net", "pixlr", "affinity", "snapseed",
+    "picsart", "canva", "lightroom", "photopea", "illustrator",
+)
+
+
+@dataclass
+class ScanResult:
+    score: float
+    status: str
+    heatmap: np.ndarray
+    ela_score: float
+    copy_move_score: float
+    metadata_score: float
+    findings: list = field(default_factory=list)
+    elapsed: float = 0.0
+    version: str = SCANNER_VERSION
+
+    @property
+    def confidence(self):
+        """How sure we are of ``status``, as a percentage."""
+        if self.status == "Clean":
+            return round(100 * (1 - self.score), 1)
+        return round(100 * self.score, 1)
+
+
+def _block_reduce(arr, size, func=np.mean):
+    """Reduce a 2-D array over non-overlapping ``size`` x ``size`` blocks."""
+    h = arr.shape[0] // size * size
+    w = arr.shape[1] // size * size
+    blocks = arr[:h, :w].reshape(h // size, size, w // size, size)
+    return func(blocks, axis=(1, 3))
+
+
+def _resize_to_grid(grid, shape):
+    """Nearest-neighbour resize of a small region grid to ``shape``."""
+    rows = np.minimum(np.arange(shape[0]) * grid.shape[0] // shape[0], grid.shape[0] - 1)
+    cols = np.minimum(np.arange(shape[1]) * grid.shape[1] // shape[1], grid.shape[1] - 1)
+    return grid[np.ix_(rows, cols)]
+
+
+def to_gray_array(img):
+    """Return the luminance channel of ``img`` as a uint8 array."""
+    if img.mode != "L":
+        img = img.convert("L")
+    return np.asarray(img)
+
+
+def working_array(gray, max_side=WORK_SIZE):
+    """Downscale ``gray`` so its longest side is at most ``max_side``."""
+    h, w = gray.shape
+    factor = int(np.ceil(max(h, w) / max_side))
+    if factor <= 1:
+        return gray
+    # Integer block sums, one axis at a time, so no float copy of the
+    # full-resolution buffer is ever made.
+    h, w = h // factor * factor, w // factor * factor
+    blocks = gray[:h, :w].reshape(h // factor, factor, w // factor, factor)
+    sums = blocks.sum(axis=1, dtype=np.uint32).sum(axis=2)
+    return (sums // (factor * factor)).astype(np.uint8)
+
+
+def _ela_levels(band, qualities, size):
+    # Grayscale JPEG blocks are coded independently, so re-saving a band
+    # whose height is a multiple of 8 gives the same errors as re-saving
+    # the whole page.
+    levels = []
+    for quality in qualities:
+        buf = io.BytesIO()
+        Image.fromarray(band).save(buf, "JPEG", quality=quality)
+        buf.seek(0)
+        resaved = np.asarray(Image.open(buf))
+        levels.append(_block_reduce(np.abs(np.subtract(band, resaved, dtype=np.int16)), size))
+    # Re-compression error grows with the amount of edge in a region, so
+    # every level is read against the region's mean gradient.
+    band = band.astype(np.float32)
+    edges = np.zeros_like(band)
+    edges[:, 1:] += np.abs(np.diff(band, axis=1))
+    edges[1:, :] += np.abs(np.diff(band, axis=0))
+    return np.stack(levels), _block_reduce(edges, size)
+
+
+def error_level_analysis(gray, qualities=ELA_QUALITIES, region=REGION):
+    """Per-region compression anomaly grid in [0, 1] and an overall score.
+
+    ``gray`` is the full resolution luminance buffer; ``region`` is given
+    in working-buffer pixels and scaled up accordingly. The page is
+    processed in bands of about ``ELA_BAND`` rows, so temporaries stay
+    small however large the upload is.
+    """
+    scale = max(1, int(np.ceil(max(gray.shape) / WORK_SIZE)))
+    size = region * scale
+    rows = gray.shape[0] // size * size
+    if rows == 0 or gray.shape[1] < size:
+        return np.zeros((1, 1), np.float32), 0.0
+    band = size * max(1, ELA_BAND // size)
+    parts = [_ela_levels(gray[top:min(top + band, rows)], qualities, size) for top in range(0, rows, band)]
+    levels = np.concatenate([p[0] for p in parts], axis=1)
+    edges = np.concatenate([p[1] for p in parts])
+
+    # Blank paper and regions with a stray mark say nothing either way.
+    inked = edges[edges >= 1.0]
+    if inked.size == 0:
+        return np.zeros(edges.shape, np.float32), 0.0
+    busy = edges >= max(1.0, MIN_EDGE_SHARE * float(np.median(inked)))
+    levels = levels / (edges + 1.0)
+    # Each quality is compared with the page's own typical level, so a
+    # page compressed as a whole is not an outlier against itself.
+    ratio = (levels / np.median(levels[:, busy], axis=1)[:, None, None]).min(axis=0)
+    grid = np.clip((GHOST_RATIO - ratio) / (GHOST_RATIO - GHOST_FLOOR), 0.0, 1.0)
+    grid = np.where(busy, grid, 0.0).astype(np.float32)
+
+    outliers = grid > 0
+    if not outliers.any():
+        return grid, 0.0
+    # A patch of strongly deviating regions is the tampering signature;
+    # a page where much of it deviates is mixed content, not a splice.
+    count = int(outliers.sum())
+    score = float(grid[outliers].mean() * min(1.0, count / GHOST_REGIONS))
+    if count > 0.4 * busy.sum():
+        score *= 0.25
+    return grid, min(score, 1.0)
+
+
+def _box_sums(arr, size):
+    """Sum of every ``size`` x ``size`` window of ``arr`` (integral image)."""
+    ii = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), np.float64)
+    ii[1:, 1:] = arr.cumsum(0).cumsum(1)
+    return ii[size:, size:] - ii[:-size, size:] - ii[size:, :-size] + ii[:-size, :-size]
+
+
+def phase_cells(gray, factor, cell=4):
+    """``[((dy, dx), cell means), ...]`` for ``copy_move_detection``.
+
+    The page downscaled ``factor`` times only shows a clone as exact
+    duplicates when the clone's shift is a multiple of ``factor``. For
+    every other sampling phase, ``gray`` is cut ``dy`` rows and ``dx``
+    columns in and averaged over ``cell * factor`` pixel squares: the
+    ``cell`` x ``cell`` sub-block means of that downscale, straight from
+    full resolution. ``cell`` is ``block // 4`` of the copy-move windows.
+    """
+    size = cell * factor
+    phases = []
+    for dy in range(factor):
+        rows = (gray.shape[0] - dy) // size
+        # Row sums once per row phase, shared by every column phase.
+        strip = gray[dy:dy + rows * size].reshape(rows, size, gray.shape[1]).sum(axis=1, dtype=np.uint32)
+        for dx in range(factor):
+            if not dy and not dx:
+                continue
+            cols = (gray.shape[1] - dx) // size
+            sums = strip[:, dx:dx + cols * size].reshape(rows, cols, size).sum(axis=2)
+            phases.append(((dy, dx), sums.astype(np.float32) / (size * size)))
+    return phases
+
+
+def _pack(parts):
+    # Sixteen sub-block means, quantized against their own mean to int8
+    # levels and packed into two words, hashed to one uint64 per window.
+    mean = sum(parts) / 16
+    levels = np.empty(mean.shape + (16,), np.int8)
+    for k, part in enumerate(parts):
+        levels[..., k] = np.rint((part - mean) / 4.0)
+    words = levels.view(np.uint64)
+    return words[..., 0] * np.uint64(0x9E3779B97F4A7C15) ^ words[..., 1]
+
+
+def _signatures(work, block, min_variance):
+    # Every ``block`` x ``block`` window reduced to a quantized 4x4
+    # signature of sub-block means. Returns the flat indices of textured
+    # windows, their keys and the window grid width.
+    work = work.astype(np.float32)
+    n = block * block
+    sums = _box_sums(work, block)
+    variance = _box_sums(work * work, block) / n - (sums / n) ** 2
+    ny, nx = variance.shape
+    # Flat paper and blank margins are naturally "duplicated" everywhere.
+    keep = np.flatnonzero(variance.ravel() >= min_variance)
+
+    sub = block // 4
+    sub_means = (_box_sums(work, sub) / (sub * sub)).astype(np.float32)
+    parts = [sub_means[i * sub:i * sub + ny, j * sub:j * sub + nx] for i in range(4) for j in range(4)]
+    return keep, _pack(parts).ravel()[keep], nx
+
+
+def _lattice_signatures(cells, min_variance):
+    # The same signatures for windows of 4 x 4 cells, one per cell.
+    # Texture is judged on the cell means alone, which understate the
+    # window's variance, hence the lower bar. Returns the (row, col) of
+    # textured windows' first cell and their keys.
+    ny, nx = cells.shape[0] - 3, cells.shape[1] - 3
+    if ny < 1 or nx < 1:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.uint64)
+    parts = [cells[i:i + ny, j:j + nx] for i in range(4) for j in range(4)]
+    variance = sum(part * part for part in parts) / 16 - (sum(parts) / 16) ** 2
+    keep = np.flatnonzero(variance.ravel() >= min_variance / 4)
+    rows, cols = np.divmod(keep, nx)
+    return rows, cols, _pack(parts).ravel()[keep]
+
+
+def copy_move_detection(work, block=16, min_variance=40.0, min_shift=24,
+                        min_matches=400, max_group=8, region=REGION, phases=(), factor=1):
+    """Find regions duplicated elsewhere on the page.
+
+    Every ``block`` x ``block`` window is reduced to a quantized 4x4
+    signature of sub-block means; identical signatures sharing a common
+    shift vector over at least ``min_matches`` windows are reported as
+    cloned. ``phases`` holds the page at the other sampling phases of
+    the ``factor`` times downscale, as ``phase_cells`` gives them. Their
+    windows, one every ``block // 4`` pixels, are matched against every
+    window of ``work``, so clones at any shift are found, not only those
+    moved by a multiple of ``factor`` pixels.
+    """
+    h, w = work.shape
+    grid_shape = (max(1, h // region), max(1, w // region))
+    empty = np.zeros(grid_shape, np.float32)
+    if h < block * 2 or w < block * 2:
+        return empty, 0.0
+
+    sub = block // 4
+    keep, keys, nx = _signatures(work, block, min_variance)
+    ny = h - block + 1
+    keep, keys, phase = [keep], [keys], [np.zeros(keep.size, np.int64)]
+    for p, (_, cells) in enumerate(phases, 1):
+        rows, cols, lattice_keys = _lattice_signatures(cells, min_variance)
+        # Lattice windows are placed on the working grid they overlay.
+        inside = (rows * sub < ny) & (cols * sub < nx)
+        keep.append((rows[inside] * nx + cols[inside]) * sub)
+        keys.append(lattice_keys[inside])
+        phase.append(np.full(int(inside.sum()), p, np.int64))
+    keep, keys, phase = np.concatenate(keep), np.concatenate(keys), np.concatenate(phase)
+    if keep.size < 2:
+        return empty, 0.0
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    # Signatures shared by many windows are textures (text, patterns), not
+    # clones; smaller groups are expanded into all their pairs.
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(sorted_keys)])
+    small = np.repeat(sizes <= max_group, sizes)
+    pairs = []
+    for k in range(1, max_group):
+        same = (sorted_keys[k:] == sorted_keys[:-k]) & small[k:]
+        if same.any():
+            pairs.append((order[:-k][same], order[k:][same]))
+    if not pairs:
+        return empty, 0.0
+    i = np.concatenate([p[0] for p in pairs])
+    j = np.concatenate([p[1] for p in pairs])
+    # Only pairs with a ``work`` window count, and it goes first: lattice
+    # windows of two phases are too sparse to line up with each other.
+    kept = (phase[i] == 0) | (phase[j] == 0)
+    swap = phase[i] != 0
+    i, j = np.where(swap, j, i)[kept], np.where(swap, i, j)[kept]
+    offsets = np.array([(0, 0)] + [offset for offset, _ in phases]).reshape(-1, 2)
+    # Shifts are measured in full-resolution pixels, across samplings.
+    ay, ax = np.divmod(keep[i], nx)
+    by, bx = np.divmod(keep[j], nx)
+    pb = phase[j]
+    dy = (by - ay) * factor + offsets[pb, 0]
+    dx = (bx - ax) * factor + offsets[pb, 1]
+    # Normalise the direction of pairs within ``work`` so A->B and B->A
+    # count as the same shift.
+    flip = (pb == 0) & ((dy < 0) | ((dy == 0) & (dx < 0)))
+    a, b = np.where(flip, keep[j], keep[i]), np.where(flip, keep[i], keep[j])
+    dy = np.where(flip, -dy, dy)
+    dx = np.where(flip, -dx, dx)
+    far = np.hypot(dy, dx) >= min_shift * factor
+    if not far.any():
+        return empty, 0.0
+
+    a, b, pb, dy, dx = a[far], b[far], pb[far], dy[far], dx[far]
+    # One integer per signed shift.
+    span = 2 * w * factor + 1
+    sid = (dy + h * factor) * span + dx + w * factor
+    nshift = (2 * h * factor + 1) * span
+    nphase = len(phases) + 1
+    # Lattice windows stand for ``sub`` x ``sub`` working windows each.
+    step = np.where(pb > 0, sub, 1)
+
+    # A cloned region yields a dense patch of matches under one shift;
+    # straight edges and repeated glyphs only give lines or scattered hits.
+    # Keep matches whose right and lower neighbours (in the same sampling)
+    # match under the same shift as well.
+    key = (a.astype(np.int64) * nphase + pb) * nshift + sid
+    sorted_key = np.sort(key)
+
+    def matched(query):
+        found = np.minimum(np.searchsorted(sorted_key, query), len(sorted_key) - 1)
+        return sorted_key[found] == query
+
+    dense = (matched(key + step * nphase * nshift) & (a % nx < nx - step)
+             & matched(key + step * nx * nphase * nshift))
+    if not dense.any():
+        return empty, 0.0
+    # A clone is matched from both ends across phases (its source in
+    # ``work`` against its copy, and the other way round), so groups go
+    # by the shift either way round, and lattice matches count half of
+    # the working windows they stand for.
+    back = (dy < 0) | ((dy == 0) & (dx < 0))
+    group = np.where(back, (h * factor - dy) * span - dx + w * factor, sid)
+    weight = np.where(pb > 0, sub * sub / 2, 1.0)
+    candidates, inverse = np.unique(group[dense], return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=weight[dense])
+    candidates = candidates[counts >= min_matches]
+    if not candidates.size:
+        return empty, 0.0
+
+    # Repeated form structure (ruled cells, recurring labels) can add up
+    # to many matches under one shift, spread over the whole page; a
+    # clone packs them into one patch. Count each candidate's matches
+    # per region and keep it if ``min_matches`` fit in 3 x 3 regions.
+    gh, gw = h // region + 1, w // region + 1
+    pick = np.isin(group, candidates) & dense
+    ay, ax = np.divmod(a[pick], nx)
+    which = np.searchsorted(candidates, group[pick])
+    cells = np.bincount((which * gh + ay // region) * gw + ax // region, weights=weight[pick],
+                        minlength=candidates.size * gh * gw).reshape(candidates.size, gh, gw)
+    padded = np.zeros((candidates.size, gh + 2, gw + 2))
+    padded[:, 1:-1, 1:-1] = cells
+    local = sum(padded[:, i:i + gh, j:j + gw] for i in range(3) for j in range(3)).max(axis=(1, 2))
+    accepted = candidates[local >= min_matches]
+    if not accepted.size:
+        return empty, 0.0
+    cloned = dense & np.isin(group, accepted)
+
+    # Window origins are painted onto a grid and grown by the window size
+    # with the same integral-image trick, rather than looping per match.
+    origins = np.zeros((h, w), np.float32)
+    for idx in (a[cloned], b[cloned]):
+        oy, ox = np.divmod(idx, nx)
+        origins[oy, ox] = 1.0
+    padded = np.zeros((h + block - 1, w + block - 1), np.float32)
+    padded[block - 1:, block - 1:] = origins
+    mask = _box_sums(padded, block) > 0
+    grid = _block_reduce(mask.astype(np.float32), region)
+    if grid.size == 0:
+        grid = empty
+    # Reaching ``min_matches`` is already a confident call; larger cloned
+    # areas only push the score further up.
+    extra = (local.max() - min_matches) / (3.0 * min_matches)
+    score = float(min(1.0, 0.6 + 0.4 * extra))
+    return grid.astype(np.float32), score
+
+
+def metadata_consistency(img):
+    """Check EXIF / PNG text metadata for signs of editing.
+
+    Returns ``(score, findings)``.
+    """
+    findings = []
+    score = 0.0
+    fields = {}
+
+    try:
+        exif = img.getexif()
+    except Exception:
+        exif = {}
+    for tag, value in dict(exif).items():
+        fields[ExifTags.TAGS.get(tag, str(tag))] = value
+    try:
+        for tag, value in exif.get_ifd(ExifTags.IFD.Exif).items():
+            fields[ExifTags.TAGS.get(tag, str(tag))] = value
+    except Exception:
+        pass
+    for key, value in getattr(img, "text", {}).items():
+        fields.setdefault(key, value)
+
+    software = str(fields.get("Software", "")).lower()
+    if any(name in software for name in EDITING_SOFTWARE):
+        findings.append(f"Saved by editing software: {fields['Software']}")
+        score = max(score, 0.7)
+
+    taken = fields.get("DateTimeOriginal")
+    modified = fields.get("DateTime")
+    if taken and modified and str(taken).strip() != str(modified).strip():
+        findings.append(f"Modified ({modified}) after capture ({taken})")
+        score = max(score, 0.4)
+
+    exif_w = fields.get("ExifImageWidth")
+    exif_h = fields.get("ExifImageHeight")
+    if exif_w and exif_h and {int(exif_w), int(exif_h)} != set(img.size):
+        findings.append(f"EXIF dimensions {exif_w}x{exif_h} do not match image {img.size[0]}x{img.size[1]}")
+        score = max(score, 0.5)
+
+    if fields.get("Make") and not fields.get("Model"):
+        findings.append("Camera make recorded without a model")
+        score = max(score, 0.2)
+
+    return score, findings
+
+
+def scan_array(gray, img=None, metadata=None, ela_weight=1.0):
+    """Run all checks on a grayscale buffer.
+
+    ``img`` supplies metadata; pass ``metadata`` instead when it was
+    already read (``metadata_consistency`` output). The compression
+    score is scaled by ``ela_weight``; 0 skips the check.
+    """
+    start = time.perf_counter()
+    gray = np.asarray(gray, dtype=np.uint8)
+    # Copy-move reads every sampling phase from one straightened page, so
+    # their windows line up.
+    upright, angle = deskew(gray)
+    work = working_array(upright)
+
+    if ela_weight:
+        ela_grid, ela_score = error_level_analysis(gray)
+        ela_score *= ela_weight
+    else:
+        ela_grid, ela_score = np.zeros((1, 1), np.float32), 0.0
+    factor = max(1, int(np.ceil(max(gray.shape) / WORK_SIZE)))
+    cm_grid, cm_score = copy_move_detection(work, phases=phase_cells(upright, factor), factor=factor)
+    if angle and cm_score > 0:
+        # Back into page orientation, to line up with the ELA grid.
+        cm_grid = np.asarray(Image.fromarray(cm_grid).rotate(-angle, Image.Resampling.NEAREST))
+    if metadata is None:
+        metadata = metadata_consistency(img) if img is not None else (0.0, [])
+    meta_score, findings = metadata[0], list(metadata[1])
+
+    shape = cm_grid.shape
+    heatmap = np.maximum(_resize_to_grid(ela_grid, shape), cm_grid)
+
+    if ela_score >= 0.3:
+        findings.append(f"Compressed differently from the rest of the page in {int((ela_grid > 0).sum())} region(s)")
+    if cm_score > 0:
+        findings.append(f"Duplicated content in {int((cm_grid > 0).sum())} region(s)")
+
+    # Any single strong signal is enough to flag a document; weaker signals
+    # reinforce each other.
+    signals = np.array([ela_score, cm_score, meta_score])
+    score = float(1 - np.prod(1 - signals))
+    status = "Suspected Tampering" if score >= TAMPER_THRESHOLD else "Clean"
+
+    return ScanResult(
+        score=round(score, 4),
+        status=status,
+        heatmap=heatmap,
+        ela_score=round(ela_score, 4),
+        copy_move_score=round(cm_score, 4),
+        metadata_score=round(meta_score, 4),
+        findings=findings,
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def scan_image(img, ela_weight=None):
+    """Scan a PIL image after normalizing it with ``analysis_array``.
+
+    ``ela_weight`` defaults by source: 1 for JPEG files,
+    ``LOSSLESS_ELA_WEIGHT`` for anything else.
+    """
+    if ela_weight is None:
+        ela_weight = 1.0 if img.format in ("JPEG", "MPO") else LOSSLESS_ELA_WEIGHT
+    # Metadata first: reduced-scale decoding changes ``img.size``.
+    metadata = metadata_consistency(img)
+    return scan_array(analysis_array(img), metadata=metadata, ela_weight=ela_weight)
+
+
+def scan_bytes(data):
+    """Scan an encoded image (PNG / JPEG bytes, or the path of such a file)."""
+    return scan_image(open_image(data))
+
+
+def heatmap_image(result, size, max_side=WORK_SIZE):
+    """Render ``result.heatmap`` as an RGB image with the aspect of ``size``."""
+    factor = max(1.0, max(size) / max_side)
+    size = (max(1, int(size[0] / factor)), max(1, int(size[1] / factor)))
+    h = np.clip(result.heatmap, 0.0, 1.0)
+    rgb = np.stack([
+        255 * h,
+        255 * (1 - np.abs(h - 0.5) * 2) * 0.6,
+        255 * (1 - h) * 0.35,
+    ], axis=-1).astype(np.uint8)
+    return Image.fromarray(rgb, "RGB").resize(size, Image.NEAREST)
@@ -0,0 +1,264 @@
+"""Per-session memory accounting with least-recently-used spill to disk.
+
+Large values a session keeps across reruns (PDF page results, upload
+buffers) are put in its ``SessionMemory`` instead of bare
+``st.session_state``. Each entry is sized when it is stored (NumPy
+arrays, images and frames by their buffers, containers recursively).
+When a session holds more than ``SESSION_CAP`` bytes, its least recently
+used entries are pickled to a temporary directory and read back the next
+time they are asked for. When all sessions together hold more than
+``GLOBAL_CAP``, the largest session spills first, so one heavy user
+cannot push everyone else out.
+
+Pinned entries are counted but never spilled: a scan still in progress
+keeps its job list, and the uploader's buffers belong to Streamlit. As
+they cannot be spilled, the caps are enforced on them on the way in:
+``pin`` refuses bytes that would take the session's pinned total past
+its cap, or all sessions' past the global cap, and the Document Scan
+page holds such uploads back until others are removed. Entries that
+cannot be pickled are dropped instead; callers treat a miss as
+"recompute" (the scan cache answers most of them). The spill directory,
+which also takes ``scratch_path`` files (uploads handed to worker
+processes by path), goes away with the session.
+"""
+
+import itertools
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+MB = 1024 * 1024
+SESSION_CAP = int(os.environ.get("SWARAJYA_SESSION_MEMORY_MB", "256")) * MB
+GLOBAL_CAP = int(os.environ.get("SWARAJYA_MEMORY_MB", "2048")) * MB
+# Spill files go under the system temp directory unless this is set.
+SPILL_DIR = os.environ.get("SWARAJYA_SPILL_DIR") or None
+MAX_DEPTH = 6
+
+
+def sizeof(value, _depth=0):
+    """Approximate bytes held by ``value``, counting buffers rather than wrappers."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    size = sys.getsizeof(value)
+    if _depth >= MAX_DEPTH:
+        return size
+    if isinstance(value, dict):
+        return size + sum(sizeof(k, _depth + 1) + sizeof(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(sizeof(v, _depth + 1) for v in value)
+    if hasattr(value, "__dict__"):
+        return size + sizeof(vars(value), _depth + 1)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "size", "pinned", "path")
+
+    def __init__(self, value, size, pinned):
+        self.value = value
+        self.size = size
+        self.pinned = pinned
+        self.path = None
+
+
+class SessionMemory:
+    def __init__(self, budget, label=""):
+        self.budget = budget
+        self.label = label
+        self.created = time.time()
+        self.memory = 0
+        self.spilled = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._spills = itertools.count()
+        self._dir = tempfile.mkdtemp(prefix="swarajya-session-", dir=budget.spill_dir)
+        weakref.finalize(self, shutil.rmtree, self._dir, True)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self, prefix=""):
+        with self._lock:
+            return [name for name in self._entries if name.startswith(prefix)]
+
+    def put(self, name, value, size=None, pinned=False):
+        """Store ``value`` under ``name``; ``size`` defaults to ``sizeof(value)``."""
+        entry = _Entry(value, sizeof(value) if size is None else size, pinned)
+        with self._lock:
+            self._discard(name)
+            self._entries[name] = entry
+            self.memory += entry.size
+            self._enforce(keep=name)
+        self.budget.enforce()
+
+    def pin(self, name, size):
+        """Count ``size`` bytes held elsewhere (an upload) under ``name``, pinned.
+
+        Returns False, counting nothing, when that would take this
+        session's pinned bytes over its cap or every session's over the
+        global cap.
+        """
+        with self._lock:
+            if name in self._entries:
+                return True
+            if self.pinned() + size > self.budget.session_cap:
+                return False
+        if self.budget.pinned() + size > self.budget.global_cap:
+            return False
+        self.put(name, None, size=size, pinned=True)
+        return True
+
+    def pinned(self):
+        """Bytes held by pinned entries."""
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if e.pinned)
+
+    def get(self, name, default=None):
+        """The value under ``name``, read back from disk if it was spilled."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return default
+            self._entries.move_to_end(name)
+            if entry.path is None:
+                return entry.value
+            try:
+                with open(entry.path, "rb") as fh:
+                    entry.value = pickle.load(fh)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._discard(name)
+                return default
+            os.remove(entry.path)
+            entry.path = None
+            self.spilled -= entry.size
+            self.memory += entry.size
+            self._enforce(keep=name)
+        self.budget.enforce()
+        return entry.value
+
+    def pop(self, name):
+        with self._lock:
+            self._discard(name)
+
+    def _discard(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        if entry.path is None:
+            self.memory -= entry.size
+        else:
+            self.spilled -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def evict_one(self, keep=None):
+        """Spill (or drop) the least recently used unpinned entry; False if there is none."""
+        with self._lock:
+            for name, entry in self._entries.items():
+                if entry.path is None and not entry.pinned and name != keep and entry.size:
+                    break
+            else:
+                return False
+            path = os.path.join(self._dir, f"{next(self._spills)}.pickle")
+            try:
+                with open(path, "wb") as fh:
+                    pickle.dump(entry.value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                # Unpicklable or disk trouble: forget it; callers recompute.
+                if os.path.exists(path):
+                    os.remove(path)
+                self._discard(name)
+                return True
+            entry.value = None
+            entry.path = path
+            self.memory -= entry.size
+            self.spilled += entry.size
+            return True
+
+    def _enforce(self, keep=None):
+        while self.memory > self.budget.session_cap and self.evict_one(keep):
+            pass
+
+    def scratch_path(self, suffix=""):
+        """A fresh file path in this session's spill directory, removed with it."""
+        return os.path.join(self._dir, f"{next(self._spills)}{suffix}")
+
+    def usage(self):
+        """``{"label", "memory", "spilled", "entries", "pinned"}`` in bytes / counts."""
+        with self._lock:
+            return {"label": self.label, "memory": self.memory, "spilled": self.spilled,
+                    "entries": len(self._entries), "pinned": self.pinned()}
+
+
+class MemoryBudget:
+    """Every live ``SessionMemory``, held to ``global_cap`` bytes together."""
+
+    def __init__(self, global_cap=GLOBAL_CAP, session_cap=SESSION_CAP, spill_dir=SPILL_DIR):
+        self.global_cap = global_cap
+        self.session_cap = session_cap
+        self.spill_dir = spill_dir
+        # Sessions drop out on their own when Streamlit discards their state.
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def session(self, label=""):
+        """A new ``SessionMemory`` under this budget."""
+        store = SessionMemory(self, label)
+        with self._lock:
+            self._sessions.add(store)
+        return store
+
+    def enforce(self):
+        """Spill from the largest sessions until the total fits ``global_cap``."""
+        with self._lock:
+            stores = list(self._sessions)
+            total = sum(s.memory for s in stores)
+            while total > self.global_cap:
+                for store in sorted(stores, key=lambda s: s.memory, reverse=True):
+                    before = store.memory
+                    if store.evict_one():
+                        total -= before - store.memory
+                        break
+                else:
+                    return
+
+    def pinned(self):
+        """Pinned bytes over every live session."""
+        with self._lock:
+            stores = list(self._sessions)
+        return sum(s.pinned() for s in stores)
+
+    def usage(self):
+        """Totals over live sessions plus the caps, in bytes."""
+        with self._lock:
+            stores = list(self._sessions)
+        return {"sessions": len(stores), "memory": sum(s.memory for s in stores),
+                "spilled": sum(s.spilled for s in stores),
+                "global_cap": self.global_cap, "session_cap": self.session_cap}
+
+    def sessions(self):
+        """``usage()`` of every live session, largest first."""
+        with self._lock:
+            stores = list(self._sessions)
+        return sorted((s.usage() for s in stores), key=lambda u: u["memory"], reverse=True)
@@ -0,0 +1,12 @@
+"""Deployment settings shared by the app's storage and worker modules."""
+
+import os
+
+# Scan caches, history and other on-disk state live under this directory.
+DATA_DIR = os.environ.get("SWARAJYA_DATA_DIR", "data")
+
+
+def data_path(name):
+    """Path of ``name`` inside ``DATA_DIR``, creating the directory."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
@@ -0,0 +1,95 @@
+"""Server-side paged HTML tables for the Dashboard and Leaderboard.
+
+``paged_table`` asks the page's store for one sorted window of rows
+(``fetch(sort, descending, limit, offset) -> (rows, total)``), so sorting
+and slicing happen in SQLite or the leaderboard index, and only the rows
+on screen are ever turned into HTML. Cells are escaped and link columns
+built with pandas string methods over the whole window at once, never a
+per-row ``apply``.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from timing import timed
+
+
+def html_escape(column):
+    """HTML-escape a column as strings without a per-row Python call."""
+    return (column.fillna("").astype(str)
+            .str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False)
+            .str.replace(">", "&gt;", regex=False)
+            .str.replace('"', "&quot;", regex=False)
+            .str.replace("'", "&#x27;", regex=False))
+
+
+def text(column):
+    """Cell builder showing ``column`` as escaped text."""
+    return lambda frame: html_escape(frame[column])
+
+
+def link(url_column, text_column=None, label=None):
+    """Cell builder linking to ``url_column``, showing ``text_column`` or a fixed ``label``.
+
+    Only http(s) and relative URLs become links; anything else (say a
+    ``javascript:`` URL) is shown as plain text.
+    """
+    def build(frame):
+        urls = frame[url_column].fillna("").astype(str)
+        shown = html_escape(frame[text_column]) if text_column else pd.Series(label, index=frame.index)
+        safe = urls.str.match(r"(?i)^(https?://|/|#)") | (urls == "")
+        anchors = ('<a href="' + html_escape(urls.where(urls != "", "#"))
+                   + '" target="_blank" rel="noopener noreferrer">' + shown + "</a>")
+        return anchors.where(safe, shown)
+    return build
+
+
+def table_html(frame, columns):
+    """``<table>`` of ``frame`` with one column per ``{header: builder}`` entry."""
+    head = "".join(f"<th>{header}</th>" for header in columns)
+    if frame.empty:
+        return f'<table border="1" class="dataframe"><thead><tr>{head}</tr></thead><tbody></tbody></table>'
+    # Rows are assembled column-wise: one string concatenation per column.
+    rows = pd.Series("<tr>", index=frame.index)
+    for build in columns.values():
+        rows = rows + "<td>" + build(frame) + "</td>"
+    return (f'<table border="1" class="dataframe"><thead><tr>{head}</tr></thead>'
+            f"<tbody>{''.join(rows + '</tr>')}</tbody></table>")
+
+
+def paged_table(key, fetch, columns, sorts, page_size=25, filters=()):
+    """Draw one page of a table with a sort selector and previous / next buttons.
+
+    ``columns`` maps headers to cell builders (``text`` / ``link`` or any
+    ``frame -> Series`` of safe HTML). ``sorts`` maps the selector's labels
+    to ``(sort, descending)`` passed to ``fetch``; the first is the
+    default. Changing the sort or ``filters`` goes back to the first page.
+    Returns the number of matching rows.
+    """
+    sort_label = st.selectbox("Sort by", list(sorts), key=f"{key}_sort")
+    sort, descending = sorts[sort_label]
+    state = (sort_label, tuple(filters))
+    if st.session_state.get(f"{key}_state") != state:
+        st.session_state[f"{key}_state"] = state
+        st.session_state[f"{key}_offset"] = 0
+    offset = st.session_state[f"{key}_offset"]
+
+    rows, total = fetch(sort, descending, page_size, offset)
+    if not rows and offset:
+        # The data shrank under us; start again from the first page.
+        st.session_state[f"{key}_offset"] = offset = 0
+        rows, total = fetch(sort, descending, page_size, 0)
+    with timed(f"{key} table html"):
+        html = table_html(pd.DataFrame(rows), columns)
+    st.write(html, unsafe_allow_html=True)
+
+    col_prev, col_page, col_next = st.columns([1, 4, 1])
+    if col_prev.button("← Previous", key=f"{key}_prev", disabled=offset == 0):
+        st.session_state[f"{key}_offset"] = max(0, offset - page_size)
+        st.rerun()
+    col_page.caption(f"Showing {offset + 1 if rows else 0}–{offset + len(rows)} of {total}")
+    if col_next.button("Next →", key=f"{key}_next", disabled=offset + page_size >= total):
+        st.session_state[f"{key}_offset"] = offset + page_size
+        st.rerun()
+    return total
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from activity import ActivityLog
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+def at(*args):
+    return datetime(*args).timestamp()
+
+
+def test_rollups_fill_every_range(tmp_path):
+    log = ActivityLog(str(tmp_path / "activity.sqlite3"))
+    for moment in [at(2026, 3, 10, 15, 5), at(2026, 3, 10, 15, 50), at(2026, 3, 10, 9),
+                   at(2026, 3, 8, 12), at(2026, 1, 20), at(2025, 3, 1)]:
+        log.log_query("asha", "right to vote", created_at=moment)
+    log.log_query("ravi", "article 21", created_at=at(2026, 3, 10, 15))
+
+    hours = log.series("asha", "24h", now=NOW)
+    assert len(hours) == 24 and hours[-1] == (datetime(2026, 3, 10, 15), 2)
+    assert dict(hours)[datetime(2026, 3, 10, 9)] == 1 and sum(c for _, c in hours) == 3
+    days = log.series("asha", "7d", now=NOW)
+    assert [c for _, c in days] == [0, 0, 0, 0, 1, 0, 3]
+    assert sum(c for _, c in log.series("asha", "30d", now=NOW)) == 4
+    months = log.series("asha", "1y", now=NOW)
+    assert months[0] == (datetime(2025, 4, 1), 0)
+    assert [c for _, c in months[-3:]] == [1, 0, 4]
+    assert log.today("asha", now=NOW) == 3
+    assert log.totals("asha") == (6, at(2026, 3, 10, 15, 50))
+    assert log.totals("meera") == (0, None)
+
+
+def test_recent_queries_are_paged_and_sorted(tmp_path):
+    log = ActivityLog(str(tmp_path / "activity.sqlite3"))
+    for i, query in enumerate(["beta", "Alpha", "gamma", "delta"]):
+        log.log_query("asha", query, created_at=1000.0 + i)
+    assert [r["query"] for r in log.recent("asha", limit=2)] == ["delta", "gamma"]
+    assert [r["query"] for r in log.recent("asha", limit=2, offset=2)] == ["Alpha", "beta"]
+    assert [r["query"] for r in log.recent("asha", order="query", descending=False)] == [
+        "Alpha", "beta", "delta", "gamma"]
+    assert log.recent("ravi") == []
+
+
+def test_generation_counts_each_users_writes(tmp_path):
+    log = ActivityLog(str(tmp_path / "activity.sqlite3"))
+    log.log_query("asha", "a")
+    log.log_query("asha", "b")
+    assert log.generation("asha") == 2 and log.generation("ravi") == 0
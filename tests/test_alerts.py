@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from alerts import EVERYONE, AlertEngine, TopicIndex
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A long flush interval: deliveries happen when the test flushes.
+    return AlertEngine(str(tmp_path / "alerts.sqlite3"), flush_interval=3600,
+                       sink_file=str(tmp_path / "sink.jsonl")).start()
+
+
+def titles(engine, user):
+    return [[alert["title"] for alert in entry["alerts"]] for entry in engine.inbox(user)]
+
+
+def test_topic_index_finds_only_subscribers():
+    index = TopicIndex()
+    index.set("asha", ["Elections", "Labour & Wages"])
+    index.set("ravi", ["Elections"])
+    index.set("meera", [])
+    assert sorted(index.recipients(("Elections",))) == ["asha", "ravi"]
+    assert sorted(index.recipients(("Labour & Wages", "Elections"))) == ["asha", "ravi"]
+    assert sorted(index.recipients((EVERYONE,))) == ["asha", "meera", "ravi"]
+    index.set("asha", ["Consumer Rights"])
+    assert index.recipients(("Elections",)) == ["ravi"]
+
+
+def test_alerts_reach_their_topics_and_coalesce(engine, tmp_path):
+    engine.subscribe_many([("asha", ["Elections"]), ("ravi", ["Land & Property"]), ("meera", [])])
+    engine.publish("Polling day", "Vote on Monday.", ["Elections"])
+    engine.publish("Roll revision", "Check your name.", ["Elections"])
+    engine.publish("Helpline", "Call 1950.", [])
+    assert engine.flush(timeout=10) == 3
+    # Everything pending for a user lands as one entry, newest first.
+    assert titles(engine, "asha") == [["Helpline", "Roll revision", "Polling day"]]
+    assert titles(engine, "ravi") == [["Helpline"]] and titles(engine, "meera") == [["Helpline"]]
+    assert engine.unread("asha") == 1
+    engine.mark_read("asha")
+    assert engine.unread("asha") == 0 and engine.inbox("asha")[0]["read_at"] is not None
+    with open(tmp_path / "sink.jsonl") as fh:
+        assert sorted(json.loads(line)["user"] for line in fh) == ["asha", "meera", "ravi"]
+
+
+def test_rate_limit_holds_alerts_back_until_the_window_rolls(tmp_path):
+    engine = AlertEngine(str(tmp_path / "alerts.sqlite3"), flush_interval=3600, rate_limit=2,
+                         rate_window=3600).start()
+    engine.subscribe("asha", ["Elections"])
+    for n in range(4):
+        engine.publish(f"Alert {n}", "", ["Elections"])
+        engine.flush(timeout=10)
+    assert titles(engine, "asha") == [["Alert 1"], ["Alert 0"]]
+    assert engine.stats()["pending_users"] == 1
+    # The window rolls over: the held-back alerts go out as one entry.
+    engine._windows["asha"] = (0.0, 2)
+    assert engine.flush(timeout=10) == 1
+    assert titles(engine, "asha")[0] == ["Alert 3", "Alert 2"]
+
+
+def test_subscriptions_survive_a_restart(engine, tmp_path):
+    engine.subscribe("asha", ["Elections", "Elections", "Consumer Rights"])
+    assert engine.subscriptions("asha") == ["Consumer Rights", "Elections"]
+    assert engine.subscriptions("ravi") is None
+    reopened = AlertEngine(str(tmp_path / "alerts.sqlite3"))
+    assert reopened.subscriptions("asha") == ["Consumer Rights", "Elections"]
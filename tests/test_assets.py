@@ -0,0 +1,29 @@
+import os
+
+import assets
+
+
+def test_stylesheets_are_published_under_their_content_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path))
+    url = assets._publish("theme-light", "body { color: red; }")
+    assert url == assets._publish("theme-light", "body { color: red; }")
+    other = assets._publish("theme-light", "body { color: blue; }")
+    assert other != url and other.startswith("app/static/theme-light-")
+    assert sorted(os.listdir(tmp_path)) == sorted(u.rsplit("/", 1)[1] for u in (url, other))
+    with open(tmp_path / url.rsplit("/", 1)[1]) as fh:
+        assert fh.read() == "body { color: red; }"
+
+
+def test_stylesheet_is_inlined_without_static_serving(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(assets.st, "get_option", lambda name: True)
+    assert assets._stylesheet("footer", "p {}").startswith('<style>@import url("app/static/footer-')
+    monkeypatch.setattr(assets.st, "get_option", lambda name: False)
+    assert assets._stylesheet("footer", "p {}") == "<style>p {}</style>"
+
+
+def test_chat_widget_takes_the_theme_and_keeps_its_placeholders():
+    for theme, palette in assets.PALETTES.items():
+        html = assets.chat_widget(theme)
+        assert palette["chat_bg"] in html
+        assert "__CHAT_URL__" in html and "__CHAT_SESSION__" in html
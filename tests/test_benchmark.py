@@ -0,0 +1,19 @@
+from benchmark import build_corpus, check_floors, percentiles, run, summarize, time_large_page
+
+
+def test_detection_meets_floors():
+    corpus = build_corpus(per_case=1, seed=0)
+    rows, wall, workers = run(corpus)
+    report = summarize(rows, wall, workers, seed=0, size=(1700, 2200))
+    assert report["failures"] == 0
+    assert check_floors(report) == []
+
+
+def test_large_page_meets_floor():
+    assert check_floors({"large_page_ms": time_large_page()}) == []
+
+
+def test_percentiles_are_in_milliseconds():
+    assert percentiles([]) == {}
+    stats = percentiles([0.001 * n for n in range(1, 101)])
+    assert (stats["p50"], stats["max"], stats["mean"]) == (50.5, 100.0, 50.5)
@@ -0,0 +1,42 @@
+import pytest
+
+from chat_engine import ConstitutionIndex, query_terms
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    index = ConstitutionIndex(str(tmp_path_factory.mktemp("chat") / "constitution.bm25"))
+    yield index
+    index.close()
+
+
+def top(index, query):
+    return [hit["id"] for hit in index.search(query)]
+
+
+def test_bare_number_is_not_an_article_number():
+    assert query_terms("can I vote at 18") == ["vot", "18", "eighteen"]
+    assert query_terms("Article 18") == ["articl", "#18"]
+    assert query_terms("art. 14") == ["art", "#14"]
+    assert "#1988" in query_terms("1988 amendment")
+
+
+@pytest.mark.parametrize("query, best", [
+    ("can I vote at 18", "art-326"),
+    ("minimum voting age", "art-326"),
+    ("Article 18", "art-18"),
+    ("article 326", "art-326"),
+    ("art. 14", "art-14"),
+    ("abolition of titles", "art-18"),
+    ("fundamental duties", "art-51a"),
+    ("right to education", "art-21a"),
+    ("42nd amendment 1976", "amend-42"),
+    ("1988 amendment", "amend-61"),
+])
+def test_best_passage(index, query, best):
+    assert top(index, query)[0] == best
+
+
+def test_amendments_are_still_cited(index):
+    assert "amend-61" in top(index, "can I vote at 18")
+    assert "art-18" not in top(index, "can I vote at 18")
@@ -0,0 +1,79 @@
+import json
+import socket
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from chat_server import ChatServer
+
+
+def echo(message):
+    return {"answer": message, "sources": []}
+
+
+def test_loopback_server_is_only_offered_to_local_pages():
+    server = ChatServer(echo, port=8502)
+    assert server.url_for("localhost:8501") == "http://127.0.0.1:8502"
+    assert server.url_for("[::1]:8501") == "http://127.0.0.1:8502"
+    assert server.url_for("scanner.example.org") is None
+    public = ChatServer(echo, host="0.0.0.0", port=8502)
+    assert public.url_for("scanner.example.org:8501") == "http://scanner.example.org:8502"
+
+
+def test_idle_sessions_are_forgotten():
+    server = ChatServer(echo, session_idle=0.05)
+    server.register("a", "asha")
+    server.register("b", "ravi")
+    assert server._user("a") == "asha"
+    time.sleep(0.1)
+    server.register("c", "meera")
+    assert list(server._users) == ["c"]
+    assert server._user("a") is None
+
+
+def test_metrics_are_served_on_loopback_only():
+    server = ChatServer(echo, metrics=lambda: "swarajya_up 1\n").start()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(server.url_for("localhost") + "/metrics")
+    assert error.value.code == 404
+    assert server.metrics_url.startswith("http://127.0.0.1:")
+    with urllib.request.urlopen(server.metrics_url) as response:
+        assert response.read() == b"swarajya_up 1\n"
+        assert "Access-Control-Allow-Origin" not in response.headers
+
+
+def post_chat(server, session, origin=None):
+    headers = {"Content-Type": "text/plain"}
+    if origin is not None:
+        headers["Origin"] = origin
+    request = urllib.request.Request(server.url_for("localhost") + "/chat", headers=headers,
+                                     data=json.dumps({"session": session, "message": "hi"}).encode())
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def test_only_registered_sessions_on_their_origin_may_chat():
+    asked = []
+    server = ChatServer(echo, on_query=lambda user, message, reply: asked.append(user)).start()
+    server.register("s1", "asha", "http://localhost:8501")
+    status, headers, body = post_chat(server, "s1", "http://localhost:8501")
+    assert status == 200 and b'"hi"' in body
+    assert headers["Access-Control-Allow-Origin"] == "http://localhost:8501"
+    assert asked == ["asha"]
+    status, headers, _ = post_chat(server, "s1", "http://evil.example")
+    assert status == 403 and "Access-Control-Allow-Origin" not in headers
+    status, _, _ = post_chat(server, "forged", "http://localhost:8501")
+    assert status == 403
+    assert asked == ["asha"]
+
+
+def test_stalled_request_times_out():
+    server = ChatServer(echo, read_timeout=0.2).start()
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(b"POST /chat HTTP/1.1\r\nContent-Length: 100\r\n\r\n{")
+        assert sock.recv(1024).startswith(b"HTTP/1.1 408")
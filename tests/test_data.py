@@ -0,0 +1,62 @@
+import pytest
+
+import data
+
+
+class FakeActivity:
+    def __init__(self):
+        self.generations = {}
+        self.reads = 0
+
+    def generation(self, user):
+        return self.generations.get(user, 0)
+
+    def totals(self, user):
+        self.reads += 1
+        return (self.generation(user), None)
+
+
+class FakeHistory:
+    generation = 0
+    reads = 0
+
+    def counters(self):
+        self.reads += 1
+        return {"total_scans": self.generation}
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    activity, history = FakeActivity(), FakeHistory()
+    monkeypatch.setattr(data, "get_activity_log", lambda: activity)
+    monkeypatch.setattr(data, "get_history", lambda: history)
+    data._query_totals.clear()
+    data._scan_counters.clear()
+    yield activity, history
+    data._query_totals.clear()
+    data._scan_counters.clear()
+
+
+def test_reads_are_cached_until_the_users_generation_moves(stores):
+    activity, _ = stores
+    assert data.query_totals("asha") == (0, None)
+    assert data.query_totals("asha") == (0, None)
+    assert activity.reads == 1
+    activity.generations["asha"] = 1
+    assert data.query_totals("asha") == (1, None)
+    assert activity.reads == 2
+    # Another user's writes leave this user's entry alone.
+    activity.generations["ravi"] = 5
+    assert data.query_totals("asha") == (1, None)
+    assert data.query_totals("ravi") == (5, None)
+    assert activity.reads == 3
+
+
+def test_counters_refresh_after_a_write(stores):
+    _, history = stores
+    assert data.scan_counters() == {"total_scans": 0}
+    data.scan_counters()
+    assert history.reads == 1
+    history.generation = 1
+    assert data.scan_counters() == {"total_scans": 1}
+    assert history.reads == 2
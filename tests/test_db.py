@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db import ConnectionPool
+
+
+def test_readers_are_read_only_and_capped(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "t.sqlite3"), "CREATE TABLE t (x INTEGER);", readers=2)
+    with pool.write() as db:
+        db.execute("INSERT INTO t VALUES (1)")
+    with pool.read() as db:
+        assert db.execute("SELECT x FROM t").fetchall() == [(1,)]
+        with pytest.raises(sqlite3.OperationalError):
+            db.execute("INSERT INTO t VALUES (2)")
+
+    held, release = [], threading.Event()
+
+    def hold():
+        with pool.read() as db:
+            held.append(db)
+            release.wait(5)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(held) == 3 and len({id(db) for db in held}) <= 2
+
+
+def test_failed_write_is_rolled_back(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "t.sqlite3"), "CREATE TABLE t (x INTEGER);")
+    with pytest.raises(ZeroDivisionError):
+        with pool.write() as db:
+            db.execute("INSERT INTO t VALUES (1)")
+            1 / 0
+    with pool.read() as db:
+        assert db.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
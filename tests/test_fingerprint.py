@@ -0,0 +1,87 @@
+import io
+import itertools
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmark import text_page
+from fingerprint import MAX_DISTANCE, FingerprintIndex, hamming, image_fingerprint
+
+NAMES = ["Asha Verma", "Ravi Kumar", "Meera Nair", "Arjun Rao", "Divya Shah", "Kiran Das"]
+
+
+def encode(page, fmt="PNG", **options):
+    buf = io.BytesIO()
+    Image.fromarray(page).save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+def id_card(number, size=(1000, 630)):
+    """One card of a fixed ID template: only the name and the field values differ."""
+    rng = np.random.default_rng(number)
+    img = Image.new("L", size, 235)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(26)
+    draw.rectangle((0, 0, size[0], 90), fill=60)
+    draw.text((30, 25), "GOVERNMENT IDENTITY CARD", fill=255, font=ImageFont.load_default(40))
+    draw.rectangle((40, 130, 260, 400), fill=180, outline=0, width=3)
+    values = [NAMES[number % len(NAMES)], "".join(map(str, rng.integers(0, 10, 12))),
+              f"{rng.integers(1, 28):02d}/{rng.integers(1, 12):02d}/19{rng.integers(50, 99)}",
+              f"{rng.integers(1, 200)} Main Road"]
+    for y, label, value in zip((150, 220, 290, 360), ("Name", "ID No", "DOB", "Address"), values):
+        draw.text((300, y), label + ":", fill=40, font=font)
+        draw.text((460, y), value, fill=0, font=font)
+    draw.rectangle((40, 520, 960, 600), outline=90, width=2)
+    return np.asarray(img)
+
+
+@pytest.fixture(scope="module")
+def pages():
+    rng = np.random.default_rng(0)
+    return [text_page(rng, (850, 1100)) for _ in range(40)]
+
+
+@pytest.fixture(scope="module")
+def cards():
+    return [id_card(number) for number in range(6)]
+
+
+def build_index(path, docs):
+    index = FingerprintIndex(path)
+    for number, doc in enumerate(docs):
+        index.add(image_fingerprint(encode(doc)), f"hash{number}", f"doc{number}.png", "Clean")
+    return index
+
+
+def test_distinct_pages_are_not_duplicates(pages):
+    hashes = [image_fingerprint(encode(page))[0] for page in pages]
+    closest = min(hamming(a, b) for a, b in itertools.combinations(hashes, 2))
+    assert closest > MAX_DISTANCE
+
+
+@pytest.mark.parametrize("quality", [60, 40])
+def test_reencoded_copies_are_found(pages, quality, tmp_path):
+    index = build_index(tmp_path / "fingerprints.sqlite3", pages)
+    for number, page in enumerate(pages):
+        matches = index.lookup(image_fingerprint(encode(page, "JPEG", quality=quality)))
+        assert [m["doc_hash"] for m in matches] == [f"hash{number}"]
+
+
+def test_cards_from_one_template_are_told_apart(cards, tmp_path):
+    # Their layout hashes collide; only the detail check separates them.
+    hashes = [image_fingerprint(encode(card))[0] for card in cards]
+    assert max(hamming(a, b) for a, b in itertools.combinations(hashes, 2)) <= MAX_DISTANCE
+    index = build_index(tmp_path / "fingerprints.sqlite3", cards)
+    for number, card in enumerate(cards):
+        for data in (encode(card), encode(card, "JPEG", quality=50)):
+            assert [m["doc_hash"] for m in index.lookup(image_fingerprint(data))] == [f"hash{number}"]
+    assert index.lookup(image_fingerprint(encode(id_card(len(cards))))) == []
+
+
+def test_index_reloads_from_disk(cards, tmp_path):
+    path = tmp_path / "fingerprints.sqlite3"
+    build_index(path, cards[:2])
+    index = FingerprintIndex(path)
+    assert len(index) == 2
+    assert [m["doc_hash"] for m in index.lookup(image_fingerprint(encode(cards[1], "JPEG", quality=70)))] == ["hash1"]
@@ -0,0 +1,52 @@
+from history import ScanHistory, confidence
+
+
+def filled(tmp_path, count=12):
+    history = ScanHistory(str(tmp_path / "history.sqlite3"))
+    for i in range(count):
+        status = "Suspected Tampering" if i % 3 == 0 else "Clean"
+        history.record(f"hash{i}", f"{'deed' if i % 2 else 'lease'}-{i}.png", "image", status,
+                       score=0.1, findings=[f"finding {i}"], scanned_at=1000.0 + i // 2)
+    return history
+
+
+def test_pages_follow_the_cursor_newest_first(tmp_path):
+    history = filled(tmp_path)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = history.page(after=cursor, limit=5)
+        seen.extend(rows)
+        if cursor is None:
+            break
+    # Rows sharing a timestamp are still paged without gaps or repeats.
+    assert [row["name"] for row in seen] == [f"{'deed' if i % 2 else 'lease'}-{i}.png"
+                                            for i in reversed(range(12))]
+    assert seen[0]["findings"] == ["finding 11"]
+
+
+def test_pages_filter_by_status_and_name_prefix(tmp_path):
+    history = filled(tmp_path)
+    rows, cursor = history.page(status="Suspected Tampering")
+    assert cursor is None and [row["doc_hash"] for row in rows] == ["hash9", "hash6", "hash3", "hash0"]
+    rows, _ = history.page(name_prefix="deed")
+    assert len(rows) == 6 and all(row["name"].startswith("deed") for row in rows)
+    rows, _ = history.page(status="Clean", name_prefix="lease")
+    assert [row["doc_hash"] for row in rows] == ["hash10", "hash8", "hash4", "hash2"]
+
+
+def test_counters_and_generation_follow_writes(tmp_path):
+    history = filled(tmp_path)
+    assert history.counters() == {"total_scans": 12, "threats_detected": 4, "documents_verified": 8}
+    before = history.generation
+    history.record("x", "x.pdf", "pdf", "Failed")
+    assert history.generation == before + 1
+    assert history.counters()["total_scans"] == 13
+    reopened = ScanHistory(str(tmp_path / "history.sqlite3"))
+    assert reopened.counters()["total_scans"] == 13
+    assert [row["name"] for row in reopened.by_hash("hash3")] == ["deed-3.png"]
+
+
+def test_confidence_is_in_the_status():
+    assert confidence("Clean", 0.1) == 90.0
+    assert confidence("Suspected Tampering", 0.8) == 80.0
+    assert confidence("Failed", None) is None
@@ -0,0 +1,63 @@
+import gettext
+import glob
+import os
+
+import pytest
+
+import i18n
+
+PO = '''# Test catalog
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "Right to vote"
+msgstr "मतदान का अधिकार"
+
+msgid "Upload a document"
+msgstr ""
+"दस्तावेज़ "
+"अपलोड करें"
+
+#, fuzzy
+msgid "Leaderboard"
+msgstr "लीडरबोर्ड"
+
+msgid "Not yet translated"
+msgstr ""
+
+msgid "Say \\"hello\\""
+msgstr "कहो \\"नमस्ते\\""
+'''
+
+
+@pytest.fixture
+def locale_dir(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "xx" / "LC_MESSAGES")
+    (tmp_path / "xx" / "LC_MESSAGES" / "swarajya.po").write_text(PO, encoding="utf-8")
+    monkeypatch.setattr(i18n, "LOCALE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_po_compiles_to_a_pack_gettext_reads(locale_dir):
+    assert i18n.compile_catalogs() == ["xx"]
+    assert i18n.compile_catalogs() == []
+    pack = i18n.load_pack("xx")
+    assert pack.gettext("Right to vote") == "मतदान का अधिकार"
+    assert pack.gettext("Upload a document") == "दस्तावेज़ अपलोड करें"
+    assert pack.gettext('Say "hello"') == 'कहो "नमस्ते"'
+    # Fuzzy and empty entries fall back to English.
+    assert pack.gettext("Leaderboard") == "Leaderboard"
+    assert pack.gettext("Not yet translated") == "Not yet translated"
+    assert pack.info()["content-type"] == "text/plain; charset=UTF-8"
+    assert i18n.available_languages() == {"English": "en", "xx": "xx"}
+    assert i18n.load_pack("en").gettext("Right to vote") == "Right to vote"
+
+
+@pytest.mark.parametrize("po", sorted(glob.glob(i18n._catalog_path("*", "po"))))
+def test_shipped_packs_match_their_catalogs(po):
+    with open(po[:-2] + "mo", "rb") as fh:
+        pack = gettext.GNUTranslations(fh)
+    for msgid, msgstr in i18n.parse_po(po).items():
+        if msgid:
+            assert pack.gettext(msgid) == msgstr
@@ -0,0 +1,22 @@
+from leaderboard import Leaderboard
+
+USERS = [{"Username": name, "Points": points} for name, points in
+         [("Raj_Asha", 40), ("asha", 30), ("Bharat", 20), ("meera_a", 10)]]
+
+
+def names(rows):
+    return [row["Username"] for row in rows[0]]
+
+
+def test_short_queries_match_anywhere_in_the_name():
+    board = Leaderboard(USERS)
+    assert names(board.search("_a")) == ["Raj_Asha", "meera_a"]
+    assert names(board.search("A", order="name")) == ["asha", "Bharat", "meera_a", "Raj_Asha"]
+    assert board.search("sh")[1] == 2
+
+
+def test_long_queries_use_trigrams():
+    board = Leaderboard(USERS)
+    assert names(board.search("ASHA")) == ["Raj_Asha", "asha"]
+    board.remove("asha")
+    assert names(board.search("asha")) == ["Raj_Asha"]
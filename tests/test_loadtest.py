@@ -0,0 +1,43 @@
+import pytest
+
+from loadtest import parse_args, regressions, synthetic_upload
+
+
+def level(sessions, p95, failures=0):
+    return {"sessions": sessions, "failures": failures, "latency_ms": {"p50": 100, "p95": p95},
+            "throughput": {"reruns_per_s": 5.0}, "memory": {"rss_per_session_mb": 40.0}}
+
+
+def test_defaults():
+    args = parse_args([])
+    assert args.ramp == [1, 2, 4, 8]
+    assert (args.iterations, args.think, args.seed) == (2, 0.0, 0)
+    assert args.port is args.data_dir is args.out is args.baseline is None
+
+
+def test_options():
+    args = parse_args(["--ramp", "1", "3", "--iterations", "1", "--think", "0.5", "--port", "9000",
+                       "--data-dir", "d", "--out", "report.json", "--baseline", "old.json"])
+    assert args.ramp == [1, 3]
+    assert (args.iterations, args.think, args.port) == (1, 0.5, 9000)
+    assert (args.data_dir, args.out, args.baseline) == ("d", "report.json", "old.json")
+
+
+@pytest.mark.parametrize("argv", [["--ramp", "0"], ["--iterations", "0"], ["--ramp"], ["--ramp", "two"]])
+def test_bad_options_are_refused(argv):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_regressions_are_matched_by_level():
+    baseline = {"levels": [level(1, 200), level(4, 400)]}
+    report = {"levels": [level(1, 210), level(2, 900), level(4, 600, failures=1)]}
+    problems = regressions(report, baseline)
+    assert len(problems) == 2
+    assert all(problem.startswith("4 session(s): ") for problem in problems)
+    assert "latency_ms.p95" in problems[0] and "failures" in problems[1]
+
+
+def test_uploads_differ_by_seed():
+    assert synthetic_upload(1, (620, 877)) == synthetic_upload(1, (620, 877))
+    assert synthetic_upload(1, (620, 877)) != synthetic_upload(2, (620, 877))
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+import pdf_ingest
+from benchmark import encode, text_page
+from pdf_ingest import (incremental_updates, page_count, pdf_metadata, render_page, scan_pdf_page,
+                        summarize_scan)
+
+
+def append_update(data, body=b"<< /Producer (Office) >>", prev=None):
+    """``data`` plus one incremental update whose trailer links back with /Prev."""
+    if prev is None:
+        prev = int(data.rsplit(b"startxref", 1)[1].split()[0])
+    obj_at = len(data) + 1
+    data += b"\n99 0 obj\n" + body + b"\nendobj\n"
+    xref_at = len(data)
+    data += (f"xref\n99 1\n{obj_at:010d} 00000 n \ntrailer\n<< /Size 100 /Root 1 0 R /Prev {prev} >>\n"
+             f"startxref\n{xref_at}\n%%EOF\n").encode()
+    return data
+
+
+def linearized():
+    """A linearized layout: first-page xref up front whose /Prev points forward."""
+    head = b"%PDF-1.7\n1 0 obj\n<< /Linearized 1 /L 999 >>\nendobj\n"
+    first_xref = len(head)
+    first = (b"xref\n1 1\n0000000009 00000 n \ntrailer\n<< /Size 3 /Root 2 0 R /Prev MAIN >>\n"
+             b"startxref\n0\n%%EOF\n")
+    body = b"2 0 obj\n<< /Type /Catalog >>\nendobj\n"
+    main_xref = len(head) + len(first) + len(body)
+    first = first.replace(b"MAIN", str(main_xref).encode().ljust(4))
+    main = f"xref\n0 1\n0000000000 65535 f \ntrailer\n<< /Size 3 >>\nstartxref\n{first_xref}\n%%EOF\n"
+    return head + first + body + main.encode()
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    rng = np.random.default_rng(0)
+    return encode([text_page(rng, (850, 1100)) for _ in range(2)], "pdf")
+
+
+def test_single_save_has_no_updates(pdf):
+    assert incremental_updates(pdf) == 0
+    assert pdf_metadata(pdf) == (0.0, [])
+
+
+def test_appended_update_is_reported(pdf):
+    edited = append_update(pdf)
+    assert incremental_updates(edited) == 1
+    assert incremental_updates(append_update(edited)) == 2
+    score, findings = pdf_metadata(edited)
+    assert score == 0.4 and "1 incremental update" in findings[0]
+
+
+def test_linearized_file_is_not_an_update():
+    data = linearized()
+    assert data.count(b"%%EOF") == 2
+    assert incremental_updates(data) == 0
+    assert incremental_updates(append_update(data)) == 1
+
+
+def test_signing_is_not_an_update(pdf):
+    placeholder = b"<< /Type /Sig /ByteRange [0 0000000000 0000000000 0000000000] >>"
+    signed = append_update(pdf, placeholder)
+    byte_range = f"[0 {len(signed) - 64:010d} {len(signed) - 32:010d} 0000000032]".encode()
+    signed = signed.replace(placeholder[placeholder.index(b"["):-3], byte_range)
+    assert incremental_updates(signed) == 0
+    assert incremental_updates(append_update(signed)) == 1
+
+
+def test_pages_render_one_at_a_time(pdf, monkeypatch):
+    assert page_count(pdf) == 2
+    assert render_page(pdf, 1).mode == "L"
+    assert scan_pdf_page(pdf, 0).status == "Clean"
+    monkeypatch.setattr(pdf_ingest, "pdfium", None)
+    assert page_count(pdf) == 2
+    assert render_page(pdf, 1).size == (850, 1100)
+    with pytest.raises(ValueError):
+        render_page(pdf, 2)
+
+
+def test_pages_are_read_from_a_file(pdf, tmp_path, monkeypatch):
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(pdf)
+    assert page_count(str(path)) == 2
+    assert scan_pdf_page(str(path), 1).status == "Clean"
+    monkeypatch.setattr(pdf_ingest, "pdfium", None)
+    assert page_count(str(path)) == 2
+    assert render_page(str(path), 0).size == (850, 1100)
+
+
+def test_unreadable_pdf_is_not_clean():
+    with pytest.raises(Exception):
+        page_count(b"%PDF-1.7\nnot really a PDF\n")
+    summary = {"total": 2, "metadata": (0.0, []), "results": [(1, None, "Data format error"), (2, None, "x")]}
+    assert summarize_scan("pdf", summary) == ("Failed", None, ["Data format error"])
+    empty = {"total": 0, "metadata": (0.4, ["PDF was modified after creation"]), "results": []}
+    status, score, findings = summarize_scan("pdf", empty)
+    assert status == "Failed" and score is None and "No pages" in findings[-1]
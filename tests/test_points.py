@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import points
+from points import PointsLedger
+
+SEED = [{"Username": "asha", "Points": 50}, {"Username": "ravi", "Points": 30}]
+
+
+def test_first_award_registers_a_user(tmp_path):
+    path = tmp_path / "points.sqlite3"
+    ledger = PointsLedger(SEED, path=path)
+    assert ledger.user_count() == 2
+    ledger.award("asha", "chat_query")
+    assert ledger.user_count() == 2
+    ledger.award("guest", "document_scan")
+    ledger.award("guest", "chat_query")
+    assert ledger.user_count() == 3
+    assert PointsLedger(SEED, path=path).user_count() == 3
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2026, 3, 10, 12)
+
+    def time(self):
+        return self.now.timestamp()
+
+    def advance(self, days):
+        self.now += timedelta(days=days)
+
+
+def standings(ledger, window):
+    return {row["Username"]: row["Points"] for row in ledger.board(window).top(10)}
+
+
+def test_windows_roll_day_by_day(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(points.time, "time", clock.time)
+    path = tmp_path / "points.sqlite3"
+    ledger = PointsLedger(SEED, path=path)
+    ledger.award("asha", "document_scan")
+    ledger.award("ravi", "chat_query", at=(clock.now - timedelta(days=3)).timestamp())
+    ledger.award("meera", "tampering_reported", at=(clock.now - timedelta(days=20)).timestamp())
+    assert standings(ledger, "day") == {"asha": 5}
+    assert standings(ledger, "week") == {"asha": 5, "ravi": 1}
+    assert standings(ledger, "month") == {"asha": 5, "ravi": 1, "meera": 20}
+    assert standings(ledger, "all") == {"asha": 55, "ravi": 31, "meera": 20}
+
+    clock.advance(1)
+    assert standings(ledger, "day") == {}
+    clock.advance(3)
+    assert standings(ledger, "week") == {"asha": 5}
+    # A restart rebuilds the same boards from the daily counters.
+    reopened = PointsLedger(SEED, path=path)
+    for window in ("day", "week", "month", "all"):
+        assert standings(reopened, window) == standings(ledger, window)
+    clock.advance(6)
+    assert standings(ledger, "week") == {}
+    # Meera's award is now 30 days old, just out of the month.
+    assert standings(ledger, "month") == {"asha": 5, "ravi": 1}
+    clock.advance(20)
+    assert standings(ledger, "month") == {}
+    assert standings(ledger, "all") == {"asha": 55, "ravi": 31, "meera": 20}
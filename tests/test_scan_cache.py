@@ -0,0 +1,59 @@
+import threading
+import time
+
+import scan_cache
+from scan_cache import ScanCache, cache_key
+
+
+def test_key_covers_bytes_kind_and_scanner_version(monkeypatch):
+    key = cache_key(b"page", "image")
+    assert key == cache_key(memoryview(b"page"), "image")
+    assert key != cache_key(b"page", "pdf")
+    assert key != cache_key(b"page!", "image")
+    monkeypatch.setattr(scan_cache, "SCANNER_VERSION", "0.0.0")
+    assert key != cache_key(b"page", "image")
+
+
+def test_results_survive_a_restart(tmp_path):
+    path = str(tmp_path / "scan_cache.sqlite3")
+    cache = ScanCache(path)
+    assert cache.get("image:1:a") is None
+    cache.put("image:1:a", {"status": "Clean", "score": 0.1})
+    assert cache.get("image:1:a") == {"status": "Clean", "score": 0.1}
+    assert ScanCache(path).get("image:1:a") == {"status": "Clean", "score": 0.1}
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    path = str(tmp_path / "scan_cache.sqlite3")
+    cache = ScanCache(path, memory_items=1, max_bytes=2500)
+    for name in "abc":
+        cache.put(name, b"x" * 1000)
+        time.sleep(0.01)
+    # "a" went first; reading "b" makes "c" the oldest.
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    time.sleep(0.01)
+    cache.put("d", b"x" * 1000)
+    fresh = ScanCache(path)
+    assert fresh.get("c") is None
+    assert fresh.get("b") is not None and fresh.get("d") is not None
+
+
+def test_threads_share_the_pool(tmp_path):
+    path = str(tmp_path / "scan_cache.sqlite3")
+    cache = ScanCache(path, memory_items=1)
+    misses = []
+
+    def work(n):
+        for i in range(20):
+            cache.put(f"{n}:{i}", {"score": i})
+            if cache.get(f"{n}:{i // 2}") != {"score": i // 2}:
+                misses.append((n, i))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert misses == []
+    assert ScanCache(path).get("3:19") == {"score": 19}
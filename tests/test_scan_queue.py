@@ -0,0 +1,30 @@
+import os
+import time
+
+from scan_queue import ScanQueue, _mp_context
+
+
+def wait(queue, job_id):
+    for _ in range(600):
+        job = queue.status(job_id)
+        if job["state"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_workers_are_not_forked():
+    assert _mp_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_killed_worker_does_not_break_the_queue():
+    queue = ScanQueue(workers=1)
+    try:
+        assert wait(queue, queue.submit(b"abc", func=len))["result"] == 3
+        # The worker exits mid-job, as when it is killed or runs out of memory.
+        job = wait(queue, queue.submit(1, func=os._exit))
+        assert job["state"] == "failed"
+        assert wait(queue, queue.submit(b"abcd", func=len))["result"] == 4
+        assert queue.pending() == 0
+    finally:
+        queue.shutdown()
@@ -0,0 +1,110 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmark import encode, tamper, text_page
+from pdf_ingest import scan_pdf, summarize_scan
+from scanner import phase_cells, scan_bytes, working_array
+
+
+def words_page(size=(1700, 2200), seed=0, font_size=28):
+    """Crisp rendered text on white paper, as exported from a word processor."""
+    rng = np.random.default_rng(seed)
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(font_size)
+    y = int(size[1] * 0.05)
+    while y < size[1] * 0.93:
+        x = int(size[0] * 0.06)
+        while x < size[0] * 0.88:
+            word = "".join(chr(c) for c in rng.integers(97, 123, int(rng.integers(2, 9))))
+            draw.text((x, y), word, fill=0, font=font)
+            x += int(draw.textlength(word, font=font)) + font_size // 2
+        y += int(font_size * 1.6)
+    return np.asarray(img)
+
+
+def ruled_table(size=(1700, 2200)):
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(24)
+    for row in range(40):
+        for col in range(5):
+            box = (100 + col * 300, 150 + row * 48, 100 + (col + 1) * 300, 150 + (row + 1) * 48)
+            draw.rectangle(box, outline=0, width=2)
+            draw.text((box[0] + 10, box[1] + 10), f"{(row * 7 + col * 13) % 997:04d}", fill=0, font=font)
+    return np.asarray(img)
+
+
+def save(page, fmt, quality=90):
+    buf = io.BytesIO()
+    Image.fromarray(page).save(buf, fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return buf.getvalue()
+
+
+def clone(page, shift):
+    out = page.copy()
+    h, w = page.shape
+    out[h // 2:h // 2 + h // 8, w // 4:w // 2] = page[h // 2 - shift:h // 2 - shift + h // 8, w // 4:w // 2]
+    return out
+
+
+CLEAN = {
+    "synthetic png": lambda: save(text_page(np.random.default_rng(1)), "PNG"),
+    "synthetic jpeg": lambda: save(text_page(np.random.default_rng(2)), "JPEG"),
+    "rendered text png": lambda: save(words_page(seed=3), "PNG"),
+    "rendered text jpeg q75": lambda: save(words_page(seed=4), "JPEG", 75),
+    "ruled table png": lambda: save(ruled_table(), "PNG"),
+    "12 MP jpeg q92": lambda: save(words_page((4000, 3000), seed=5, font_size=48), "JPEG", 92),
+}
+
+
+@pytest.mark.parametrize("name", CLEAN)
+def test_clean_pages_are_clean(name):
+    result = scan_bytes(CLEAN[name]())
+    assert result.status == "Clean", (name, result.ela_score, result.copy_move_score)
+
+
+def test_clean_pdf_pages_are_clean():
+    rng = np.random.default_rng(6)
+    summary = scan_pdf(encode([text_page(rng) for _ in range(2)], "pdf"))
+    assert summarize_scan("pdf", summary)[0] == "Clean"
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+@pytest.mark.parametrize("shift", [600, 601, 602])
+def test_clones_are_flagged(fmt, shift):
+    # 2200 rows are analysed three times smaller: every residue of the
+    # shift must be found, not only multiples of three.
+    result = scan_bytes(save(clone(text_page(np.random.default_rng(7)), shift), fmt))
+    assert result.status == "Suspected Tampering"
+    assert result.copy_move_score > 0
+
+
+@pytest.mark.parametrize("shift", [601, 603])
+def test_large_page_clones_are_flagged(shift):
+    # 4000 columns are analysed four times smaller, and only every
+    # fourth window of the other sampling phases is hashed.
+    result = scan_bytes(save(clone(words_page((4000, 3000), seed=5, font_size=48), shift), "JPEG", 92))
+    assert result.status == "Suspected Tampering"
+
+
+@pytest.mark.parametrize("seed", [8, 9])
+def test_jpeg_splices_are_flagged(seed):
+    rng = np.random.default_rng(seed)
+    page = tamper(text_page(rng), "splice", rng)
+    result = scan_bytes(save(page, "JPEG"))
+    assert result.status == "Suspected Tampering"
+    assert result.ela_score >= 0.5
+
+
+def test_phase_cells_are_shifted_sub_block_means():
+    page = text_page(np.random.default_rng(10), (1000, 1300))
+    phases = dict(phase_cells(page, 3))
+    assert sorted(phases) == [(dy, dx) for dy in range(3) for dx in range(3)][1:]
+    work = working_array(page[2:, 1:], 1300 // 3).astype(np.float32)
+    cells = work[:work.shape[0] // 4 * 4, :work.shape[1] // 4 * 4]
+    cells = cells.reshape(work.shape[0] // 4, 4, -1, 4).mean(axis=(1, 3))
+    assert np.abs(phases[(2, 1)][:cells.shape[0], :cells.shape[1]] - cells).max() < 1.0
@@ -0,0 +1,76 @@
+import gc
+import os
+import threading
+
+import numpy as np
+
+from session_memory import MemoryBudget
+
+KB = 1024
+
+
+def block(n_kb, fill=0):
+    return np.full(n_kb * KB, fill, dtype=np.uint8)
+
+
+def test_least_recently_used_entry_spills_and_reads_back(tmp_path):
+    memory = MemoryBudget(global_cap=100 * KB, session_cap=10 * KB, spill_dir=tmp_path).session()
+    memory.put("a", block(4, 1))
+    memory.put("b", block(4, 2))
+    memory.get("a")
+    memory.put("c", block(4, 3))
+    assert memory.usage()["spilled"] == 4 * KB
+    assert memory.memory <= 10 * KB
+    assert (memory.get("b") == 2).all()
+    assert memory.usage()["spilled"] == 4 * KB
+    assert memory.memory <= 10 * KB
+
+
+def test_largest_session_spills_first(tmp_path):
+    budget = MemoryBudget(global_cap=12 * KB, session_cap=100 * KB, spill_dir=tmp_path)
+    small, large = budget.session("small"), budget.session("large")
+    small.put("a", block(3))
+    large.put("a", block(4))
+    large.put("b", block(4))
+    large.put("c", block(4))
+    assert small.spilled == 0
+    assert large.spilled == 4 * KB
+    assert budget.usage()["memory"] <= 12 * KB
+
+
+def test_pins_are_refused_over_the_caps(tmp_path):
+    budget = MemoryBudget(global_cap=12 * KB, session_cap=8 * KB, spill_dir=tmp_path)
+    first, second = budget.session(), budget.session()
+    assert first.pin("upload:1", 6 * KB)
+    assert first.pin("upload:1", 6 * KB)
+    assert not first.pin("upload:2", 4 * KB)
+    assert second.pin("upload:3", 4 * KB)
+    assert not second.pin("upload:4", 4 * KB)
+    assert budget.pinned() == 10 * KB
+    first.pop("upload:1")
+    assert second.pin("upload:4", 4 * KB)
+    # Pinned entries stay put however tight the cap gets.
+    second.put("page:1", block(2))
+    second.put("page:2", block(2))
+    assert "page:1" in second and second.spilled == 2 * KB
+    assert second.usage()["pinned"] == 8 * KB
+
+
+def test_unpicklable_entry_is_dropped(tmp_path):
+    memory = MemoryBudget(global_cap=100 * KB, session_cap=8 * KB, spill_dir=tmp_path).session()
+    memory.put("lock", threading.Lock(), size=6 * KB)
+    memory.put("pages", block(4))
+    assert "lock" not in memory
+    assert memory.get("lock") is None
+    assert memory.memory == 4 * KB and memory.spilled == 0
+
+
+def test_spill_directory_goes_with_the_session(tmp_path):
+    memory = MemoryBudget(spill_dir=tmp_path).session()
+    path = memory.scratch_path(".pdf")
+    with open(path, "wb") as fh:
+        fh.write(b"%PDF-1.7\n")
+    directory = os.path.dirname(path)
+    del memory
+    gc.collect()
+    assert not os.path.exists(directory)
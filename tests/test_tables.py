@@ -0,0 +1,28 @@
+import pandas as pd
+
+from tables import html_escape, link, table_html, text
+
+
+def test_cells_are_escaped():
+    column = pd.Series(["<b>\"x\" & 'y'</b>", None, 7])
+    assert list(html_escape(column)) == ["&lt;b&gt;&quot;x&quot; &amp; &#x27;y&#x27;&lt;/b&gt;", "", "7"]
+
+
+def test_only_safe_urls_become_links():
+    frame = pd.DataFrame({"url": ["https://example.org/?a=1&b=2", "javascript:alert(1)", None, "/results"],
+                          "query": ["<vote>", "evil", "none", "local"]})
+    cells = list(link("url", "query")(frame))
+    assert cells[0] == ('<a href="https://example.org/?a=1&amp;b=2" target="_blank" '
+                        'rel="noopener noreferrer">&lt;vote&gt;</a>')
+    assert cells[1] == "evil"
+    assert cells[2].startswith('<a href="#"') and cells[3].startswith('<a href="/results"')
+    assert list(link("url", label="Open")(frame))[1] == "Open"
+
+
+def test_table_is_built_column_by_column():
+    frame = pd.DataFrame({"name": ["asha", "<ravi>"], "points": [50, 30]})
+    html = table_html(frame, {"User": text("name"), "Points": text("points")})
+    assert "<th>User</th><th>Points</th>" in html
+    assert "<tr><td>asha</td><td>50</td></tr><tr><td>&lt;ravi&gt;</td><td>30</td></tr>" in html
+    empty = table_html(frame.iloc[:0], {"User": text("name")})
+    assert "<tbody></tbody>" in empty and "<th>User</th>" in empty
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from history import ScanHistory
+
+HINDI = "यह विक्रय पत्र है। भूमि का स्वामित्व राम के नाम पर है।"
+ENGLISH = "This lease agreement transfers the résumé of the property."
+
+
+def indexed(history):
+    history.record("d1", "vikray.png", "image", "Clean", 0.1, scanned_at=1000.0)
+    history.index_text("d1", "vikray.png", HINDI)
+    history.record("d2", "lease.pdf", "pdf", "Suspected Tampering", 0.8, scanned_at=1001.0)
+    history.index_text("d2", "lease.pdf", ENGLISH)
+    return history
+
+
+@pytest.fixture
+def history(tmp_path):
+    return indexed(ScanHistory(str(tmp_path / "history.sqlite3")))
+
+
+def hits(history, query):
+    return [row["doc_hash"] for row in history.search_text(query)]
+
+
+def test_english_words_prefixes_and_diacritics(history):
+    assert hits(history, "lease") == ["d2"]
+    assert hits(history, "agree") == ["d2"]
+    assert hits(history, "resume") == ["d2"]
+    assert hits(history, "lease property") == ["d2"]
+    assert hits(history, "lease bhoomi") == []
+    assert hits(history, "") == [] and hits(history, '"') == []
+    row = history.search_text("property")[0]
+    assert row["status"] == "Suspected Tampering" and "**property**" in row["snippet"]
+
+
+def test_hindi_words_are_matched_whole(history):
+    assert hits(history, "स्वामित्व") == ["d1"]
+    assert hits(history, "भूमि") == ["d1"]
+    assert hits(history, "विक्रय पत्र") == ["d1"]
+    # The last word may be a prefix while it is typed.
+    assert hits(history, "स्वामि") == ["d1"]
+    # A word's first syllable is not a word of its own.
+    assert hits(history, "स्व पत्र") == []
+    assert hits(history, "भू पत्र") == []
+    assert hits(history, "नाम पर्व") == []
+    assert "**भूमि**" in history.search_text("भूमि")[0]["snippet"]
+
+
+def test_index_is_rebuilt_with_the_indic_tokenizer(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    indexed(ScanHistory(path))
+    # Downgrade to the tokenizer older databases were created with.
+    db = sqlite3.connect(path)
+    db.executescript(
+        "DROP TABLE scan_text_fts;"
+        "CREATE VIRTUAL TABLE scan_text_fts USING fts5 (name, body, content='scan_texts',"
+        " content_rowid='id', tokenize='unicode61 remove_diacritics 2');"
+        "INSERT INTO scan_text_fts (scan_text_fts) VALUES ('rebuild');")
+    assert db.execute("SELECT COUNT(*) FROM scan_text_fts WHERE scan_text_fts MATCH '\"स्व\"'").fetchone() == (1,)
+    db.close()
+    history = ScanHistory(path)
+    assert hits(history, "स्व पत्र") == []
+    assert hits(history, "स्वामित्व") == ["d1"]
+    assert hits(history, "lease") == ["d2"]
@@ -0,0 +1,24 @@
+import os
+import threading
+
+import timing
+
+
+def test_concurrent_exports_leave_one_whole_file(tmp_path):
+    timing.record("test stage", 0.02)
+    path = str(tmp_path / "swarajya.prom")
+    threads = [threading.Thread(target=timing.export, args=(path, True)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert os.listdir(tmp_path) == ["swarajya.prom"]
+    with open(path) as fh:
+        assert fh.read() == timing.prometheus()
+
+
+def test_exports_are_rate_limited(tmp_path):
+    path = str(tmp_path / "swarajya.prom")
+    assert timing.export(path, force=True)
+    assert not timing.export(path)
+    assert timing.export(path, force=True)
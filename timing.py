@@ -0,0 +1,260 @@
+"""Start-up and rerun timings for the Streamlit app.
+
+``timed`` wraps a stage of the script (a page import, a page render,
+building a DataFrame or a chart, decoding an upload) and keeps its most
+recent durations per process, plus a latency histogram per stage and per
+page rerun. Set ``SWARAJYA_TIMING=1`` to show the report in the sidebar;
+the hidden admin page (views/admin.py) shows everything, captures
+cProfile runs on request and exports the histograms in Prometheus text
+format, which ``SWARAJYA_METRICS_FILE`` also writes to a file.
+
+Run ``python timing.py`` for a report without a browser: every page is
+rendered in a fresh interpreter through Streamlit's ``AppTest``, once
+cold (first run, nothing imported) and then ``--reruns`` times warm.
+"""
+
+import argparse
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+TIMING_ENV = "SWARAJYA_TIMING"
+METRICS_FILE = os.environ.get("SWARAJYA_METRICS_FILE", "")
+METRICS_INTERVAL = 15
+HISTORY = 50
+# Histogram bucket upper bounds in seconds (Prometheus "le").
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_KEEP = 5
+PROFILE_LINES = 40
+
+# Sessions rerun on their own threads, so every update holds _lock.
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=HISTORY))
+_histograms = {}
+_profiles = deque(maxlen=PROFILE_KEEP)
+_profile_requests = 0
+_profiling = threading.Lock()
+_last_export = 0.0
+
+
+def enabled():
+    return os.environ.get(TIMING_ENV, "") not in ("", "0")
+
+
+def _observe(family, name, seconds):
+    hist = _histograms.get((family, name))
+    if hist is None:
+        hist = _histograms[(family, name)] = [[0] * (len(BUCKETS) + 1), 0.0]
+    hist[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+    hist[1] += seconds
+
+
+def record(label, seconds):
+    with _lock:
+        _samples[label].append(seconds)
+        _observe("stage", label, seconds)
+
+
+def record_rerun(page, seconds):
+    """Record a whole script run that showed ``page``."""
+    with _lock:
+        _samples[f"rerun {page}"].append(seconds)
+        _observe("page", page, seconds)
+
+
+@contextmanager
+def timed(label):
+    """Record how long the ``with`` block takes under ``label``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, time.perf_counter() - start)
+
+
+def report():
+    """One row per label: first, last and median duration in milliseconds."""
+    rows = []
+    with _lock:
+        items = [(label, list(samples)) for label, samples in sorted(_samples.items())]
+    for label, samples in items:
+        ordered = sorted(samples)
+        rows.append({"phase": label, "runs": len(samples),
+                     "first_ms": round(samples[0] * 1000, 1),
+                     "last_ms": round(samples[-1] * 1000, 1),
+                     "median_ms": round(ordered[len(ordered) // 2] * 1000, 1)})
+    return rows
+
+
+def histograms(family):
+    """``{name: (bucket_counts, sum)}`` for the "stage" or "page" family."""
+    with _lock:
+        return {name: (list(counts), total) for (fam, name), (counts, total) in _histograms.items()
+                if fam == family}
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _histograms.clear()
+        _profiles.clear()
+
+
+# ───────────────────────────── profiling ─────────────────────────────
+
+def request_profile(runs=1):
+    """Profile the next ``runs`` page renders, whichever session makes them."""
+    global _profile_requests
+    with _lock:
+        _profile_requests += runs
+
+
+def pending_profiles():
+    return _profile_requests
+
+
+def profiles():
+    """Captured profiles, newest last: ``{"label", "at", "stats"}``."""
+    with _lock:
+        return list(_profiles)
+
+
+@contextmanager
+def profiled(label):
+    """Run the block under cProfile when a capture has been requested."""
+    global _profile_requests
+    with _lock:
+        # cProfile allows one active profiler, so concurrent reruns wait
+        # their turn for the remaining requests.
+        take = _profile_requests > 0 and _profiling.acquire(blocking=False)
+        if take:
+            _profile_requests -= 1
+    if not take:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    finally:
+        _profiling.release()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    with _lock:
+        _profiles.append({"label": label, "at": time.time(), "stats": out.getvalue()})
+
+
+# ───────────────────────────── Prometheus ─────────────────────────────
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus():
+    """Histograms in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for family, metric, label, help_text in (
+            ("stage", "swarajya_stage_seconds", "stage", "Time spent in an instrumented stage."),
+            ("page", "swarajya_rerun_seconds", "page", "Script rerun latency per page.")):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for name, (counts, total) in sorted(histograms(family).items()):
+            tag = f'{label}="{_label(name)}"'
+            running = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), counts):
+                running += count
+                lines.append(f'{metric}_bucket{{{tag},le="{bound}"}} {running}')
+            lines.append(f"{metric}_sum{{{tag}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{tag}}} {running}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None, force=False):
+    """Write ``prometheus()`` to ``path`` (default SWARAJYA_METRICS_FILE).
+
+    Writes at most every ``METRICS_INTERVAL`` seconds unless ``force``, and
+    atomically, so a textfile collector never reads half a file.
+    """
+    global _last_export
+    path = path or METRICS_FILE
+    if not path:
+        return False
+    with _lock:
+        now = time.monotonic()
+        if not force and now - _last_export < METRICS_INTERVAL:
+            return False
+        _last_export = now
+    text = prometheus()
+    # A temporary file of its own per writer: sessions export concurrently.
+    fh = tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False)
+    try:
+        with fh:
+            fh.write(text)
+        os.replace(fh.name, path)
+    except BaseException:
+        os.remove(fh.name)
+        raise
+    return True
+
+
+def _measure_page(page, reruns):
+    # Runs in its own interpreter so the first run is a genuine cold start.
+    from streamlit.testing.v1 import AppTest
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    start = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=120).run()
+    at.sidebar.radio[0].set_value(page).run()
+    cold = time.perf_counter() - start
+    warm = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - start)
+    warm.sort()
+    return {"page": page, "cold_ms": round(cold * 1000, 1),
+            "rerun_median_ms": round(warm[len(warm) // 2] * 1000, 1) if warm else None,
+            "error": str(at.exception[0].message) if at.exception else None}
+
+
+def main():
+    from views import PAGES
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+    if args.page:
+        print(json.dumps(_measure_page(args.page, args.reruns)))
+        return
+
+    rows = []
+    for page in PAGES:
+        out = subprocess.run([sys.executable, __file__, "--page", page, "--reruns", str(args.reruns)],
+                             capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'page':<16}{'cold ms':>10}{'rerun ms':>10}")
+    for row in rows:
+        print(f"{row['page']:<16}{row['cold_ms']:>10}{row['rerun_median_ms']:>10}"
+              + (f"  error: {row['error']}" if row["error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Page registry for the sidebar navigation.
+
+Each page lives in its own module exposing ``render()``. A module is only
+imported the first time its page is opened, so libraries such as pandas
+and plotly are loaded by the pages that draw tables and charts rather than
+on every cold start and rerun.
+
+The admin page is not in the sidebar: it opens with ``?admin=<token>``
+when ``SWARAJYA_ADMIN_TOKEN`` is set, and not at all otherwise.
+"""
+
+import hmac
+import importlib
+import os
+
+from timing import timed
+
+ADMIN_TOKEN = os.environ.get("SWARAJYA_ADMIN_TOKEN", "")
+
+# Sidebar label -> module, in navigation order.
+PAGES = {
+    "Homepage": "views.home",
+    "Document Scan": "views.document_scan",
+    "Dashboard": "views.dashboard",
+    "Results": "views.results",
+    "Leaderboard": "views.leaderboard",
+    "Notifications": "views.notifications",
+}
+HIDDEN_PAGES = {
+    "Admin": "views.admin",
+}
+
+
+def admin_requested(token):
+    """Whether the ``?admin=`` query parameter opens the admin page."""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(str(token or "").encode(), ADMIN_TOKEN.encode())
+
+
+def render(page):
+    """Import (once per process) and draw the page labelled ``page``."""
+    name = PAGES.get(page) or HIDDEN_PAGES[page]
+    with timed(f"import {name}"):
+        module = importlib.import_module(name)
+    with timed(f"render {page}"):
+        module.render()
@@ -0,0 +1,102 @@
+"""Admin page: stage timings, rerun latency histograms and cProfile captures."""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import timing
+from alerts import EVERYONE, TOPICS
+from resources import get_alerts, get_chat_server, get_memory_budget
+
+
+def _histogram_frame(family):
+    """Bucket counts per name, one column per name, rows labelled by bucket."""
+    bounds = [f"≤{b:g}s" for b in timing.BUCKETS] + [f">{timing.BUCKETS[-1]:g}s"]
+    return pd.DataFrame({name: counts for name, (counts, _) in timing.histograms(family).items()},
+                        index=bounds)
+
+
+def render():
+    st.header("🛠️ Performance")
+
+    col1, col2 = st.columns([4, 1])
+    col1.caption("Timings of this server process since start-up or the last reset.")
+    if col2.button("Reset"):
+        timing.reset()
+        st.rerun()
+
+    st.subheader("Stages")
+    st.dataframe(timing.report(), hide_index=True, use_container_width=True)
+
+    st.subheader("Rerun latency per page")
+    pages = _histogram_frame("page")
+    if pages.empty:
+        st.info("No reruns recorded yet.")
+    else:
+        st.bar_chart(pages)
+
+    with st.expander("Stage histograms"):
+        stages = _histogram_frame("stage")
+        if not stages.empty:
+            st.dataframe(stages.T, use_container_width=True)
+
+    st.subheader("Profiling")
+    col1, col2 = st.columns([1, 3])
+    runs = col1.number_input("Page renders", min_value=1, max_value=20, value=1)
+    if col2.button("Profile next renders"):
+        timing.request_profile(int(runs))
+    if timing.pending_profiles():
+        st.caption(f"{timing.pending_profiles()} render(s) still to profile, from any session.")
+    for capture in reversed(timing.profiles()):
+        at = datetime.fromtimestamp(capture["at"]).strftime("%H:%M:%S")
+        with st.expander(f"{capture['label']} at {at}"):
+            st.code(capture["stats"], language=None)
+
+    st.subheader("Session memory")
+    budget = get_memory_budget()
+    usage = budget.usage()
+    mb = 1024 * 1024
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sessions", usage["sessions"])
+    col2.metric("In memory", f"{usage['memory'] / mb:.1f} / {usage['global_cap'] / mb:.0f} MB")
+    col3.metric("Spilled to disk", f"{usage['spilled'] / mb:.1f} MB")
+    sessions = budget.sessions()
+    if sessions:
+        st.dataframe(pd.DataFrame({
+            "User": [s["label"] for s in sessions],
+            "In memory (MB)": [round(s["memory"] / mb, 1) for s in sessions],
+            "Pinned (MB)": [round(s["pinned"] / mb, 1) for s in sessions],
+            "Spilled (MB)": [round(s["spilled"] / mb, 1) for s in sessions],
+            "Entries": [s["entries"] for s in sessions],
+        }), hide_index=True, use_container_width=True)
+    st.caption(f"Per-session cap {usage['session_cap'] / mb:.0f} MB (SWARAJYA_SESSION_MEMORY_MB); "
+               "global cap via SWARAJYA_MEMORY_MB.")
+
+    st.subheader("Rights alerts")
+    alerts = get_alerts()
+    stats = alerts.stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Subscribers", stats["subscribers"])
+    col2.metric("Alerts queued", stats["queued_alerts"])
+    col3.metric("Users pending", stats["pending_users"])
+    with st.form("publish_alert", clear_on_submit=True):
+        title = st.text_input("Title")
+        body = st.text_area("Alert")
+        topics = st.multiselect("Topics", TOPICS, help="Leave empty to alert everyone")
+        if st.form_submit_button("Publish") and title.strip():
+            alerts.publish(title.strip(), body.strip(), topics)
+            st.success("Alert queued for delivery.")
+    for title, topics, created_at in alerts.recent_alerts(5):
+        at = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+        st.caption(f"{at} · {title} · {', '.join(t for t in topics if t != EVERYONE) or 'Everyone'}")
+
+    st.subheader("Prometheus export")
+    st.write(f"Scrape `{get_chat_server().metrics_url}` (from this machine only; "
+             "pin the port with `SWARAJYA_METRICS_PORT`)"
+             + (f", or read `{timing.METRICS_FILE}` (rewritten every {timing.METRICS_INTERVAL}s)."
+                if timing.METRICS_FILE else "; set `SWARAJYA_METRICS_FILE` to also write a file."))
+    text = timing.prometheus()
+    st.download_button("Download metrics", text, file_name="swarajya.prom", mime="text/plain")
+    with st.expander("Metrics text"):
+        st.code(text, language=None)
@@ -0,0 +1,103 @@
+"""Dashboard page: the user's chatbot queries and activity over time."""
+
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from activity import RANGES as ACTIVITY_RANGES
+from data import queries_today, query_series, query_totals, recent_queries
+from resources import current_user
+from tables import link, paged_table
+from timing import timed
+
+QUERY_SORTS = {
+    "Newest first": ("created_at", True),
+    "Oldest first": ("created_at", False),
+    "Query A–Z": ("query", False),
+}
+QUERY_COLUMNS = {
+    "Query": link("url", "query"),
+    "Date": lambda frame: pd.to_datetime(frame["created_at"], unit="s").dt.strftime("%Y-%m-%d"),
+}
+
+ACTIVITY_TITLES = {
+    "hour": "Queries Submitted Per Hour",
+    "day": "Queries Submitted Per Day",
+    "month": "Queries Submitted Per Month",
+}
+
+
+def render():
+    st.header("📊 Swarajya Scanner Dashboard")
+
+    user = current_user()
+
+    # --- Layout ---
+
+    # Top: Account Settings button left aligned
+    with st.container():
+        col1, col2 = st.columns([1, 10])
+        with col1:
+            if st.button("⚙️ Account Settings"):
+                st.info("Account Settings page coming soon!")
+        with col2:
+            st.markdown("<h1 style='text-align:center;'>Swarajya Scanner Dashboard</h1>", unsafe_allow_html=True)
+
+    st.markdown("---")
+
+    # Main dashboard: two columns
+    col_left, col_right = st.columns([3, 5])
+
+    with col_left:
+        st.subheader("Your Past Queries")
+
+        # Past queries are paged out of the event log; the chart reads
+        # pre-aggregated rollups, never the raw events.
+        total_queries, last_at = query_totals(user)
+        if total_queries:
+            paged_table(
+                "past_queries",
+                lambda sort, descending, limit, offset: (
+                    recent_queries(user, limit, offset, sort, descending), total_queries),
+                QUERY_COLUMNS, QUERY_SORTS, page_size=10)
+        else:
+            st.info("You haven't asked any questions yet.")
+
+        st.markdown("---")
+
+        # Additional metric or stats widgets
+        most_recent_date = datetime.fromtimestamp(last_at).strftime('%Y-%m-%d') if last_at else "—"
+
+        st.metric(label="Total Queries", value=total_queries)
+        st.metric(label="Most Recent Query Date", value=most_recent_date)
+
+    with col_right:
+        st.subheader("Your Activity Over Time")
+        activity_range = st.radio("Range", list(ACTIVITY_RANGES), index=1, horizontal=True,
+                                  label_visibility="collapsed")
+        with timed("dashboard chart"):
+            df_activity = pd.DataFrame(query_series(user, activity_range), columns=["date", "queries"])
+            fig = px.line(df_activity, x='date', y='queries', markers=True,
+                          title=ACTIVITY_TITLES[ACTIVITY_RANGES[activity_range][0]],
+                          labels={"date": "Date", "queries": "Number of Queries"})
+            fig.update_layout(hovermode="x unified")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("---")
+
+        st.subheader("Recent Activity")
+        today = queries_today(user)
+        if today > 0:
+            st.success(f"You submitted {today} queries today. Keep it up!")
+        else:
+            st.info("No queries submitted today. How about exploring some topics?")
+
+        st.markdown("""
+        ### Welcome to Swarajya Scanner!
+        Explore the Constitution in your pocket, raise issues and track public discourse.
+        - Use the 'Account Settings' to manage your profile.
+        - Check your query history on the left.
+        - View your activity trends on the right.
+        """)
@@ -0,0 +1,533 @@
+"""Document Scan page: single and batch uploads through the shared scan queue."""
+
+import functools
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import ocr
+from fingerprint import image_fingerprint
+from pdf_ingest import page_count, pdf_metadata, scan_pdf, scan_pdf_page, summarize_scan
+from preprocess import preview
+from resources import (current_user, get_fingerprints, get_history, get_ocr_queue, get_points,
+                       get_scan_cache, get_scan_queue, session_memory)
+from scan_cache import cache_key
+from scanner import heatmap_image
+from session_memory import MB
+from timing import timed
+
+
+def record_scan(file_id, name, key, kind, value=None, error=None, fingerprint=None, fresh=True):
+    """Append a finished scan to the history (and the duplicate index), once per uploaded file.
+
+    Points go only to ``fresh`` scans: a result served from the scan
+    cache earns none, so uploading the same document again pays nothing.
+    """
+    recorded = st.session_state.setdefault("recorded_scans", set())
+    if file_id in recorded:
+        return
+    recorded.add(file_id)
+    if value is None:
+        status, score, findings = "Failed", None, [error or "Scan failed"]
+    else:
+        status, score, findings = summarize_scan(kind, value)
+    get_history().record(key.rsplit(":", 1)[1], name, kind, status, score, findings)
+    if status == "Failed":
+        return
+    if fresh:
+        get_points().award(current_user(), "document_scan")
+        if status == "Suspected Tampering":
+            get_points().award(current_user(), "tampering_reported")
+    if fingerprint is not None:
+        get_fingerprints().add(fingerprint, key.rsplit(":", 1)[1], name, status, current_user())
+
+
+def queue_text_extraction(uploaded_file, key, kind):
+    """Index the upload's text for search in the background, once per document."""
+    queued = st.session_state.setdefault("text_jobs", set())
+    if uploaded_file.file_id in queued:
+        return
+    queued.add(uploaded_file.file_id)
+    doc_hash = key.rsplit(":", 1)[1]
+    history = get_history()
+    if not ocr.can_extract(kind) or history.has_text(doc_hash):
+        return
+    name = uploaded_file.name
+    get_ocr_queue().submit(upload_path(uploaded_file), f"{name} text",
+                           func=functools.partial(ocr.document_text, kind),
+                           on_done=lambda text: history.index_text(doc_hash, name, text))
+
+
+def track_uploads(uploaded_files):
+    """Count the uploader's buffers against this session's memory; returns those that fit.
+
+    They belong to Streamlit, so they are pinned: counted, never spilled.
+    An upload that would take this session, or all sessions together,
+    over the memory cap is held back until other uploads are removed.
+    """
+    memory = session_memory()
+    current = {f"upload:{f.file_id}": f for f in uploaded_files}
+    for name in memory.names("upload:"):
+        if name not in current:
+            memory.pop(name)
+            _drop_upload(name.split(":", 1)[1])
+    accepted = []
+    for name, f in current.items():
+        if memory.pin(name, f.size):
+            accepted.append(f)
+        else:
+            st.warning(f"⏸️ {f.name} ({f.size / MB:.1f} MB) is on hold: scanning it now would go over "
+                       "the memory available to uploads. Remove other files to scan it.")
+    return accepted
+
+
+def upload_path(uploaded_file):
+    """Path of a copy of the upload in the session's spill directory, written once.
+
+    Scan and text jobs get this path rather than the bytes, so queued
+    work holds no copy of the upload in this process.
+    """
+    paths = st.session_state.setdefault("upload_paths", {})
+    if uploaded_file.file_id not in paths:
+        path = session_memory().scratch_path(os.path.splitext(uploaded_file.name)[1])
+        with open(path, "wb") as fh:
+            fh.write(uploaded_file.getbuffer())
+        paths[uploaded_file.file_id] = path
+    return paths[uploaded_file.file_id]
+
+
+def _drop_upload(file_id):
+    path = st.session_state.get("upload_paths", {}).pop(file_id, None)
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    session_memory().pop(f"pdf:{file_id}")
+
+
+def upload_key(uploaded_file, kind):
+    """Cache key of an upload, hashed once per session and file."""
+    keys = st.session_state.setdefault("upload_keys", {})
+    if uploaded_file.file_id not in keys:
+        keys[uploaded_file.file_id] = cache_key(uploaded_file.getbuffer(), kind)
+    return keys[uploaded_file.file_id]
+
+
+@st.cache_data(max_entries=64)
+def upload_preview(key, _uploaded_file):
+    """Display copy of an image upload, decoded at reduced scale once per key."""
+    with timed("decode preview"):
+        return preview(_uploaded_file)
+
+
+@st.cache_data(max_entries=256)
+def upload_fingerprint(key, _uploaded_file):
+    """Fingerprint (fingerprint.py) of an image upload, or ``None`` if it cannot be decoded."""
+    try:
+        with timed("fingerprint upload"):
+            return image_fingerprint(_uploaded_file)
+    except Exception:
+        return None
+
+
+def prior_sightings(file_id, fingerprint):
+    """Earlier scans of this document or a near copy, looked up once per upload.
+
+    Kept per file so the upload's own scan, recorded later, never counts.
+    """
+    sightings = st.session_state.setdefault("prior_sightings", {})
+    if file_id not in sightings:
+        sightings[file_id] = get_fingerprints().lookup(fingerprint) if fingerprint is not None else []
+    return sightings[file_id]
+
+
+def sightings_summary(matches):
+    """Short "seen before" text for the batch table."""
+    if not matches:
+        return ""
+    flagged = sum(m["status"] == "Suspected Tampering" for m in matches)
+    return f"{len(matches)}×" + (f", {flagged} flagged" if flagged else "")
+
+
+def show_prior_sightings(matches):
+    """Warn about earlier scans of the same (or a nearly identical) document."""
+    if not matches:
+        return
+    what = "this document" if matches[0]["distance"] == 0 else "a near-identical document"
+    users = len({m["user"] for m in matches})
+    flagged = [m for m in matches if m["status"] == "Suspected Tampering"]
+    if flagged:
+        last = flagged[0]
+        st.error(f"⚠️ Seen before: {what} was scanned {len(matches)} time(s) by {users} user(s) and "
+                 f"previously marked Suspected Tampering (\"{last['name']}\", "
+                 f"{datetime.fromtimestamp(last['seen_at']):%Y-%m-%d %H:%M}).")
+    else:
+        last = matches[0]
+        st.info(f"🔁 Seen before: {what} was scanned {len(matches)} time(s) by {users} user(s), "
+                f"last as \"{last['name']}\" on {datetime.fromtimestamp(last['seen_at']):%Y-%m-%d}.")
+
+
+@st.fragment(run_every=0.5)
+def show_scan_progress(job_id):
+    """Poll a queued scan; rerun the page once it has finished."""
+    job = get_scan_queue().status(job_id)
+    if job["state"] not in ("queued", "running"):
+        st.rerun()
+    label = "Scanning..." if job["state"] == "running" else f"Queued (position {job['position']})..."
+    st.progress(job["progress"], text=label)
+
+
+def show_scan_job(uploaded_file, job_id, size, key):
+    """Render a scan job: live progress while pending, the result once done."""
+    job = get_scan_queue().status(job_id)
+    if job["state"] == "done":
+        get_scan_cache().put(key, job["result"])
+        record_scan(uploaded_file.file_id, uploaded_file.name, key, "image", job["result"],
+                    fingerprint=upload_fingerprint(key, uploaded_file))
+        show_scan_result(job["result"], size)
+    elif job["state"] == "failed":
+        record_scan(uploaded_file.file_id, uploaded_file.name, key, "image", error=job["error"])
+        st.error(f"❌ Scan failed: {job['error']}")
+    elif job["state"] == "unknown":
+        st.warning("Scan result expired. Please upload the document again.")
+    else:
+        show_scan_progress(job_id)
+
+
+def _pdf_scan_done(state):
+    return state["count_job"] is None and not state["jobs"] and state["next"] >= (state["total"] or 0)
+
+
+def _advance_pdf_scan(state):
+    """Collect finished pages and queue more, keeping few pages in flight."""
+    queue = get_scan_queue()
+    if state["count_job"] is not None:
+        job = queue.status(state["count_job"])
+        if job["state"] in ("queued", "running"):
+            return False
+        if job["state"] == "done":
+            state["total"] = job["result"]
+        else:
+            # Unreadable or expired: nothing to scan, and the reason is kept.
+            state["total"] = 0
+            state["error"] = job.get("error", "Result expired")
+        state["count_job"] = None
+
+    still_running = []
+    for page_no, job_id in state["jobs"]:
+        job = queue.status(job_id)
+        if job["state"] in ("queued", "running"):
+            still_running.append((page_no, job_id))
+        else:
+            state["results"].append((page_no, job.get("result"), job.get("error", "Result expired")))
+    state["jobs"] = still_running
+
+    # Each job renders its own page in a worker process, so only
+    # ``2 x workers`` rendered pages exist at any time, however long the
+    # document is, and no open document outlives its job. Jobs get the
+    # upload's path (``upload_path``), not a pickled copy of the PDF each.
+    while state["next"] < state["total"] and len(state["jobs"]) < 2 * queue.workers:
+        index = state["next"]
+        job_id = queue.submit(state["path"], f"{state['name']} p{index + 1}",
+                              func=functools.partial(scan_pdf_page, index=index))
+        state["jobs"].append((index + 1, job_id))
+        state["next"] += 1
+    return _pdf_scan_done(state)
+
+
+def _show_pdf_pages(state):
+    rows = []
+    for page_no, result, error in sorted(state["results"], key=lambda r: r[0]):
+        if result is None:
+            rows.append({"Page": page_no, "Status": "Failed", "Score": None, "Findings": error})
+        else:
+            rows.append({"Page": page_no, "Status": result.status, "Score": result.score,
+                         "Findings": "; ".join(result.findings)})
+    if rows:
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+
+@st.fragment(run_every=0.5)
+def show_pdf_progress(uploaded_file):
+    """Stream page results in while the PDF is still being scanned."""
+    state = session_memory().get(f"pdf:{uploaded_file.file_id}")
+    if state is None or _advance_pdf_scan(state):
+        st.rerun()
+    done = len(state["results"])
+    total = state["total"]
+    if total:
+        st.progress(done / total, text=f"Scanned {done} of {total} pages...")
+    else:
+        st.progress(0.0, text="Counting pages...")
+    _show_pdf_pages(state)
+
+
+def show_pdf_scan(uploaded_file):
+    """Scan a PDF one page at a time through the shared scan queue.
+
+    The page results live in the session's memory store: pinned while the
+    scan runs, then free to spill to disk like any other entry.
+    """
+    memory = session_memory()
+    name = f"pdf:{uploaded_file.file_id}"
+    state = memory.get(name)
+    key = upload_key(uploaded_file, "pdf")
+    queue_text_extraction(uploaded_file, key, "pdf")
+    cached = get_scan_cache().get(key) if state is None else None
+    if cached is not None:
+        state = dict(cached, name=uploaded_file.name, count_job=None, next=cached["total"] or 0,
+                     jobs=[], cached=True, hit=True)
+        memory.put(name, state)
+    elif state is None:
+        path = upload_path(uploaded_file)
+        state = {
+            "name": uploaded_file.name,
+            "path": path,
+            # pdfium is not thread-safe: even counting pages happens in a
+            # worker process, never on this session's thread.
+            "count_job": get_scan_queue().submit(path, f"{uploaded_file.name} pages", func=page_count),
+            "total": None,
+            "next": 0,
+            "metadata": pdf_metadata(uploaded_file.getvalue()),
+            "jobs": [],
+            "results": [],
+        }
+        memory.put(name, state, pinned=True)
+
+    if not _pdf_scan_done(state):
+        show_pdf_progress(uploaded_file)
+        return
+
+    summary = {k: state[k] for k in ("total", "metadata", "results")}
+    status, _, findings = summarize_scan("pdf", summary)
+    error = state.get("error") or (findings[-1] if status == "Failed" else None)
+    if not state.get("cached"):
+        if error is None:
+            get_scan_cache().put(key, summary)
+        state["cached"] = True
+        # Finished: unpin, and count the page results now that they exist.
+        memory.put(name, state)
+    if error is not None:
+        record_scan(uploaded_file.file_id, uploaded_file.name, key, "pdf", error=error)
+        st.error(f"❌ Scan failed: {error}")
+        _show_pdf_pages(state)
+        return
+    record_scan(uploaded_file.file_id, uploaded_file.name, key, "pdf", summary,
+                fresh=not state.get("hit"))
+
+    meta_score, meta_findings = state["metadata"]
+    results = [r for _, r, _ in state["results"] if r is not None]
+    flagged = [page_no for page_no, r, _ in state["results"] if r is not None and r.status != "Clean"]
+    if flagged or meta_score >= 0.5:
+        st.error(f"⚠️ Scan complete. Suspected tampering on {len(flagged)} of {len(results)} page(s).")
+    else:
+        st.success(f"✅ Scan complete. No threats detected across {len(results)} page(s).")
+    for finding in meta_findings:
+        st.write(f"- {finding}")
+    _show_pdf_pages(state)
+
+
+def _finish_batch_entry(entry, value, fresh=False):
+    entry["status"], entry["score"], entry["findings"] = summarize_scan(entry["kind"], value)
+    if fresh and entry["status"] != "Failed":
+        get_scan_cache().put(entry["key"], value)
+    entry["finished"] = time.time()
+    record_scan(entry["file_id"], entry["name"], entry["key"], entry["kind"], value,
+                fingerprint=entry["fingerprint"], fresh=fresh)
+
+
+def _submit_batch_entry(queue, entry):
+    if entry["kind"] == "pdf":
+        entry["job"] = queue.submit(entry["path"], entry["name"], func=scan_pdf)
+    else:
+        entry["job"] = queue.submit(entry["path"], entry["name"])
+    entry["status"] = "Queued"
+
+
+def _advance_batch(batch):
+    """Pick up finished batch jobs and queue waiting files; returns the number still pending.
+
+    At most ``2 x workers`` of a batch's files are on the shared queue at
+    once, so a large batch never gets ahead of other sessions' scans.
+    """
+    queue = get_scan_queue()
+    pending = in_flight = 0
+    waiting = []
+    for entry in batch["files"].values():
+        if entry["finished"] is not None:
+            continue
+        if entry["job"] is None:
+            waiting.append(entry)
+            pending += 1
+            continue
+        job = queue.status(entry["job"])
+        if job["state"] == "done":
+            _finish_batch_entry(entry, job["result"], fresh=True)
+            batch["scanned"] += 1
+        elif job["state"] in ("failed", "unknown"):
+            entry["status"] = "Failed"
+            entry["findings"] = [job.get("error", "Result expired")]
+            entry["finished"] = time.time()
+            record_scan(entry["file_id"], entry["name"], entry["key"], entry["kind"],
+                        error=entry["findings"][0])
+        else:
+            entry["status"] = job["state"].capitalize()
+            pending += 1
+            in_flight += 1
+    for entry in waiting[:max(2 * queue.workers - in_flight, 0)]:
+        _submit_batch_entry(queue, entry)
+    return pending
+
+
+def _batch():
+    """This session's batch, kept in its memory store rather than ``st.session_state``."""
+    batch = session_memory().get("batch")
+    if batch is None:
+        batch = {"files": {}, "started": time.time(), "scanned": 0}
+    return batch
+
+
+def _keep_batch(batch, pending):
+    # Pinned while jobs are out (their ids live only here), spillable after.
+    session_memory().put("batch", batch, pinned=pending > 0)
+
+
+def _show_batch_table(batch, pending):
+    files = batch["files"].values()
+    done = len(batch["files"]) - pending
+    elapsed = max(time.time() - batch["started"], 1e-6)
+    # Throughput only counts real scans; cache hits would flatter it.
+    rate = batch["scanned"] / elapsed
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Scanned", f"{done} / {len(batch['files'])}")
+    col2.metric("Throughput", f"{rate:.2f} files/s")
+    col3.metric("ETA", f"{pending / rate:.0f}s" if pending and rate else "—")
+    col4.metric("Flagged", sum(e["status"] == "Suspected Tampering" for e in files))
+    st.dataframe(pd.DataFrame({
+        "File": [e["name"] for e in files],
+        "Status": [e["status"] for e in files],
+        "Score": [e["score"] for e in files],
+        "Findings": ["; ".join(e["findings"]) for e in files],
+        "Seen Before": [sightings_summary(e["seen"]) for e in files],
+    }), hide_index=True, use_container_width=True)
+
+
+@st.fragment(run_every=1)
+def show_batch_progress():
+    """Live-updating batch table while scans are still running."""
+    batch = _batch()
+    pending = _advance_batch(batch)
+    _keep_batch(batch, pending)
+    if not pending:
+        st.rerun()
+    st.progress(1 - pending / len(batch["files"]), text=f"{pending} file(s) remaining...")
+    _show_batch_table(batch, pending)
+
+
+def show_batch_scan(uploaded_files):
+    """Fan a multi-file upload out across the shared scan queue."""
+    batch = _batch()
+    files = batch["files"]
+    current = {f.file_id for f in uploaded_files}
+    for file_id in [fid for fid in files if fid not in current]:
+        del files[file_id]
+    if not any(e["finished"] is None for e in files.values()):
+        # A fresh batch: measure throughput from now on.
+        batch["started"] = time.time()
+        batch["scanned"] = 0
+
+    for f in uploaded_files:
+        if f.file_id in files:
+            continue
+        kind = "pdf" if f.type == "application/pdf" else "image"
+        key = upload_key(f, kind)
+        queue_text_extraction(f, key, kind)
+        fingerprint = upload_fingerprint(key, f) if kind == "image" else None
+        entry = files[f.file_id] = {"file_id": f.file_id, "name": f.name, "kind": kind, "key": key,
+                                    "fingerprint": fingerprint,
+                                    "seen": prior_sightings(f.file_id, fingerprint),
+                                    "path": None, "job": None, "status": "Waiting", "score": None,
+                                    "findings": [], "finished": None}
+        cached = get_scan_cache().get(entry["key"])
+        if cached is not None:
+            _finish_batch_entry(entry, cached)
+        else:
+            # Written out now; _advance_batch queues it when there is room.
+            entry["path"] = upload_path(f)
+
+    pending = _advance_batch(batch)
+    _keep_batch(batch, pending)
+    if pending:
+        show_batch_progress()
+    else:
+        st.success(f"✅ Batch complete. {len(files)} file(s) scanned.")
+        _show_batch_table(batch, 0)
+
+
+def show_scan_result(result, size):
+    """Render a ``scanner.ScanResult`` below the uploaded document."""
+    if result.status == "Clean":
+        st.success(f"✅ Scan complete. No threats detected ({result.confidence}% confidence).")
+    else:
+        st.error(f"⚠️ Scan complete. {result.status} ({result.confidence}% confidence).")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Tamper Score", f"{result.score:.2f}")
+    col2.metric("Error Level", f"{result.ela_score:.2f}")
+    col3.metric("Copy-Move", f"{result.copy_move_score:.2f}")
+    col4.metric("Metadata", f"{result.metadata_score:.2f}")
+    for finding in result.findings:
+        st.write(f"- {finding}")
+    with timed("render heatmap"):
+        heatmap = heatmap_image(result, size)
+    st.image(heatmap, caption=f"Tampering heatmap (scanned in {result.elapsed:.2f}s)",
+             use_container_width=True)
+
+
+def render():
+    st.header("📤 Upload & Scan Documents")
+
+    batch_mode = st.toggle("Batch mode", help="Upload many documents and scan them in parallel")
+    if batch_mode:
+        st.subheader("Upload Documents for Batch Scanning")
+        uploaded_files = st.file_uploader(
+            "Upload documents or images", type=["png", "jpg", "jpeg", "pdf"], accept_multiple_files=True)
+        uploaded_files = track_uploads(uploaded_files or [])
+        if uploaded_files:
+            show_batch_scan(uploaded_files)
+    else:
+        st.subheader("Upload Documents for Scanning")
+        uploaded_file = st.file_uploader(
+            "Upload a document or image", type=["png", "jpg", "jpeg", "pdf"])
+        accepted = track_uploads([uploaded_file] if uploaded_file else [])
+        uploaded_file = accepted[0] if accepted else None
+        if uploaded_file:
+            file_details = {"filename": uploaded_file.name, "type": uploaded_file.type}
+            st.write("Uploaded File Details:", file_details)
+            if uploaded_file.type in ["image/png", "image/jpg", "image/jpeg"]:
+                key = upload_key(uploaded_file, "image")
+                queue_text_extraction(uploaded_file, key, "image")
+                thumbnail, size = upload_preview(key, uploaded_file)
+                st.image(thumbnail, caption="Uploaded Image", use_container_width=True)
+                st.success("✅ File uploaded successfully. Starting scan...")
+                fingerprint = upload_fingerprint(key, uploaded_file)
+                show_prior_sightings(prior_sightings(uploaded_file.file_id, fingerprint))
+                cached = get_scan_cache().get(key)
+                if cached is not None:
+                    record_scan(uploaded_file.file_id, uploaded_file.name, key, "image", cached,
+                                fingerprint=fingerprint, fresh=False)
+                    show_scan_result(cached, size)
+                else:
+                    jobs = st.session_state.setdefault("scan_jobs", {})
+                    if uploaded_file.file_id not in jobs:
+                        jobs[uploaded_file.file_id] = get_scan_queue().submit(
+                            upload_path(uploaded_file), uploaded_file.name)
+                    show_scan_job(uploaded_file, jobs[uploaded_file.file_id], size, key)
+            elif uploaded_file.type == "application/pdf":
+                st.success("✅ File uploaded successfully. Scanning page by page...")
+                show_pdf_scan(uploaded_file)
+            else:
+                st.warning("Only PNG, JPEG and PDF documents can be scanned.")
@@ -0,0 +1,66 @@
+"""Homepage: welcome text in the chosen language and the "At a Glance" counters."""
+
+import streamlit as st
+
+from assets import home_stylesheet
+from data import scan_counters
+from resources import get_language_pack, get_languages, get_points
+
+# English source strings; translations live in locale/ (see i18n.py).
+FEATURES = [
+    "📚 Multilingual Q&A: Get answers in your local language.",
+    "🛡️ Rights Defense: Equip yourself with constitutional knowledge.",
+    "🔍 Easy Search: Find answers quickly and easily.",
+    "🤝 Community Support: Connect with others defending their rights.",
+    "🔔 Notifications: Stay updated with relevant rights alerts.",
+]
+
+
+def render():
+    # Custom CSS for enhanced look and feel
+    st.markdown(home_stylesheet(), unsafe_allow_html=True)
+
+    # Language selection dropdown with reduced width and centered
+    languages = get_languages()
+    language = st.selectbox(
+        "Select your language / अपनी भाषा चुनें",
+        options=list(languages),
+        index=0
+    )
+
+    _ = get_language_pack(languages[language]).gettext
+
+    st.markdown(f"# {_('Welcome to Swarajya Scanner! 📜')}")
+    st.markdown(f"### {_('Give every citizen a Constitution in their pocket, and the guts to use it.')}")
+    st.write(_("Swarajya Scanner empowers you with knowledge of your constitutional rights in your "
+               "vernacular language. Ask questions, get answers, and defend your rights with confidence."))
+
+    # Image slot below intro, centered
+    cols = st.columns([1, 2, 1])
+    with cols[1]:
+        st.image(
+            "Image.png",       # <-- Replace with your image path or URL
+            use_container_width=True,
+            caption="Swarajya Scanner"
+        )
+
+    # Get started button (dummy, no action for now)
+    if st.button(_('Get Started'), key="get_started_btn"):
+        st.info("Let's get started!")
+
+    st.markdown(f"### {_('Key Features')}")
+    for feature in FEATURES:
+        st.write(f"- {_(feature)}")
+
+    # Infographics - example metrics
+    st.markdown("---")
+    st.subheader("At a Glance")
+
+    counters = scan_counters()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Scans", counters["total_scans"])
+    col2.metric("Threats Detected", counters["threats_detected"])
+    col3.metric("Users Registered", get_points().user_count())
+    col4.metric("Documents Verified", counters["documents_verified"])
+
+    st.markdown(f"---\n<footer style='text-align:center; color:gray;'>{_('© 2025 Swarajya Scanner. All rights reserved.')}</footer>", unsafe_allow_html=True)
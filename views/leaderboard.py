@@ -0,0 +1,79 @@
+"""Leaderboard page: ranked contributors with search and paging."""
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from points import TIMEFRAMES
+from resources import get_points
+from tables import link, paged_table, text
+from timing import timed
+
+BOARD_SORTS = {
+    "Rank": ("rank", False),
+    "Lowest points": ("rank", True),
+    "Username A–Z": ("name", False),
+    "Username Z–A": ("name", True),
+}
+BOARD_COLUMNS = {
+    "Rank": text("Rank"),
+    "Username": text("Username"),
+    "Points": text("Points"),
+    "Profile Link": link("Profile", label="View Profile"),
+}
+
+
+def render():
+    st.title("🏆 Swarajya Scanner Leaderboard")
+
+    # Timeframe and search filters
+    col1, col2 = st.columns([1, 3])
+    timeframe = col1.selectbox("Timeframe", list(TIMEFRAMES))
+    search_username = col2.text_input("Search username", "")
+    board = get_points().board(TIMEFRAMES[timeframe])
+
+    st.markdown("### Leaderboard Table")
+    # The index sorts and slices; only the visible window becomes HTML.
+    paged_table(
+        "leaderboard",
+        lambda sort, descending, limit, offset: board.search(
+            search_username, limit=limit, offset=offset, order=sort, descending=descending),
+        BOARD_COLUMNS, BOARD_SORTS, page_size=25, filters=(timeframe, search_username.strip()))
+
+    st.markdown("---")
+
+    # Summary stats
+    total_users = len(board)
+    top10 = pd.DataFrame(board.top(10), columns=["Rank", "Username", "Points", "Profile"])
+    top_user = top10.iloc[0] if len(top10) else {"Username": "—", "Points": 0}
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Users on Leaderboard", total_users)
+    col2.metric("Top Scorer", top_user['Username'])
+    col3.metric("Top Score", top_user['Points'])
+
+    st.markdown("---")
+
+    # Visual leaderboard - Bar chart of top 10
+    st.markdown("### Top 10 Users by Points")
+    with timed("leaderboard chart"):
+        fig = px.bar(
+            top10,
+            x='Points',
+            y='Username',
+            orientation='h',
+            text='Points',
+            height=400,
+            labels={'Points': 'Points', 'Username': 'User'},
+            title=f"Top 10 Swarajya Scanner Contributors ({timeframe.lower()})"
+        )
+        fig.update_traces(textposition='outside')
+        fig.update_layout(yaxis=dict(autorange="reversed"), margin=dict(l=100, r=20, t=40, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("""
+    ---
+    *Leaderboard ranks users based on points accumulated through contributions such as raising public issues, contributing to discussions, and community engagement.*
+    """)
+
+    # Optional: Add any other features/features like badges etc. here
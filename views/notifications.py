@@ -0,0 +1,52 @@
+"""Notifications page: rights-alert topics and the user's inbox."""
+
+from datetime import datetime
+
+import streamlit as st
+
+from alerts import TOPICS
+from resources import current_user, get_alerts
+
+INBOX_REFRESH = 5
+
+
+@st.fragment(run_every=INBOX_REFRESH)
+def show_inbox(user):
+    """Inbox entries, newest first; refreshed while the page is open."""
+    alerts = get_alerts()
+    unread = alerts.unread(user)
+    col1, col2 = st.columns([4, 1])
+    col1.subheader(f"Inbox ({unread} unread)" if unread else "Inbox")
+    if col2.button("Mark all read", disabled=not unread):
+        alerts.mark_read(user)
+        st.rerun(scope="fragment")
+
+    entries = alerts.inbox(user)
+    if not entries:
+        st.info("No alerts yet. New alerts on your topics arrive here.")
+    for entry in entries:
+        at = datetime.fromtimestamp(entry["delivered_at"]).strftime("%Y-%m-%d %H:%M")
+        marker = "" if entry["read_at"] else "🔵 "
+        for alert in entry["alerts"]:
+            topics = ", ".join(t for t in alert["topics"] if t in TOPICS) or "Everyone"
+            with st.expander(f"{marker}{alert['title']} · {topics} · {at}"):
+                st.write(alert["body"])
+
+
+def render():
+    st.header("🔔 Notifications")
+    user = current_user()
+    alerts = get_alerts()
+
+    topics = alerts.subscriptions(user)
+    if topics is None:
+        # Known users receive broadcasts even before choosing any topic.
+        alerts.subscribe(user, [])
+        topics = []
+    chosen = st.multiselect("Alert me about", TOPICS, default=topics,
+                            help="Alerts for everyone are always delivered")
+    if sorted(chosen) != topics:
+        alerts.subscribe(user, chosen)
+        st.toast("Subscriptions saved")
+
+    show_inbox(user)
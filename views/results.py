@@ -0,0 +1,84 @@
+"""Results page: the scan history, newest first, with keyset paging."""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import ocr
+from history import confidence
+from data import scan_page, text_search
+
+
+def _confidences(rows):
+    return [f"{c}%" if c is not None else "—" for c in (confidence(r["status"], r["score"]) for r in rows)]
+
+
+def _scanned_at(rows):
+    return [datetime.fromtimestamp(r["scanned_at"]).strftime("%Y-%m-%d %H:%M") for r in rows]
+
+
+def show_text_search():
+    query = st.text_input("Search document text", "", placeholder="Words printed in the document")
+    missing = ocr.missing()
+    if missing:
+        searchable = "only PDFs with a text layer" if ocr.can_extract("pdf") else "no documents"
+        st.warning(f"Text search is limited: {missing} is not installed on this server, so {searchable} "
+                   "can be found by their text. Images and scanned pages are not indexed.")
+    if not query.strip():
+        return
+    rows = text_search(query)
+    if not rows:
+        st.info("No scanned document contains that text.")
+        return
+    st.dataframe(pd.DataFrame({
+        "Document": [r["name"] for r in rows],
+        "Status": [r["status"] for r in rows],
+        "Confidence": _confidences(rows),
+        "Match": [r["snippet"].replace("\n", " ") for r in rows],
+        "Scanned At": _scanned_at(rows),
+    }), hide_index=True, use_container_width=True)
+
+
+def render():
+    st.header("📁 Scan Results")
+    st.write("Your scan history, newest first.")
+    show_text_search()
+
+    col1, col2, col3 = st.columns([2, 3, 1])
+    status_filter = col1.selectbox("Status", ["All", "Clean", "Suspected Tampering", "Failed"])
+    name_filter = col2.text_input("Document name starts with", "")
+    page_size = col3.selectbox("Rows", [25, 50, 100])
+
+    # Keyset pagination: the session keeps the cursor of every page it has
+    # visited, and the stack is reset whenever the filters change.
+    filters = (status_filter, name_filter.strip(), page_size)
+    if st.session_state.get("results_filters") != filters:
+        st.session_state["results_filters"] = filters
+        st.session_state["results_cursors"] = [None]
+    cursors = st.session_state["results_cursors"]
+
+    rows, next_cursor = scan_page(
+        status=None if status_filter == "All" else status_filter,
+        name_prefix=name_filter.strip() or None,
+        after=cursors[-1],
+        limit=page_size,
+    )
+    if rows:
+        st.dataframe(pd.DataFrame({
+            "Document": [r["name"] for r in rows],
+            "Status": [r["status"] for r in rows],
+            "Confidence": _confidences(rows),
+            "Scanned At": _scanned_at(rows),
+        }), hide_index=True, use_container_width=True)
+    else:
+        st.info("No scans match these filters yet.")
+
+    col_prev, col_page, col_next = st.columns([1, 4, 1])
+    if col_prev.button("← Newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    col_page.caption(f"Page {len(cursors)}")
+    if col_next.button("Older →", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()